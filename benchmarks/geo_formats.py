@@ -0,0 +1,54 @@
+"""
+File size, full read time and bounding box read time of the geocoded
+2019-2022 spending data as GeoJSON, GeoParquet and FlatGeobuf.
+
+The FlatGeobuf file leaves out the rows without geometry.
+
+Usage: python -m benchmarks.geo_formats
+"""
+import os
+import tempfile
+import time
+import warnings
+
+from src.chicago_participatory_urbanism.geo_output import GEO_FORMATS, read_geodata, write_geodata
+
+# the Loop and West Town
+BBOX = (-87.70, 41.87, -87.62, 41.92)
+
+
+def _time(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark():
+    geojson_file_path = os.path.join(os.getcwd(), 'data', '2019-2022 data_geocoded.geojson')
+    with warnings.catch_warnings():
+        # the unclosed alley rings
+        warnings.simplefilter('ignore', RuntimeWarning)
+        data = read_geodata(geojson_file_path)
+    print(f"{len(data)} rows, {data.geometry.notna().sum()} with geometry")
+
+    with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        file_paths = {'geojson': geojson_file_path}
+        for geo_format, extension in GEO_FORMATS.items():
+            if geo_format != 'geojson':
+                file_paths[geo_format] = os.path.join(directory, 'data_geocoded' + extension)
+                write_geodata(data, file_paths[geo_format], geo_format)
+
+        for geo_format, file_path in file_paths.items():
+            size = os.path.getsize(file_path) / 2**20
+            read_time, full = _time(lambda: read_geodata(file_path))
+            bbox_time, in_bbox = _time(lambda: read_geodata(file_path, bbox=BBOX))
+            print(f"  {geo_format}: {size:.2f} MiB, read {len(full)} rows in {read_time * 1000:.0f}ms, "
+                  f"{len(in_bbox)} rows in the bounding box in {bbox_time * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    run_benchmark()
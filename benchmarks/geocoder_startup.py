@@ -0,0 +1,32 @@
+"""
+Compare local geocoder startup time: parsing the CSV/GeoJSON assets
+against loading the binary cache.
+
+Usage: python -m benchmarks.geocoder_startup
+"""
+import tempfile
+import time
+
+from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+
+
+def _time_geocoder(**kwargs) -> float:
+    start = time.perf_counter()
+    Geocoder(**kwargs)
+    return time.perf_counter() - start
+
+
+def run_benchmark(repeats: int = 3):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        source_times = [_time_geocoder(use_cache=False) for _ in range(repeats)]
+        cold_time = _time_geocoder(cache_dir=cache_dir)
+        warm_times = [_time_geocoder(cache_dir=cache_dir) for _ in range(repeats)]
+
+    print(f"CSV/GeoJSON load:  {min(source_times):.2f}s (best of {repeats})")
+    print(f"Cache build:       {cold_time:.2f}s")
+    print(f"Cache load:        {min(warm_times):.2f}s (best of {repeats})")
+    print(f"Speedup:           {min(source_times) / min(warm_times):.1f}x")
+
+
+if __name__ == '__main__':
+    run_benchmark()
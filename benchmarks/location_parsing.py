@@ -0,0 +1,61 @@
+"""
+Compare location parse rates on the 2019-2022 location column: detecting the
+format and then extracting it (two regex matches against the raw pattern strings)
+against parse_location's single compiled match.
+
+Usage: python -m benchmarks.location_parsing
+"""
+import os
+import re
+import time
+
+import pandas as pd
+
+import src.chicago_participatory_urbanism.ward_spending.location_format_processing as lfp
+
+extract_functions = {
+    lfp.LocationFormat.STREET_ADDRESS: lfp.extract_street_address,
+    lfp.LocationFormat.STREET_ADDRESS_RANGE: lfp.extract_address_range_street_addresses,
+    lfp.LocationFormat.ALLEY: lfp.extract_alley_intersections,
+    lfp.LocationFormat.STREET_SEGMENT_INTERSECTIONS: lfp.extract_segment_intersections,
+    lfp.LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION: lfp.extract_segment_address_intersection_info,
+    lfp.LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS: lfp.extract_segment_intersection_address_info,
+    lfp.LocationFormat.INTERSECTION: lfp.extract_intersection,
+}
+
+
+def _detect_then_extract(location: str):
+    location = location.strip()
+    for format, pattern in lfp.location_patterns.items():
+        if re.match(pattern, location):
+            return format, extract_functions[format](location)
+    return None, None
+
+
+def _parse_rate(parse, locations, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for location in locations:
+            parse(location)
+        times.append(time.perf_counter() - start)
+    return len(locations) / min(times)
+
+
+def run_benchmark(repeats: int = 5):
+    data = pd.read_csv(os.path.join(os.getcwd(), 'data', 'ward_spending', '2019-2022 data.csv'))
+    locations = [location for text in data['location'].dropna().astype(str) for location in text.split(';')]
+
+    assert all(_detect_then_extract(location) == lfp.parse_location(location) for location in locations)
+
+    detect_then_extract_rate = _parse_rate(_detect_then_extract, locations, repeats)
+    parse_location_rate = _parse_rate(lfp.parse_location, locations, repeats)
+
+    print(f"{len(locations)} locations")
+    print(f"Detect then extract: {detect_then_extract_rate:,.0f} locations/s (best of {repeats})")
+    print(f"parse_location:      {parse_location_rate:,.0f} locations/s (best of {repeats})")
+    print(f"Speedup:             {parse_location_rate / detect_then_extract_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,40 @@
+"""
+Local geocoding time for the 2019-2022 location column with 1, 2, 4 and 8
+worker processes sharing one loaded Geocoder.
+
+Usage: python -m benchmarks.parallel_geocoding
+"""
+import contextlib
+import io
+import os
+import time
+
+import pandas as pd
+
+from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+from src.chicago_participatory_urbanism.ward_spending.location_geocoding import LocationCache, LocationGeocoder
+
+
+def _time_workers(geocoder, texts, workers: int) -> float:
+    # a fresh cache each run so every location is geocoded
+    location_geocoder = LocationGeocoder(geocoder, LocationCache())
+    start = time.perf_counter()
+    # silence the per-location "not found" messages
+    with contextlib.redirect_stdout(io.StringIO()):
+        location_geocoder.process_location_texts_in_parallel(texts, workers)
+    return time.perf_counter() - start
+
+
+def run_benchmark(worker_counts=(1, 2, 4, 8)):
+    data = pd.read_csv(os.path.join(os.getcwd(), 'data', 'ward_spending', '2019-2022 data.csv'))
+    texts = data['location'].dropna().astype(str).tolist()
+    geocoder = Geocoder()
+
+    print(f"{len(texts)} location texts, {os.cpu_count()} CPUs")
+    times = {workers: _time_workers(geocoder, texts, workers) for workers in worker_counts}
+    for workers, elapsed in times.items():
+        print(f"{workers} workers: {elapsed:.2f}s ({times[worker_counts[0]] / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,54 @@
+"""
+Pages per second of each PDF text engine on the menu posting PDFs in data/pdf,
+and how many of its table rows match the pypdf2 engine's, exactly and ignoring
+whitespace. Engines whose library isn't installed are skipped.
+
+Usage: python -m benchmarks.pdf_engines
+"""
+import os
+import time
+
+from src.chicago_participatory_urbanism.ward_spending.extract_text_from_pdf import iter_table_rows
+from src.chicago_participatory_urbanism.ward_spending.pdf_engines import PDF_ENGINES, get_pdf_engine
+from src.scripts.ward_spending_pdf_data_extraction import files
+
+
+def _read_rows(engine, pdf_file_path):
+    start = time.perf_counter()
+    pages_spans = list(engine.iter_pages_spans(pdf_file_path))
+    elapsed = time.perf_counter() - start
+    return len(pages_spans), elapsed, list(iter_table_rows(pages_spans))
+
+
+def _squash_whitespace(row):
+    return {column: "".join(str(value).split()) for column, value in row.items()}
+
+
+def run_benchmark():
+    engines = {}
+    for name in PDF_ENGINES:
+        engine = get_pdf_engine(name)
+        try:
+            engine.page_count(os.path.join(os.getcwd(), 'data', 'pdf', files[0]))
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        engines[name] = engine
+
+    for pdf_file_name in files:
+        pdf_file_path = os.path.join(os.getcwd(), 'data', 'pdf', pdf_file_name)
+        print(pdf_file_name)
+        reference_rows = None
+        for name, engine in engines.items():
+            num_pages, elapsed, rows = _read_rows(engine, pdf_file_path)
+            if reference_rows is None:
+                reference_rows = rows
+            same = sum(row == reference_row for row, reference_row in zip(rows, reference_rows))
+            same_text = sum(_squash_whitespace(row) == _squash_whitespace(reference_row)
+                            for row, reference_row in zip(rows, reference_rows))
+            print(f"  {name}: {num_pages / elapsed:.0f} pages/s, {len(rows)} rows, "
+                  f"{same}/{len(reference_rows)} identical, {same_text} ignoring whitespace")
+
+
+if __name__ == '__main__':
+    run_benchmark()
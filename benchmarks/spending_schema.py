@@ -0,0 +1,84 @@
+"""
+Memory and groupby time of the combined spending data with object columns vs.
+the post_processor.SPENDING_DTYPES schema, and post-processing throughput of
+the old object-column pipeline vs. post_process_data.
+
+The checked-in 2019-2022 and 2024 data is stacked 4 times, about the size of
+2005-2024. The throughput comparison needs the PDF extracts in data/output
+(run extract_ward_spending_data_from_pdfs first) and is skipped without them.
+
+Usage: python -m benchmarks.spending_schema
+"""
+import os
+import re
+import time
+
+import pandas as pd
+
+from src.chicago_participatory_urbanism.ward_spending.categorization import get_menu_category
+from src.chicago_participatory_urbanism.ward_spending.post_processor import apply_spending_schema, post_process_data
+from src.scripts.ward_spending_post_processing import files
+
+
+def _object_columns(data):
+    # what post_process_data used to return
+    data = data.astype({column: object for column in ('item', 'location', 'category')})
+    data['year'] = data['year'].astype(str).astype(object)
+    return data
+
+
+def _legacy_post_process_data(file_name, year):
+    data = pd.read_csv(file_name, index_col=None, dtype=object)
+    data['ward'] = data['ward'].astype(int)
+    data['item'] = data['item'].str.replace(r'\s\(\d+\)', '', regex=True)
+    data['year'] = year
+    data['cost'] = data['cost'].str.replace(r'[\$,]', '', regex=True).astype(float)
+    data = data.dropna(subset=['item', 'cost', 'location'])
+    data["category"] = data["item"].apply(get_menu_category)
+    return data
+
+
+def _time(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _compare_frames():
+    data = pd.concat([
+        pd.read_csv(os.path.join(os.getcwd(), 'data', 'ward_spending', '2019-2022 data.csv')),
+        pd.read_csv(os.path.join(os.getcwd(), 'data', '2024 Q1-Q2 menu spending.csv')),
+    ] * 4, ignore_index=True)
+    frames = {'object columns': _object_columns(data), 'schema': apply_spending_schema(data)}
+
+    print(f"{len(data)} rows")
+    for name, frame in frames.items():
+        memory = frame.memory_usage(deep=True).sum() / 2**20
+        elapsed = _time(lambda: frame.groupby(['ward', 'year', 'category'], observed=True)['cost'].sum())
+        print(f"  {name}: {memory:.1f} MiB, ward/year/category cost totals in {elapsed * 1000:.1f}ms")
+
+
+def _compare_post_processing():
+    file_paths = {file: os.path.join(os.getcwd(), 'data', 'output', file) for file in files}
+    if not all(os.path.exists(file_path) for file_path in file_paths.values()):
+        print("No PDF extracts in data/output, skipping post-processing throughput")
+        return
+
+    for name, process in [('object columns', _legacy_post_process_data), ('schema', post_process_data)]:
+        def run():
+            return [process(file_path, re.search(r"20\d{2}", file).group()) for file, file_path in file_paths.items()]
+        rows = sum(len(data) for data in run())
+        elapsed = _time(run, repeat=3)
+        print(f"  post-processing, {name}: {rows / elapsed:,.0f} rows/s")
+
+
+def run_benchmark():
+    _compare_frames()
+    _compare_post_processing()
+
+
+if __name__ == '__main__':
+    run_benchmark()
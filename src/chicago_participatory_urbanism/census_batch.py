@@ -0,0 +1,91 @@
+'''
+US Census batch geocoder client.
+
+The addressbatch endpoint takes a CSV upload of up to 10,000 addresses
+("Unique ID, Street address, City, State, ZIP") and answers with one CSV
+row per address:
+"1","3221 W ARMITAGE AVE, CHICAGO, IL, ","Match","Exact","<matched address>","-87.70,41.91","<tiger id>","L"
+Unmatched addresses come back as "No_Match" or "Tie" rows without coordinates.
+
+https://geocoding.geo.census.gov/geocoder/Geocoding_Services_API.html#_Toc115776908
+'''
+import csv
+import io
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError, ProviderSession
+
+CENSUS_BATCH_URL = 'https://geocoding.geo.census.gov/geocoder/locations/addressbatch'
+MAX_BATCH_SIZE = 10000
+
+
+def build_batch_file(addresses: List[str], city: str = 'Chicago', state: str = 'IL') -> str:
+    """Return the upload CSV, using each address's list position as its unique ID."""
+    batch_file = io.StringIO()
+    writer = csv.writer(batch_file, lineterminator='\n')
+    for i, address in enumerate(addresses):
+        writer.writerow([i, address, city, state, ''])
+    return batch_file.getvalue()
+
+
+def parse_batch_response(response_text: str) -> Dict[int, Optional[np.array]]:
+    """Return unique ID -> (longitude, latitude) array, None for unmatched rows."""
+    results = {}
+    for row in csv.reader(io.StringIO(response_text)):
+        if not row or not row[0].strip().isdigit():
+            continue
+        coordinates = None
+        if len(row) > 5 and row[2] == 'Match' and row[5]:
+            longitude, latitude = row[5].split(',')
+            coordinates = np.array([float(longitude), float(latitude)])
+        results[int(row[0])] = coordinates
+    return results
+
+
+class CensusBatchGeocoder:
+
+    def __init__(
+            self,
+            session: ProviderSession,
+            url: str = CENSUS_BATCH_URL,
+            benchmark: str = '4',
+            batch_size: int = MAX_BATCH_SIZE,
+            timeout: float = 600):
+        """
+        Parameters:
+        - session (ProviderSession): pooled session to upload with
+        - url (str): addressbatch endpoint
+        - benchmark (str): Census benchmark, 4 is Public_AR_Current (same as the one-line lookups)
+        - batch_size (int): addresses per upload, at most 10,000
+        - timeout (float): seconds to wait for one batch to be geocoded
+        """
+        self.session = session
+        self.url = url
+        self.benchmark = benchmark
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.timeout = timeout
+
+    def geocode(self, addresses: List[str]) -> List[Optional[np.array]]:
+        """
+        Return (longitude, latitude) arrays aligned with the addresses, None where there was no match.
+
+        Raises ProviderRequestError if a batch can't be submitted.
+        """
+        coordinates = []
+        for start in range(0, len(addresses), self.batch_size):
+            batch = addresses[start:start + self.batch_size]
+            logging.info(f"Submitting {len(batch)} addresses to the Census batch geocoder")
+            resp = self.session.post(
+                self.url,
+                data={'benchmark': self.benchmark},
+                files={'addressFile': ('addresses.csv', build_batch_file(batch), 'text/csv')},
+                timeout=self.timeout)
+            if resp.status_code != 200:
+                raise ProviderRequestError(f"census batch request failed: HTTP {resp.status_code}")
+
+            results = parse_batch_response(resp.text)
+            coordinates.extend(results.get(i) for i in range(len(batch)))
+        return coordinates
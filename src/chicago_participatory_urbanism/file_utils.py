@@ -0,0 +1,19 @@
+'''
+File helpers shared by the caches and scripts, kept free of heavy imports
+(pandas, geopandas, pyarrow) so lightweight modules and worker processes
+can use them.
+'''
+import hashlib
+import os
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('WARD_WISE_CACHE_DIR', Path.home() / '.cache' / 'ward-wise'))
+
+
+def file_sha256(file_path) -> str:
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
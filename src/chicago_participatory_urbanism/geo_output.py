@@ -0,0 +1,146 @@
+'''
+Reading and writing geocoded data as GeoJSON, GeoParquet or FlatGeobuf.
+
+- geojson: text, readable anywhere, but slow to load and several times larger
+- parquet: GeoParquet with WKB geometry and a bbox column, so a bounding box
+  read only decodes the row groups it overlaps
+- fgb: FlatGeobuf with its packed R-tree spatial index, so a bounding box read
+  only decodes the features it overlaps. The index can't hold features without
+  geometry, so those rows are left out.
+
+Streamed output is written as a GeoJSON text sequence (RFC 8142): one feature
+per record, each record a record separator, the feature's JSON and a newline,
+so features can be appended as they're geocoded and read back one at a time,
+and an interrupted run carries on after the last complete record.
+'''
+import json
+import logging
+import os
+from typing import Iterator, Optional, TextIO, Tuple
+
+import geopandas as gpd
+import numpy as np
+
+GEO_FORMATS = {
+    'geojson': '.geojson',
+    'parquet': '.parquet',
+    'fgb': '.fgb',
+}
+
+
+def with_format_extension(file_path, geo_format: str) -> str:
+    """Return file_path with the extension of geo_format, e.g. data.geojson -> data.parquet."""
+    return os.path.splitext(file_path)[0] + GEO_FORMATS[geo_format]
+
+
+def _format_of(file_path) -> str:
+    extension = os.path.splitext(file_path)[1].lower()
+    for geo_format, format_extension in GEO_FORMATS.items():
+        if extension == format_extension:
+            return geo_format
+    # e.g. .json, or a CSV geopandas reads through GDAL
+    return 'geojson'
+
+
+def write_geodata(data: gpd.GeoDataFrame, file_path, geo_format: Optional[str] = None):
+    """
+    Write geocoded data in geo_format, by default the one of file_path's extension.
+    """
+    geo_format = geo_format or _format_of(file_path)
+    if geo_format == 'parquet':
+        data.to_parquet(file_path, geometry_encoding='WKB', write_covering_bbox=True)
+    elif geo_format == 'fgb':
+        missing = data.geometry.isna() | data.geometry.is_empty
+        if missing.any():
+            logging.warning(f"Leaving {missing.sum()} rows without geometry out of {file_path}, "
+                            f"FlatGeobuf's spatial index can't hold them")
+        data[~missing].to_file(file_path, driver='FlatGeobuf', SPATIAL_INDEX='YES')
+    else:
+        data.to_file(file_path, driver='GeoJSON')
+
+
+def read_geodata(file_path, bbox: Optional[Tuple[float, float, float, float]] = None) -> gpd.GeoDataFrame:
+    """
+    Read geocoded data written with write_geodata.
+
+    Parameters:
+    - bbox: (minx, miny, maxx, maxy), only reading rows whose geometry
+            intersects it; GeoParquet and FlatGeobuf skip the rest without
+            decoding it
+    """
+    if _format_of(file_path) == 'parquet':
+        return gpd.read_parquet(file_path, bbox=bbox)
+    # earlier GeoJSON outputs have some alley polygons with unclosed rings
+    return gpd.read_file(file_path, bbox=bbox, on_invalid='fix')
+
+
+RECORD_SEPARATOR = '\x1e'
+
+
+def _json_value(value):
+    # numpy scalars in the properties
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} isn't JSON serializable")
+
+
+def write_geojson_seq(file: TextIO, data: gpd.GeoDataFrame):
+    """Append data's rows to an open GeoJSON text sequence file, one feature record each."""
+    for feature in data.iterfeatures(na='null', drop_id=True):
+        file.write(RECORD_SEPARATOR + json.dumps(feature, default=_json_value) + '\n')
+    file.flush()
+
+
+def iter_geojson_seq(file_path) -> Iterator[dict]:
+    """
+    Yield the features of a GeoJSON text sequence, one at a time. A truncated
+    last record, from an interrupted write, is skipped.
+    """
+    with open(file_path) as file:
+        for line in file:
+            record = line.lstrip(RECORD_SEPARATOR)
+            if not record.strip():
+                continue
+            try:
+                yield json.loads(record)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping an incomplete record in {file_path}")
+
+
+def resume_geojson_seq(file_path) -> int:
+    """
+    Return how many complete records a GeoJSON text sequence has, cutting off
+    whatever follows them (an interrupted write's partial record) so more can
+    be appended. 0 if the file doesn't exist.
+    """
+    if not os.path.exists(file_path):
+        return 0
+    records = 0
+    end = 0
+    with open(file_path, 'rb+') as file:
+        for line in file:
+            record = line.lstrip(RECORD_SEPARATOR.encode())
+            if record.strip():
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    json.loads(record)
+                except json.JSONDecodeError:
+                    break
+                records += 1
+            end += len(line)
+        if end < file.seek(0, os.SEEK_END):
+            logging.warning(f"Cutting an incomplete record off the end of {file_path}")
+            file.truncate(end)
+    return records
+
+
+def compact_geojson_seq(seq_file_path, output_file_path):
+    """Rewrite a GeoJSON text sequence as a FeatureCollection, a feature at a time."""
+    temp_file_path = output_file_path + '.tmp'
+    with open(temp_file_path, 'w') as output_file:
+        output_file.write('{"type": "FeatureCollection", "features": [\n')
+        for i, feature in enumerate(iter_geojson_seq(seq_file_path)):
+            output_file.write((',\n' if i else '') + json.dumps(feature))
+        output_file.write('\n]}\n')
+    os.replace(temp_file_path, output_file_path)
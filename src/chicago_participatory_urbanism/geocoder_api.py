@@ -2,12 +2,37 @@
 This section is taking processed street addresses and
 return multi_string coordinates in maps coordinates
 '''
-import requests
+import logging
+import threading
 import numpy as np
 from shapely.geometry import Point
-from src.chicago_participatory_urbanism.location_structures import Intersection
-import time
-from typing import Optional, Dict
+from src.chicago_participatory_urbanism.census_batch import CENSUS_BATCH_URL, CensusBatchGeocoder
+from src.chicago_participatory_urbanism.location_structures import Intersection, StreetAddress
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError, ProviderSession
+from src.chicago_participatory_urbanism.rate_limit import TokenBucket
+from src.chicago_participatory_urbanism.response_cache import ResponseCache
+from typing import Callable, Optional, Dict, List, Union
+
+PROVIDER_URLS = {
+    'address': 'https://datacatalog.cookcountyil.gov/resource/78yw-iddh.json',
+    'transport': 'https://data.cityofchicago.org/resource/pr57-gg9e.json',
+    'census': 'https://geocoding.geo.census.gov/geocoder/locations/onelineaddress',
+    'census_batch': CENSUS_BATCH_URL,
+    'nominatim': 'https://nominatim.openstreetmap.org/search',
+}
+
+# requests per second; Nominatim's usage policy allows at most 1
+DEFAULT_RATE_LIMITS = {
+    'address': 10,
+    'transport': 10,
+    'census': 10,
+    'nominatim': 1,
+}
+
+# values per `IN (...)` filter, keeping prefetch query URLs well under server limits
+PREFETCH_CHUNK_SIZE = 100
+# rows per page of a prefetch query
+PREFETCH_PAGE_SIZE = 5000
 
 
 class GeoCoderAPI:
@@ -16,12 +41,262 @@ class GeoCoderAPI:
     # https://dev.socrata.com/foundry/data.cityofchicago.org/pr57-gg9e
     # https://datacatalog.cookcountyil.gov/GIS-Maps/Cook-County-Address-Points/78yw-iddh
 
-    def __init__(self):
-        'headers to query socrata api'
+    def __init__(
+            self,
+            cache: Optional[ResponseCache] = None,
+            provider_urls: Optional[Dict[str, str]] = None,
+            rate_limits: Optional[Dict[str, float]] = None,
+            **session_options):
+        '''
+        :param cache: persistent response cache; repeated queries (hits and misses) are answered
+                      from it, and an offline cache never touches the network
+        :param provider_urls: override provider endpoints, e.g. to point at a local stub server
+        :param rate_limits: override requests per second for some providers, None for no limit
+        :param session_options: ProviderSession settings (timeout, max_retries, backoff_factor, ...)
+                                applied to every provider
+        '''
+        # headers to query socrata api
         self.api_header = {
             'Accept': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/116.0'
         }
+        self.cache = cache
+        self.provider_urls = {**PROVIDER_URLS, **(provider_urls or {})}
+        rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        # one pooled keep-alive session per provider, each with its own token bucket
+        # shared by every thread querying that provider
+        self.sessions = {
+            provider: ProviderSession(
+                provider,
+                headers=self.api_header,
+                rate_limiter=TokenBucket(rate_limits[provider]) if rate_limits.get(provider) else None,
+                **session_options)
+            for provider in PROVIDER_URLS
+        }
+        self.census_batch = CensusBatchGeocoder(
+            self.sessions['census_batch'], url=self.provider_urls['census_batch'])
+        # filled by prefetch(): address -> coordinates, and street name -> its center line segments
+        self.prefetched = {'address': {}, 'transport': {}}
+        # the provider failure, if any, of the lookup running on each thread
+        self._lookup_state = threading.local()
+
+    def latency_report(self) -> str:
+        return '\n'.join(session.latency_summary() for session in self.sessions.values())
+
+    def _cached_query(
+            self,
+            provider: str,
+            query: str,
+            fetch: Callable[[], Optional[np.array]]) -> Optional[np.array]:
+        '''
+        answer a provider query from the response cache, calling fetch() and storing
+        its result (including None) when the query isn't cached yet
+        '''
+        if self.cache is not None:
+            found, coordinates = self.cache.get(provider, query)
+            if found:
+                return None if coordinates is None else np.array(coordinates)
+            if self.cache.offline:
+                return None
+
+        try:
+            result = fetch()
+        except ProviderRequestError as e:
+            # leave it uncached so a later run tries again
+            logging.error(str(e))
+            self._lookup_state.error = e
+            return None
+
+        if self.cache is not None:
+            self.cache.set(provider, query, None if result is None else result.tolist())
+        return result
+
+    def _start_lookup(self):
+        self._lookup_state.error = None
+
+    def _no_point(self) -> None:
+        '''
+        end a lookup no provider found: None, or if a provider failed on it the
+        ProviderRequestError, so a transient failure isn't taken for a miss
+        '''
+        error = getattr(self._lookup_state, 'error', None)
+        if error is not None:
+            raise error
+        return None
+
+    def prefetch(
+            self,
+            locations: List[Union[StreetAddress, Intersection]],
+            chunk_size: int = PREFETCH_CHUNK_SIZE,
+            page_size: int = PREFETCH_PAGE_SIZE):
+        '''
+        Bulk-load what a batch of locations needs from the Cook County address points
+        and Chicago street center lines, so their lookups are answered from memory.
+
+        Instead of one `$where ... like` query per lookup, the distinct addresses and
+        street names are fetched with a few paged `IN (...)` queries selecting only
+        the fields the lookups use. Anything a query came back without is remembered
+        as a miss; anything whose query failed is left to the per-lookup queries.
+        Lookups the response cache answers aren't fetched again, what's fetched is
+        stored in it under the per-lookup queries, and an offline cache skips the
+        prefetch altogether.
+
+        Usage:
+        geocoder.prefetch(locations)
+        points = [geocoder.get_street_address_coordinates(address) for address in locations]
+        '''
+        if self.cache is not None and self.cache.offline:
+            # offline, lookups are only answered from the response cache
+            return
+
+        addresses = {str(location).upper() for location in locations if isinstance(location, StreetAddress)}
+        # the street segment lookups get_intersection_coordinates makes
+        crossings = {crossing
+                     for location in locations if isinstance(location, Intersection)
+                     for crossing in _street_crossings(location)}
+
+        # what the response cache answers already isn't fetched again
+        addresses = sorted(address for address in addresses - self.prefetched['address'].keys()
+                           if not self._is_cached('address', self._address_query_link(address)))
+        for start in range(0, len(addresses), chunk_size):
+            chunk = addresses[start:start + chunk_size]
+            try:
+                rows = self._fetch_socrata_rows(
+                    'address', 'cmpaddabrv', chunk, ['cmpaddabrv', 'the_geom'], page_size)
+            except ProviderRequestError as e:
+                logging.error(str(e))
+                continue
+
+            index = dict.fromkeys(chunk)
+            for row in rows:
+                address = row.get('cmpaddabrv')
+                # keep the first point, like the per-address query
+                if address in index and index[address] is None and 'the_geom' in row:
+                    index[address] = np.array(row['the_geom']['coordinates']).reshape(-1, 2)
+            self.prefetched['address'].update(index)
+            for address, coordinates in index.items():
+                self._cache_response('address', self._address_query_link(address), coordinates)
+
+        crossings = {crossing for crossing in crossings
+                     if not self._is_cached('transport', self._street_crossing_link(*crossing))}
+        streets = sorted({street for street, _, _ in crossings} - self.prefetched['transport'].keys())
+        for start in range(0, len(streets), chunk_size):
+            chunk = streets[start:start + chunk_size]
+            try:
+                rows = self._fetch_socrata_rows(
+                    'transport', 'street_nam', chunk, ['street_nam', 'f_cross', 't_cross', 'the_geom'], page_size)
+            except ProviderRequestError as e:
+                logging.error(str(e))
+                continue
+
+            index = {street: [] for street in chunk}
+            for row in rows:
+                if row.get('street_nam') in index and 'the_geom' in row:
+                    index[row['street_nam']].append({
+                        'f_cross': row.get('f_cross', ''),
+                        't_cross': row.get('t_cross', ''),
+                        'coordinates': np.array(row['the_geom']['coordinates']).reshape(-1, 2)[0],
+                    })
+            self.prefetched['transport'].update(index)
+            for crossing in crossings:
+                if crossing[0] in index:
+                    self._cache_response('transport', self._street_crossing_link(*crossing),
+                                         self._lookup_street_crossing(*crossing))
+
+    def clear_prefetched(self):
+        '''
+        forget what prefetch loaded, e.g. between the chunks of a long run, whose
+        lookups the response cache still answers
+        '''
+        self.prefetched = {'address': {}, 'transport': {}}
+
+    def _is_cached(self, provider: str, query: str) -> bool:
+        return self.cache is not None and (provider, query) in self.cache
+
+    def _cache_response(self, provider: str, query: str, result: Optional[np.array]):
+        if self.cache is not None:
+            self.cache.set(provider, query, None if result is None else result.tolist())
+
+    def _fetch_socrata_rows(
+            self,
+            provider: str,
+            field: str,
+            values: List[str],
+            select: List[str],
+            page_size: int) -> List[dict]:
+        '''
+        every row whose field is one of the values, fetched page by page
+        '''
+        quoted = ', '.join("'" + value.replace("'", "''") + "'" for value in values)
+        params = {
+            '$select': ','.join(select),
+            '$where': f'{field} IN ({quoted})',
+            '$order': ':id',
+            '$limit': page_size,
+        }
+
+        rows = []
+        while True:
+            resp = self.sessions[provider].get(
+                self.provider_urls[provider], params={**params, '$offset': len(rows)})
+            page = resp.json() if resp.status_code == 200 else None
+            # socrata reports query errors as a json object
+            if not isinstance(page, list):
+                raise ProviderRequestError(f"{provider} prefetch query failed: HTTP {resp.status_code}")
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def _lookup_address(self, query_string: str) -> Optional[np.array]:
+        if query_string in self.prefetched['address']:
+            return self.prefetched['address'][query_string]
+        return self._query_address_api(params={'cmpaddabrv': query_string})
+
+    def _address_query_link(self, query_string: str) -> str:
+        return self._socrata_query_link('address', params={'cmpaddabrv': query_string})
+
+    def _lookup_street_crossing(
+            self,
+            street: str,
+            cross_field: str,
+            cross_street: str) -> Optional[np.array]:
+        '''
+        first point of a segment of street whose cross_field ("f_cross" or "t_cross")
+        mentions cross_street
+        '''
+        if street in self.prefetched['transport']:
+            for segment in self.prefetched['transport'][street]:
+                if cross_street in segment[cross_field]:
+                    return segment['coordinates']
+            return None
+        return self._query_transport_api(
+            params={'street_nam': street},
+            sql_func=f'{cross_field} like "%25{cross_street}%25"')
+
+    def _street_crossing_link(self, street: str, cross_field: str, cross_street: str) -> str:
+        return self._socrata_query_link(
+            'transport',
+            params={'street_nam': street},
+            sql_func=f'{cross_field} like "%25{cross_street}%25"')
+
+    def _socrata_query_link(
+            self,
+            provider: str,
+            params: Dict[str, str],
+            sql_func: str = None) -> str:
+        base_link = self.provider_urls[provider] + "?$where="
+        query_params = ' AND '.join(k + ' like ' + "'"+str(v).upper() + "'"
+                                    for k, v in params.items())
+
+        if sql_func is not None:
+            '''
+            example:
+            link = ("https://data.cityofchicago.org/resource/pr57-gg9e.json?$where=street_nam='ARTESIAN' AND street_typ='AVE' " +
+                    "AND f_cross like '%2568TH%25'")
+            '''
+            sql_func_string = 'AND ' + sql_func
+            return base_link + query_params + sql_func_string
+        return base_link + query_params
 
     def _query_transport_api(
             self,
@@ -58,22 +333,11 @@ class GeoCoderAPI:
             self._query_transport_api(params={'street_nam': 'ARTESIAN', 'street_typ':'AVE'},
                                       sql_like='f_cross like "%2568TH%25"')
         '''
-        base_link = "https://data.cityofchicago.org/resource/pr57-gg9e.json?$where="
-        query_params = ' AND '.join(k + ' like ' + "'"+str(v).upper() + "'"
-                                    for k, v in params.items())
-
-        if sql_func is not None:
-            '''
-            example:
-            link = ("https://data.cityofchicago.org/resource/pr57-gg9e.json?$where=street_nam='ARTESIAN' AND street_typ='AVE' " +
-                    "AND f_cross like '%2568TH%25'")
-            '''
-            sql_func_string = 'AND ' + sql_func
-            link = base_link + query_params + sql_func_string
-        else:
-            link = base_link + query_params
+        link = self._socrata_query_link('transport', params, sql_func)
+        return self._cached_query('transport', link, lambda: self._fetch_transport_api(link))
 
-        resp = requests.get(link, headers=self.api_header)
+    def _fetch_transport_api(self, link: str) -> Optional[np.array]:
+        resp = self.sessions['transport'].get(link)
 
         # when json response is empty list or error message
         if (len(resp.json()) == 0) or (isinstance(resp.json(), dict)):
@@ -106,17 +370,11 @@ class GeoCoderAPI:
         self._query_transport_api(params={'street_nam': 'ARTESIAN', 'street_typ':'AVE'},
                                   sql_func='f_cross like "%2568TH%25"')
         '''
-        base_link = 'https://datacatalog.cookcountyil.gov/resource/78yw-iddh.json?$where='
-        query_params = ' AND '.join(k + ' like ' + "'"+str(v).upper() + "'"
-                                    for k, v in params.items())
+        link = self._socrata_query_link('address', params, sql_func)
+        return self._cached_query('address', link, lambda: self._fetch_address_api(link))
 
-        if sql_func is not None:
-            sql_func_string = 'AND ' + sql_func
-            link = base_link + query_params + sql_func_string
-        else:
-            link = base_link + query_params
-
-        resp = requests.get(link, headers=self.api_header)
+    def _fetch_address_api(self, link: str) -> Optional[np.array]:
+        resp = self.sessions['address'].get(link)
         # when json response is empty list or error message
         if (len(resp.json()) == 0) or (isinstance(resp.json(), dict)):
             return None
@@ -126,16 +384,18 @@ class GeoCoderAPI:
 
     def _query_nominatim(self, query_string: str) -> np.array:
         '''
-        rate limit of 1 request per second,
+        rate limit of 1 request per second (enforced by the provider session's token bucket),
         example - 200 E 40TH ST
         https://nominatim.openstreetmap.org/search?q=200 E 40TH ST chicago il&format=jsonv2
         '''
-        time.sleep(1)
         query_string = query_string + ', chicago il'
 
-        query_link = f'https://nominatim.openstreetmap.org/search?q={query_string}&format=jsonv2'
+        query_link = f"{self.provider_urls['nominatim']}?q={query_string}&format=jsonv2"
+
+        return self._cached_query('nominatim', query_link, lambda: self._fetch_nominatim(query_link))
 
-        resp = requests.get(query_link, headers=self.api_header)
+    def _fetch_nominatim(self, query_link: str) -> Optional[np.array]:
+        resp = self.sessions['nominatim'].get(query_link)
 
 
         # if return empty list
@@ -163,12 +423,56 @@ class GeoCoderAPI:
         self._query_census_api("3221 W ARMITAGE AVE")
 
         '''
-        query_string = query_string.replace('&', '%26').replace(' ', '%20')
+        query_link = self._census_query_link(query_string)
 
-        query_link = f'https://geocoding.geo.census.gov/geocoder/locations/onelineaddress?address={query_string}%2C%20Chicago%20IL&benchmark=4'
+        return self._cached_query('census', query_link, lambda: self._fetch_census_api(query_link))
 
+    def _census_query_link(self, query_string: str) -> str:
+        query_string = query_string.replace('&', '%26').replace(' ', '%20')
+        return f"{self.provider_urls['census']}?address={query_string}%2C%20Chicago%20IL&benchmark=4"
 
-        resp = requests.get(query_link, headers=self.api_header)
+    def _query_census_batch(self, query_strings: List[str]) -> List[Optional[np.array]]:
+        '''
+        geocode many addresses with the Census addressbatch endpoint
+
+        Results are cached under the same keys as the one-line lookups, so the
+        two paths answer each other's repeated queries. Only addresses that
+        aren't cached are uploaded, each distinct address once.
+        '''
+        results = [None] * len(query_strings)
+        to_submit = {}
+        for i, query_string in enumerate(query_strings):
+            if self.cache is not None:
+                found, coordinates = self.cache.get('census', self._census_query_link(query_string))
+                if found:
+                    results[i] = None if coordinates is None else np.array(coordinates)
+                    continue
+                if self.cache.offline:
+                    continue
+            to_submit.setdefault(query_string, []).append(i)
+
+        if not to_submit:
+            return results
+
+        try:
+            batch_results = self.census_batch.geocode(list(to_submit))
+        except ProviderRequestError as e:
+            # leave them uncached so a later run tries again
+            logging.error(str(e))
+            self._lookup_state.error = e
+            return results
+
+        for (query_string, positions), coordinates in zip(to_submit.items(), batch_results):
+            if self.cache is not None:
+                self.cache.set(
+                    'census', self._census_query_link(query_string),
+                    None if coordinates is None else coordinates.tolist())
+            for i in positions:
+                results[i] = coordinates
+        return results
+
+    def _fetch_census_api(self, query_link: str) -> Optional[np.array]:
+        resp = self.sessions['census'].get(query_link)
 
         street_match = resp.json()['result']['addressMatches']
 
@@ -199,10 +503,12 @@ class GeoCoderAPI:
 
         :Returns:
         - Point: A Shapely point with the GPS coordinates of the address (longitude, latitude).
+
+        :Raises:
+        - ProviderRequestError: no provider found the address, but one failed to answer
         '''
-        results = self._query_address_api(
-            params={'cmpaddabrv': str(address).upper()}
-        )
+        self._start_lookup()
+        results = self._lookup_address(str(address).upper())
         if results is not None and results.any():
             return Point(results)
 
@@ -218,7 +524,50 @@ class GeoCoderAPI:
         if results is not None and results.any():
             return Point(results)
         else:
-            return None
+            return self._no_point()
+
+    def geocode_addresses(self, addresses: List[StreetAddress]) -> np.ndarray:
+        '''
+        Return the GPS coordinates of many street addresses in Chicago.
+
+        Runs the same fallback chain as get_street_address_coordinates, but the Cook
+        County address points are prefetched in bulk, and every address they miss goes to the Census geocoder in
+        batch uploads rather than one request each. Nominatim only sees what
+        the Census geocoder misses too.
+
+        :Returns:
+        - numpy object array of Shapely points aligned with the input, None where no provider found the address,
+          and the ProviderRequestError where none found it but one failed to answer.
+        '''
+        self.prefetch(addresses)
+        query_strings = [str(address).upper() for address in addresses]
+        points = np.full(len(addresses), None, dtype=object)
+
+        unresolved = {}
+        for i, query_string in enumerate(query_strings):
+            self._start_lookup()
+            results = self._lookup_address(query_string)
+            if results is not None and results.any():
+                points[i] = Point(results)
+            else:
+                unresolved[i] = self._lookup_state.error
+
+        self._start_lookup()
+        census_results = self._query_census_batch([query_strings[i] for i in unresolved])
+        census_error = self._lookup_state.error
+        for (i, error), results in zip(unresolved.items(), census_results):
+            if results is not None and results.any():
+                points[i] = Point(results)
+                continue
+
+            self._start_lookup()
+            results = self._query_nominatim(query_string=query_strings[i])
+            if results is not None and results.any():
+                points[i] = Point(results)
+            else:
+                points[i] = error or census_error or self._lookup_state.error
+
+        return points
 
     def get_intersection_coordinates(
             self,
@@ -233,21 +582,19 @@ class GeoCoderAPI:
 
         Returns:
         - Point: A Shapely point with the GPS coordinates of the address (longitude, latitude).
+
+        Raises:
+        - ProviderRequestError: no provider found the intersection, but one failed to answer
         """
-        street_1 = intersection.street1.name
-        street_2 = intersection.street2.name
+        self._start_lookup()
+        street_1 = intersection.street1.name.upper()
+        street_2 = intersection.street2.name.upper()
 
-        result = self._query_transport_api(
-                params={'street_nam': street_1},
-                sql_func=f'f_cross like "%25{street_2}%25"'
-        )
+        result = self._lookup_street_crossing(street_1, 'f_cross', street_2)
         if result is not None and result.any():
             return Point(result)
 
-        result = self._query_transport_api(
-                params={'street_nam': street_2},
-                sql_func=f't_cross like "%25{street_1}%25"'
-        )
+        result = self._lookup_street_crossing(street_2, 't_cross', street_1)
         if result is not None and result.any():
             return Point(result)
 
@@ -256,3 +603,13 @@ class GeoCoderAPI:
         )
         if result is not None and result.any():
             return Point(result)
+        return self._no_point()
+
+
+def _street_crossings(intersection: Intersection) -> List[tuple]:
+    '''
+    (street, cross field, cross street) of the two segment lookups get_intersection_coordinates makes
+    '''
+    street_1 = intersection.street1.name.upper()
+    street_2 = intersection.street2.name.upper()
+    return [(street_1, 'f_cross', street_2), (street_2, 't_cross', street_1)]
@@ -0,0 +1,78 @@
+'''
+Concurrent geocoding on top of GeoCoderAPI.
+
+Each location still runs through GeoCoderAPI's provider fallback chain in
+order, but many locations are in flight at once. The blocking provider
+requests run in a thread pool driven by asyncio, and each provider's token
+bucket (in its ProviderSession) keeps that provider within its rate limit
+however many threads are querying it.
+'''
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
+
+from shapely.geometry import Point
+
+from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.location_structures import Intersection, StreetAddress
+
+
+class AsyncGeoCoderAPI:
+
+    def __init__(self, geocoder: Optional[GeoCoderAPI] = None, max_in_flight: int = 16):
+        """
+        Parameters:
+        - geocoder (GeoCoderAPI): the provider chain, sessions and cache to use
+        - max_in_flight (int): how many locations are geocoded at the same time
+        """
+        self.geocoder = geocoder if geocoder is not None else GeoCoderAPI()
+        self.max_in_flight = max_in_flight
+
+    def _geocode(self, location: Union[StreetAddress, Intersection]) -> Optional[Point]:
+        try:
+            if isinstance(location, Intersection):
+                return self.geocoder.get_intersection_coordinates(location)
+            return self.geocoder.get_street_address_coordinates(location)
+        except ProviderRequestError:
+            # already logged, and left out of the response cache
+            return None
+
+    async def geocode_many(
+            self,
+            locations: List[Union[StreetAddress, Intersection]]) -> List[Optional[Point]]:
+        """
+        Return the GPS coordinates of many street addresses and intersections.
+
+        Parameters:
+        - locations: list of StreetAddress and/or Intersection
+
+        Returns:
+        - list of Shapely points aligned with the input, None where no provider found the location.
+        """
+        # each distinct location is geocoded once
+        distinct_locations = {}
+        for location in locations:
+            distinct_locations.setdefault(_location_key(location), location)
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            points = await asyncio.gather(*(
+                loop.run_in_executor(executor, self._geocode, location)
+                for location in distinct_locations.values()
+            ))
+        points = dict(zip(distinct_locations, points))
+        return [points[_location_key(location)] for location in locations]
+
+    def geocode_many_sync(
+            self,
+            locations: List[Union[StreetAddress, Intersection]]) -> List[Optional[Point]]:
+        """Blocking wrapper around geocode_many for scripts."""
+        return asyncio.run(self.geocode_many(locations))
+
+
+def _location_key(location: Union[StreetAddress, Intersection]):
+    # Intersection equality ignores street order, but the provider queries start from
+    # the first street, so B & A can find a different point than A & B
+    if isinstance(location, Intersection):
+        return (location.street1, location.street2)
+    return location
@@ -0,0 +1,108 @@
+'''
+Binary on-disk cache for the local geocoder's reference data.
+
+The first load parses the source CSV/GeoJSON and writes an uncompressed Feather
+copy (geometry stored as WKB). Later loads memory-map that copy instead. Cache
+files are named after the cache version and the source file's SHA-256, so a
+changed source asset gets a fresh cache. Tables derived from the assets, like
+the street intersection table, are stored the same way.
+'''
+import json
+import logging
+import os
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+from pyarrow import feather
+
+from src.chicago_participatory_urbanism.file_utils import DEFAULT_CACHE_DIR, file_sha256
+from src.chicago_participatory_urbanism.street_intersections import build_intersection_table
+
+CACHE_VERSION = 1
+
+
+def _source_sha256(source_path, cache_dir: Path, name: str) -> str:
+    """
+    Return the source file's SHA-256, only rehashing when its size or
+    modification time differ from what the manifest recorded.
+    """
+    stat = os.stat(source_path)
+    manifest_path = cache_dir / f'{name}.json'
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+            return manifest['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = file_sha256(source_path)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump({'source': str(source_path),
+                   'size': stat.st_size,
+                   'mtime_ns': stat.st_mtime_ns,
+                   'sha256': sha256}, manifest_file)
+    return sha256
+
+
+def get_cache_path(source_path, cache_dir, name: str, suffix: str = 'feather') -> Path:
+    """Return the cache file path for the current contents of a source asset."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    sha256 = _source_sha256(source_path, cache_dir, name)
+    return cache_dir / f'{name}-v{CACHE_VERSION}-{sha256[:16]}.{suffix}'
+
+
+def _remove_stale_cache_files(cache_path: Path, name: str):
+    for stale_path in cache_path.parent.glob(f'{name}-v*{cache_path.suffix}'):
+        if stale_path != cache_path:
+            stale_path.unlink(missing_ok=True)
+
+
+def _write_atomically(cache_path: Path, write):
+    temporary_path = cache_path.with_name(cache_path.name + f'.{os.getpid()}.tmp')
+    write(temporary_path)
+    os.replace(temporary_path, cache_path)
+
+
+def load_address_points(source_path, cache_dir=DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """Return the address point table, reading the binary cache when it is current."""
+    cache_path = get_cache_path(source_path, cache_dir, 'address_points')
+    if cache_path.exists():
+        return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    logging.info(f"Building address point cache {cache_path}")
+    address_points_df = pd.read_csv(source_path)
+    _write_atomically(cache_path,
+                      lambda path: address_points_df.to_feather(path, compression='uncompressed'))
+    _remove_stale_cache_files(cache_path, 'address_points')
+    return address_points_df
+
+
+def load_street_center_lines(source_path, cache_dir=DEFAULT_CACHE_DIR) -> gpd.GeoDataFrame:
+    """Return the street center lines, reading the binary cache when it is current."""
+    cache_path = get_cache_path(source_path, cache_dir, 'street_center_lines')
+    if cache_path.exists():
+        return gpd.read_feather(cache_path, memory_map=True)
+
+    logging.info(f"Building street center line cache {cache_path}")
+    street_center_lines_gdf = gpd.read_file(source_path)
+    _write_atomically(cache_path,
+                      lambda path: street_center_lines_gdf.to_feather(path, compression='uncompressed'))
+    _remove_stale_cache_files(cache_path, 'street_center_lines')
+    return street_center_lines_gdf
+
+
+def load_street_intersections(source_path, street_center_lines_gdf, cache_dir=DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """Return the street intersection table for the center lines, building it if the cache is stale."""
+    cache_path = get_cache_path(source_path, cache_dir, 'street_intersections')
+    if cache_path.exists():
+        return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    logging.info(f"Building street intersection table {cache_path}")
+    intersections_df = build_intersection_table(street_center_lines_gdf)
+    _write_atomically(cache_path,
+                      lambda path: intersections_df.to_feather(path, compression='uncompressed'))
+    _remove_stale_cache_files(cache_path, 'street_intersections')
+    return intersections_df
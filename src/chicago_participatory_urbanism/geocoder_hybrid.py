@@ -0,0 +1,90 @@
+'''
+Tiered geocoder: asks each geocoder in order and stops at the first one that
+finds the location, so e.g. the local reference data answers what it can and
+only its misses reach the remote providers.
+'''
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple, Union
+
+from shapely.geometry import Point
+
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.location_structures import Intersection, StreetAddress
+
+
+class HybridGeocoder:
+
+    def __init__(self, tiers: Sequence[Tuple[str, object]]):
+        """
+        Parameters:
+        - tiers: (name, geocoder) pairs in the order they're asked, e.g.
+                 [('local', Geocoder()), ('api', GeoCoderAPI())]. Each geocoder
+                 implements get_street_address_coordinates and get_intersection_coordinates.
+        """
+        self.tiers = list(tiers)
+        self.queries = {name: 0 for name, _ in self.tiers}
+        self.hits = {name: 0 for name, _ in self.tiers}
+        self._lock = threading.Lock()
+
+    def _geocode(self, method: str, location: Union[StreetAddress, Intersection]) -> Optional[Point]:
+        provider_error = None
+        for name, geocoder in self.tiers:
+            try:
+                point = getattr(geocoder, method)(location)
+            except Exception as e:
+                logging.warning(f"{name} geocoder failed on {location}: {e}")
+                point = None
+                if isinstance(e, ProviderRequestError):
+                    provider_error = e
+
+            with self._lock:
+                self.queries[name] += 1
+                if point is not None:
+                    self.hits[name] += 1
+            if point is not None:
+                return point
+        # a provider that failed might have found it, so it isn't a miss
+        if provider_error is not None:
+            raise provider_error
+        return None
+
+    def get_street_address_coordinates(self, address: StreetAddress) -> Optional[Point]:
+        """
+        Return the GPS coordinates of a street address in Chicago from the first tier that finds it.
+        """
+        return self._geocode('get_street_address_coordinates', address)
+
+    def get_intersection_coordinates(self, intersection: Intersection) -> Optional[Point]:
+        """
+        Return the GPS coordinates of an intersection in Chicago from the first tier that finds it.
+        """
+        return self._geocode('get_intersection_coordinates', intersection)
+
+    def prefetch(self, locations: List[Union[StreetAddress, Intersection]]):
+        """
+        Pass each tier that supports prefetching the locations no earlier tier finds.
+        """
+        for i, (_, geocoder) in enumerate(self.tiers):
+            if not hasattr(geocoder, 'prefetch'):
+                continue
+            earlier_tiers = HybridGeocoder(self.tiers[:i])
+            geocoder.prefetch([
+                location for location in locations
+                if (earlier_tiers.get_intersection_coordinates(location) if isinstance(location, Intersection)
+                    else earlier_tiers.get_street_address_coordinates(location)) is None
+            ])
+
+    def hit_report(self) -> str:
+        """
+        Per tier: how many lookups reached it and what share it answered.
+        The share of all lookups answered before the last tier is traffic it never sees.
+        """
+        lines = []
+        total = self.queries[self.tiers[0][0]] if self.tiers else 0
+        for name, _ in self.tiers:
+            queries, hits = self.queries[name], self.hits[name]
+            hit_rate = hits / queries if queries else 0
+            share = hits / total if total else 0
+            lines.append(f"{name}: {queries} lookups, {hits} found ({hit_rate:.0%} hit rate, {share:.0%} of all lookups)")
+        return '\n'.join(lines)
@@ -1,9 +1,14 @@
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 import logging
-from shapely.ops import unary_union
-from shapely.geometry import Point, MultiPoint, LineString, MultiLineString
+import shapely
+from collections import defaultdict
+from typing import List
+from shapely.geometry import Point
 from src.chicago_participatory_urbanism.location_structures import StreetAddress, Intersection
+from src.chicago_participatory_urbanism import geocoder_cache
+from src.chicago_participatory_urbanism.street_intersections import IntersectionTable, build_intersection_table
 
 from importlib import resources as impresources
 from . import assets
@@ -11,15 +16,115 @@ from . import assets
 address_points_filepath = (impresources.files(assets) / 'Address_Points_reduced.csv')
 street_center_lines_filepath = (impresources.files(assets) / 'Street Center Lines.geojson')
 
+ADDRESS_KEY_COLUMNS = ['LSt_PreDir', 'St_Name', 'LSt_Type']
+
+
+class AddressPointIndex:
+    """
+    Address points grouped by street (direction, name, type), with each street's
+    address numbers sorted for binary search.
+
+    Lookups give the same row a filter over the whole address point table would:
+    an exact number match if there is one, otherwise the closest number within
+    the fuzziness window. Ties go to the row that comes first in the table.
+    """
+
+    def __init__(self, address_points_df: pd.DataFrame):
+        self.longitudes = address_points_df['Long'].to_numpy()
+        self.latitudes = address_points_df['Lat'].to_numpy()
+
+        # rows missing a key or number can never match a lookup
+        indexed_columns = ADDRESS_KEY_COLUMNS + ['Add_Number']
+        valid_positions = np.flatnonzero(address_points_df[indexed_columns].notna().all(axis=1).to_numpy())
+        valid_rows = address_points_df.iloc[valid_positions]
+        numbers = valid_rows['Add_Number'].to_numpy(dtype=float)
+
+        self._streets = {}
+        for key, group_positions in valid_rows.groupby(ADDRESS_KEY_COLUMNS, sort=False).indices.items():
+            # stable sort keeps table order within equal numbers, so the first entry of a run wins ties
+            order = np.argsort(numbers[group_positions], kind='stable')
+            self._streets[key] = (numbers[group_positions][order], valid_positions[group_positions][order])
+
+    def __len__(self):
+        return len(self._streets)
+
+    def lookup(self, key: tuple, numbers, fuzziness: int = 10) -> np.ndarray:
+        """
+        Return the address point table positions for address numbers on one street.
+
+        Parameters:
+        - key (tuple): (direction, name, street type), uppercased
+        - numbers: address numbers to look up
+        - fuzziness (int): how far from the requested number a match can be
+
+        Returns:
+        - numpy array of row positions, -1 where no address point is close enough.
+        """
+        numbers = np.asarray(numbers, dtype=float)
+        positions = np.full(len(numbers), -1, dtype=np.intp)
+
+        street = self._streets.get(key)
+        if street is None or len(numbers) == 0:
+            return positions
+        street_numbers, street_positions = street
+        last = len(street_numbers) - 1
+
+        # closest number at or above the request (the exact match if there is one)
+        above = np.searchsorted(street_numbers, numbers, side='left')
+        above_index = np.minimum(above, last)
+        above_diff = np.where(above <= last, street_numbers[above_index] - numbers, np.inf)
+        above_positions = street_positions[above_index]
+
+        # closest number below the request, taking the first row of that number's run
+        below_numbers = street_numbers[np.maximum(above - 1, 0)]
+        below_index = np.searchsorted(street_numbers, below_numbers, side='left')
+        below_diff = np.where(above > 0, numbers - below_numbers, np.inf)
+        below_positions = street_positions[below_index]
+
+        closest_positions = np.where(
+            below_diff < above_diff,
+            below_positions,
+            np.where(above_diff < below_diff, above_positions, np.minimum(above_positions, below_positions)))
+        found = np.minimum(above_diff, below_diff) <= fuzziness
+        positions[found] = closest_positions[found]
+
+        return positions
+
+    def get_point(self, position: int) -> Point:
+        return Point(self.longitudes[position], self.latitudes[position])
+
+    def get_points(self, positions: np.ndarray) -> np.ndarray:
+        return shapely.points(self.longitudes[positions], self.latitudes[positions])
+
+
 class Geocoder:
 
-    def __init__(self):
-        # address point csv from https://hub-cookcountyil.opendata.arcgis.com/datasets/5ec856ded93e4f85b3f6e1bc027a2472_0/about
-        self.address_points_df = pd.read_csv(address_points_filepath)
-        self.street_center_lines_gdf = gpd.read_file(street_center_lines_filepath)
+    def __init__(self, use_cache: bool = True, cache_dir=geocoder_cache.DEFAULT_CACHE_DIR):
+        """
+        Load the reference data.
+
+        Parameters:
+        - use_cache (bool): read from (and build) the binary on-disk cache instead of parsing the CSV/GeoJSON assets
+        - cache_dir: directory for the binary cache
+        """
+        if use_cache:
+            self.address_points_df = geocoder_cache.load_address_points(address_points_filepath, cache_dir)
+            self.street_center_lines_gdf = geocoder_cache.load_street_center_lines(street_center_lines_filepath, cache_dir)
+            intersections_df = geocoder_cache.load_street_intersections(
+                street_center_lines_filepath, self.street_center_lines_gdf, cache_dir)
+        else:
+            # address point csv from https://hub-cookcountyil.opendata.arcgis.com/datasets/5ec856ded93e4f85b3f6e1bc027a2472_0/about
+            self.address_points_df = pd.read_csv(address_points_filepath)
+            self.street_center_lines_gdf = gpd.read_file(street_center_lines_filepath)
+            intersections_df = build_intersection_table(self.street_center_lines_gdf)
 
         logging.info("Data loaded.")
 
+        self.address_index = AddressPointIndex(self.address_points_df)
+        self.intersection_table = IntersectionTable(intersections_df)
+
+        logging.info("Address index and intersection table built.")
+
     def get_street_address_coordinates_from_full_name(self, address: str):
         """
         Return the GPS coordinates of a street address in Chicago.
@@ -53,32 +158,73 @@ class Geocoder:
         Returns:
         - Point: A Shapely point with the GPS coordinates of the address (longitude, latitude).
         """
-        results = self.address_points_df[(address.number - fuzziness <= self.address_points_df['Add_Number']) &
-                                         (self.address_points_df['Add_Number'] <= address.number + fuzziness) &
-                                         (self.address_points_df['LSt_PreDir'] == address.street.direction.upper()) &
-                                         (self.address_points_df['St_Name'] == address.street.name.upper()) &
-                                         (self.address_points_df['LSt_Type'] == address.street.street_type.upper())].copy()
-
-        # print(results[['Add_Number', 'St_Name','Long','Lat']])
-
-        exact_address = results[results['Add_Number'] == address.number]
+        key = (address.street.direction.upper(),
+               address.street.name.upper(),
+               address.street.street_type.upper())
+        position = self.address_index.lookup(key, [address.number], fuzziness)[0]
 
-        try:
-            if not exact_address.empty:
-                # use exact address
-                longitude = exact_address["Long"].iloc[0]
-                latitude = exact_address["Lat"].iloc[0]
-            else:
-                # find closest address
-                results['difference'] = abs(results['Add_Number'] - address.number)
-                closest_index = results['difference'].idxmin()
-                longitude = results.loc[closest_index, "Long"]
-                latitude = results.loc[closest_index, "Lat"]
-        except:
+        if position < 0:
             print(f"Error finding coordinates for street address {address}")
             return None
 
-        return Point(longitude, latitude)
+        return self.address_index.get_point(position)
+
+    def geocode_addresses(
+            self,
+            addresses: List[StreetAddress],
+            fuzziness: int = 10) -> np.ndarray:
+        """
+        Return the GPS coordinates of many street addresses in Chicago.
+
+        Addresses are grouped by street so each street's address numbers are
+        looked up together. Results match get_street_address_coordinates.
+
+        Parameters:
+        - addresses: list of StreetAddress
+
+        Returns:
+        - numpy object array of Shapely points aligned with the input, None where no address was found.
+        """
+        points = np.full(len(addresses), None, dtype=object)
+
+        street_indices = defaultdict(list)
+        for i, address in enumerate(addresses):
+            key = (address.street.direction.upper(),
+                   address.street.name.upper(),
+                   address.street.street_type.upper())
+            street_indices[key].append(i)
+
+        found_indices = []
+        found_positions = []
+        for key, indices in street_indices.items():
+            positions = self.address_index.lookup(key, [addresses[i].number for i in indices], fuzziness)
+            found = positions >= 0
+            found_indices.append(np.asarray(indices)[found])
+            found_positions.append(positions[found])
+
+        if found_indices:
+            found_indices = np.concatenate(found_indices)
+            points[found_indices] = self.address_index.get_points(np.concatenate(found_positions))
+
+        return points
+
+    def geocode_intersections(self, intersections: List[Intersection]) -> np.ndarray:
+        """
+        Return the GPS coordinates of many intersections in Chicago.
+
+        Parameters:
+        - intersections: list of Intersection
+
+        Returns:
+        - numpy object array of Shapely points aligned with the input, None where the streets don't meet.
+        """
+        points = np.full(len(intersections), None, dtype=object)
+        found = {}
+        for i, intersection in enumerate(intersections):
+            if intersection not in found:
+                found[intersection] = self.get_intersection_coordinates(intersection)
+            points[i] = found[intersection]
+        return points
 
     def get_intersection_coordinates(self, intersection: Intersection) -> Point:
         """
@@ -93,33 +239,5 @@ class Geocoder:
         if(intersection.street1.name == intersection.street2.name):
             return None
 
-        # select street shapes from data
-        street1_data = self.street_center_lines_gdf[self.street_center_lines_gdf["street_nam"] == intersection.street1.name .upper()]
-        street2_data = self.street_center_lines_gdf[self.street_center_lines_gdf["street_nam"] == intersection.street2.name .upper()]
-
-        try:
-            # join street shapes together
-            street1_geometry = unary_union(street1_data['geometry'])
-            street2_geometry = unary_union(street2_data['geometry'])
-
-            intersection_geometry = street1_geometry.intersection(street2_geometry)
-
-            if not intersection_geometry.is_empty:
-                if isinstance(intersection_geometry, MultiPoint):
-                    # extract first point of multipoint
-                    ## (this tends to happen when one half of the intersecting street is offset from the other half)
-                    first_point = intersection_geometry.geoms[0]
-                    return
-                if isinstance(intersection_geometry, LineString):
-                    first_point = intersection_geometry.coords[0]
-                    return first_point
-                if isinstance(intersection_geometry, MultiLineString):
-                    first_point = intersection_geometry.geoms[0].coords[0]
-                    return first_point
-                else:
-                    return intersection_geometry
-            else:
-                return None
-        except:
-            logging.error(f"Error getting intersection coordinates for {intersection_geometry}")
-            return None
+        return self.intersection_table.get_point(intersection.street1.name.upper(),
+                                                 intersection.street2.name.upper())
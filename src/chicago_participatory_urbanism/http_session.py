@@ -0,0 +1,134 @@
+'''
+Pooled HTTP session for one geocoding provider, retrying rate limits and
+server errors with exponential backoff and recording request latency.
+'''
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.chicago_participatory_urbanism.rate_limit import TokenBucket
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ProviderRequestError(Exception):
+    """A provider request still failed after every retry."""
+
+
+class ProviderSession:
+
+    def __init__(
+            self,
+            provider: str,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Union[float, Tuple[float, float]] = (5, 30),
+            max_retries: int = 4,
+            backoff_factor: float = 0.5,
+            max_backoff: float = 30,
+            pool_size: int = 16,
+            rate_limiter: Optional[TokenBucket] = None):
+        """
+        Parameters:
+        - provider (str): provider name, used in logs and latency reports
+        - headers: headers sent with every request
+        - timeout: seconds, or (connect, read) seconds, before a request is abandoned
+        - max_retries (int): retries after a connection error, timeout, 429 or 5xx response
+        - backoff_factor (float): first retry waits around this many seconds, doubling after each retry
+        - max_backoff (float): upper bound on a single wait
+        - pool_size (int): connections kept alive for reuse
+        - rate_limiter (TokenBucket): limits how often requests are sent, including retries
+        """
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.latencies = []
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Exponential backoff with jitter, or the server's Retry-After if that is longer."""
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+
+        if response is not None:
+            try:
+                delay = max(delay, min(self.max_backoff, float(response.headers.get('Retry-After', 0))))
+            except ValueError:
+                # Retry-After can also be an HTTP date; fall back to our own backoff
+                pass
+        return delay
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors, timeouts, 429 and 5xx responses.
+
+        Other responses, including 4xx errors, are returned as they are.
+        Raises ProviderRequestError once the retries are used up.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                with self._lock:
+                    self.latencies.append(time.perf_counter() - start)
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                error = f"HTTP {response.status_code}"
+
+            if attempt < self.max_retries:
+                with self._lock:
+                    self.retries += 1
+                delay = self._backoff_delay(attempt, response)
+                logging.warning(f"{self.provider} request failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        with self._lock:
+            self.failures += 1
+        raise ProviderRequestError(f"{self.provider} request failed after {self.max_retries} retries: {error}")
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def latency_summary(self) -> str:
+        with self._lock:
+            latencies = np.array(self.latencies)
+        if len(latencies) == 0:
+            return f"{self.provider}: no requests"
+        return (f"{self.provider}: {len(latencies)} requests, "
+                f"median {np.median(latencies) * 1000:.0f} ms, "
+                f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms, "
+                f"{self.retries} retries, {self.failures} failures")
+
+    def close(self):
+        self.session.close()
@@ -1,29 +1,68 @@
 from dataclasses import dataclass
+from typing import Dict
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Street:
     direction: str
     name: str
     street_type: str
 
+    def __post_init__(self):
+        # canonical form: uppercase, no surrounding whitespace
+        object.__setattr__(self, 'direction', str(self.direction).strip().upper())
+        object.__setattr__(self, 'name', str(self.name).strip().upper())
+        object.__setattr__(self, 'street_type', str(self.street_type).strip().upper())
+
     def __str__(self):
         return f"{self.direction} {self.name} {self.street_type}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Intersection:
     street1: Street
     street2: Street
 
+    @property
+    def key(self) -> tuple:
+        """The two streets in sorted order, so A & B and B & A share a key."""
+        return tuple(sorted((
+            (self.street1.direction, self.street1.name, self.street1.street_type),
+            (self.street2.direction, self.street2.name, self.street2.street_type),
+        )))
+
+    def __eq__(self, other):
+        if not isinstance(other, Intersection):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
     def __str__(self):
         return f"{self.street1} & {self.street2}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StreetAddress:
     number: int
     street: Street
 
     def __str__(self):
         return f"{self.number} {self.street}"
+
+
+_interned_streets: Dict[Street, Street] = {}
+# the same streets by their parts as given, so repeats skip normalizing them again
+_interned_streets_by_parts: Dict[tuple, Street] = {}
+
+
+def intern_street(direction: str, name: str, street_type: str) -> Street:
+    """Return the shared Street object for these (normalized) parts, creating it the first time."""
+    parts = (direction, name, street_type)
+    street = _interned_streets_by_parts.get(parts)
+    if street is None:
+        street = Street(direction, name, street_type)
+        street = _interned_streets.setdefault(street, street)
+        _interned_streets_by_parts[parts] = street
+    return street
@@ -0,0 +1,55 @@
+'''
+Process pool map for CPU-bound geocoding.
+
+Worker processes are forked, so they inherit the function (and the geocoder
+and reference data it's bound to) copy-on-write instead of each worker
+pickling or re-reading it. Only the items and results cross process
+boundaries.
+'''
+import logging
+import math
+import multiprocessing
+from typing import Callable, List, Optional, Sequence
+
+# the function being mapped, set in the parent just before forking
+_worker_function = None
+
+
+def _process_chunk(chunk: Sequence) -> list:
+    return [_worker_function(item) for item in chunk]
+
+
+def parallel_map(
+        function: Callable,
+        items: Sequence,
+        workers: int = 1,
+        chunk_size: Optional[int] = None) -> List:
+    """
+    Return [function(item) for item in items], computed in chunks by a pool of forked processes.
+
+    Parameters:
+    - function: applied to each item; doesn't need to be picklable, but its results do
+    - items: list of picklable items
+    - workers (int): worker processes; 1 runs in this process
+    - chunk_size (int): items sent to a worker at a time, by default about four chunks per worker
+
+    Falls back to running in this process where fork isn't available (e.g. Windows).
+    """
+    if workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        logging.warning("fork isn't available on this platform, geocoding in a single process")
+        return [function(item) for item in items]
+
+    chunk_size = chunk_size or math.ceil(len(items) / (workers * 4))
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    global _worker_function
+    _worker_function = function
+    try:
+        with multiprocessing.get_context('fork').Pool(min(workers, len(chunks))) as pool:
+            results = pool.map(_process_chunk, chunks)
+    finally:
+        _worker_function = None
+
+    return [result for chunk in results for result in chunk]
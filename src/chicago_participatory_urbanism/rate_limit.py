@@ -0,0 +1,34 @@
+'''
+Token bucket rate limiter shared by the threads querying one provider.
+'''
+import threading
+import time
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        Parameters:
+        - rate (float): tokens added per second, i.e. the sustained requests per second
+        - capacity (float): most tokens the bucket holds, i.e. the largest burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # reserve the token now so concurrent callers queue up behind each other
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
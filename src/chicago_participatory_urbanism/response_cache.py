@@ -0,0 +1,143 @@
+'''
+Persistent SQLite cache of geocoding API responses.
+
+Entries are keyed by provider and normalized query, and store both hits
+(coordinates) and misses (None) so neither is re-requested on later runs.
+'''
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from src.chicago_participatory_urbanism.file_utils import DEFAULT_CACHE_DIR
+
+DEFAULT_RESPONSE_CACHE_PATH = DEFAULT_CACHE_DIR / 'geocoder_api_responses.sqlite'
+
+
+def normalize_query(query: str) -> str:
+    """Uppercase and collapse whitespace so equivalent queries share an entry."""
+    return ' '.join(str(query).upper().split())
+
+
+class ResponseCache:
+
+    def __init__(
+            self,
+            path=DEFAULT_RESPONSE_CACHE_PATH,
+            ttl: Optional[float] = None,
+            max_entries: Optional[int] = None,
+            offline: bool = False):
+        """
+        Parameters:
+        - path: SQLite database file, or ":memory:"
+        - ttl (float): seconds before an entry expires, None to keep entries forever
+        - max_entries (int): evict least recently used entries beyond this count, None for no limit
+        - offline (bool): never query the network, treating anything not cached as a miss
+        """
+        if str(path) != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.offline = offline
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute(
+            '''CREATE TABLE IF NOT EXISTS responses (
+                provider TEXT NOT NULL,
+                query TEXT NOT NULL,
+                value TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (provider, query)
+            )''')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self._connection.commit()
+        self._entry_count = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def get(self, provider: str, query: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached response.
+
+        Returns:
+        - (found, value): found is False when nothing (unexpired) is cached; value is None for a cached miss.
+        """
+        query = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, created_at FROM responses WHERE provider = ? AND query = ?',
+                (provider, query)).fetchone()
+
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._connection.execute(
+                    'DELETE FROM responses WHERE provider = ? AND query = ?', (provider, query))
+                self._connection.commit()
+                self._entry_count -= 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            self._connection.execute(
+                'UPDATE responses SET accessed_at = ? WHERE provider = ? AND query = ?',
+                (now, provider, query))
+            self._connection.commit()
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def set(self, provider: str, query: str, value: Any):
+        """Store a JSON-serializable response, None for a miss."""
+        query = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            exists = self._connection.execute(
+                'SELECT 1 FROM responses WHERE provider = ? AND query = ?', (provider, query)).fetchone()
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (provider, query, json.dumps(value), now, now))
+            if exists is None:
+                self._entry_count += 1
+
+            if self.max_entries is not None and self._entry_count > self.max_entries:
+                self._connection.execute(
+                    '''DELETE FROM responses WHERE rowid IN (
+                        SELECT rowid FROM responses ORDER BY accessed_at LIMIT ?
+                    )''', (self._entry_count - self.max_entries,))
+                self._entry_count = self.max_entries
+            self._connection.commit()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        """(provider, query) membership test that doesn't count as a hit or miss."""
+        provider, query = key
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT created_at FROM responses WHERE provider = ? AND query = ?',
+                (provider, normalize_query(query))).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def __len__(self):
+        return self._entry_count
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM responses')
+            self._connection.commit()
+            self._entry_count = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0
+        return f"{self.hits} cache hits, {self.misses} misses ({hit_rate:.0%} hit rate)"
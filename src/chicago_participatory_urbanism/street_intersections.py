@@ -0,0 +1,71 @@
+'''
+Precomputed table of where pairs of Chicago streets meet, built from the
+street center lines.
+'''
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Point
+from typing import Optional
+
+
+def build_intersection_table(street_center_lines_gdf) -> pd.DataFrame:
+    """
+    Return one point for every pair of street names whose center lines touch.
+
+    An STRtree over the center line segments finds every pair of touching
+    segments in one bulk query. Each pair's intersection is reduced to its
+    first coordinate (the crossing point, or the start of an overlap), and
+    each street name pair keeps the point from its first segment pair in
+    file order.
+
+    Returns:
+    - DataFrame with columns street1, street2 (street1 < street2), x, y
+    """
+    segments = street_center_lines_gdf[street_center_lines_gdf['street_nam'].notna()
+                                       & street_center_lines_gdf.geometry.notna()]
+    names = segments['street_nam'].astype(str).str.upper().to_numpy()
+    geometries = np.asarray(segments.geometry.array, dtype=object)
+
+    tree = shapely.STRtree(geometries)
+    left, right = tree.query(geometries, predicate='intersects')
+
+    # keep each street name pair once, in file order of the segments
+    different_streets = names[left] < names[right]
+    left, right = left[different_streets], right[different_streets]
+    order = np.lexsort((right, left))
+    left, right = left[order], right[order]
+
+    intersections = shapely.intersection(geometries[left], geometries[right])
+    coordinates, coordinate_index = shapely.get_coordinates(intersections, return_index=True)
+    has_point, first_coordinate = np.unique(coordinate_index, return_index=True)
+
+    table = pd.DataFrame({
+        'street1': names[left][has_point],
+        'street2': names[right][has_point],
+        'x': coordinates[first_coordinate, 0],
+        'y': coordinates[first_coordinate, 1],
+    })
+    return table.drop_duplicates(subset=['street1', 'street2'], keep='first').reset_index(drop=True)
+
+
+class IntersectionTable:
+    """Street name pair -> intersection point lookup."""
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table
+        self._points = {
+            (street1, street2): (x, y)
+            for street1, street2, x, y in zip(table['street1'], table['street2'], table['x'], table['y'])
+        }
+
+    def __len__(self):
+        return len(self._points)
+
+    def get_point(self, street1: str, street2: str) -> Optional[Point]:
+        """Return where two streets (uppercase names, either order) meet, or None."""
+        key = (street1, street2) if street1 < street2 else (street2, street1)
+        coordinates = self._points.get(key)
+        if coordinates is None:
+            return None
+        return Point(coordinates)
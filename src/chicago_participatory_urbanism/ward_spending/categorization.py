@@ -1,100 +1,104 @@
-# this mapping is not currently in use. See below categorization function
-STANDARD_CATEGORY = {
-    "pedestrian": "Pedestrian Infrastructure",
-    "bump outs": "Pedestrian Infrastructure",
-    "guardrail" : "Pedestrian Infrastructure",
-    "bicycle": "Bicycle Infrastructure",
-    "bike": "Bicycle Infrastructure",
-    "neighborhood greenway": "Bicycle Infrastructure",
-    "light": "Lighting",
-    "street resurfacing": "Street Resurfacing",
-    "street speed hump replacement": "Street Resurfacing",
-    "curb & gutter": "Street Resurfacing",
-    "alley": "Alleys",
-    "miscellaneous cdot projects": "Misc. CDOT",
-    "mural": "Beautification",
-    "public art": "Beautification",
-    "tree planting": "Beautification",
-    "school" : "Education",
-    "arts program" : "Education",
-    "library" : "Education",
-    "cps" : "Education",
-    "turn arrow": "Street Redesign",
-    "street speed hump menu": "Street Redesign",
-    "pavement markings": "Street Redesign",
-    "traffic circle": "Street Redesign",
-    "cul-de-sac": "Street Redesign",
-    "diagonal parking": "Street Redesign",
-    "sidewalk": "Sidewalk Repair",
-    "pod camera": "Police Cameras",
-    "ptz camera": "Police Cameras",
-    "oemc camera project": "Police Cameras",
-    "lpr": "Police Cameras",
-    "fly dumping camera": "Police Cameras",
-    "park": "Parks",
-    "playground": "Parks",
-    "garden": "Parks",
-    "viaduct": "Viaducts",
+import re
+from typing import Dict, FrozenSet, List, Sequence, Tuple, Union
+
+import pandas as pd
+
+# Menu item categories, in priority order: an item gets the first category one
+# of whose conditions it meets. A condition is a phrase the item contains, or a
+# tuple of phrases it contains all of. Phrases are matched in lowercase.
+MENU_CATEGORY_RULES: List[Tuple[str, List[Union[str, Tuple[str, ...]]]]] = [
+    ("Pedestrian Infrastructure", ["pedestrian", "bump outs", "state law stop", "guardrail", "bollard"]),
+    ("Bicycle Infrastructure", ["bicycle", "bike", "neighborhood greenway"]),
+    ("Lighting", ["light"]),
+    # "resurfac" picks up resurface and resurfacing
+    ("Street Resurfacing", [("resurfac", "street"), ("street", "speed", "hump"), ("curb", "gutter")]),
+    ("Alleys", ["alley"]),
+    ("Misc. CDOT", [("miscellaneous", "cdot")]),
+    ("Beautification", ["mural", "public art", "tree planting", "neighborhood art", "mosaic", ("pole", "paint")]),
+    ("Street Redesign", ["turn arrow", "street speed hump menu", "pavement markings", "traffic circle",
+                         "cul-de-sac", "diagonal parking"]),
+    ("Traffic Signals", [("traffic", "signal"), "speed indicator"]),
+    ("Sidewalk Repair", ["sidewalk"]),
+    ("Police Cameras", [("pod", "camera"), "lpr", ("dumping", "camera"), ("ptz", "camera"), ("oemc", "camera"),
+                        ("high definition", "camera")]),
+    ("Parks", ["park", "playground", "play space", "garden"]),
+    ("Viaducts", ["viaduct"]),
+    ("Schools", ["school", "elementary"]),
+]
+DEFAULT_MENU_CATEGORY = "Misc."
+MENU_CATEGORIES = [category for category, _ in MENU_CATEGORY_RULES] + [DEFAULT_MENU_CATEGORY]
+
+# phrase -> category for the rules that hang on a single phrase
+STANDARD_CATEGORY: Dict[str, str] = {
+    condition: category
+    for category, conditions in MENU_CATEGORY_RULES
+    for condition in conditions
+    if isinstance(condition, str)
 }
 
+
+class _CompiledRules:
+    """The category rules, with every phrase found in one pass of a combined regex."""
+
+    def __init__(self, rules):
+        self.categories = [category for category, _ in rules] + [DEFAULT_MENU_CATEGORY]
+        # phrase -> the first rule it meets on its own
+        self.phrase_ranks: Dict[str, int] = {}
+        # (rule, phrases) of the conditions needing several phrases, first rule first
+        self.compound_conditions: List[Tuple[int, FrozenSet[str]]] = []
+        for rank, (_, conditions) in enumerate(rules):
+            for condition in conditions:
+                if isinstance(condition, str):
+                    self.phrase_ranks.setdefault(condition, rank)
+                else:
+                    self.compound_conditions.append((rank, frozenset(condition)))
+
+        phrases = sorted(set(self.phrase_ranks).union(*(phrases for _, phrases in self.compound_conditions)),
+                         key=len, reverse=True)
+        # longest first, so only phrases that are prefixes of the one matched can hide behind it
+        self.pattern = re.compile("|".join(re.escape(phrase) for phrase in phrases))
+        self.found_with: Dict[str, Tuple[str, ...]] = {
+            phrase: tuple(other for other in phrases if phrase.startswith(other))
+            for phrase in phrases
+        }
+
+    def _find_phrases(self, item: str) -> set:
+        found = set()
+        match = self.pattern.search(item)
+        while match:
+            found.update(self.found_with[match.group()])
+            # phrases can overlap, so look again from the next character, not the end of the match
+            match = self.pattern.search(item, match.start() + 1)
+        return found
+
+    def category(self, item: str) -> str:
+        found = self._find_phrases(item.lower())
+        rank = min((self.phrase_ranks[phrase] for phrase in found if phrase in self.phrase_ranks),
+                   default=len(self.categories) - 1)
+        for compound_rank, phrases in self.compound_conditions:
+            if compound_rank >= rank:
+                break
+            if phrases <= found:
+                rank = compound_rank
+                break
+        return self.categories[rank]
+
+
+_compiled_rules = _CompiledRules(MENU_CATEGORY_RULES)
+
+
 def get_menu_category(item):
-    item = item.lower()
-    if ("pedestrian" in item 
-        or "bump outs" in item
-        or "state law stop" in item
-        or "guardrail" in item
-        or "bollard" in item):
-        return "Pedestrian Infrastructure"
-    elif ("bicycle" in item
-          or "bike" in item
-          or "neighborhood greenway" in item):
-        return "Bicycle Infrastructure"
-    elif "light" in item:
-        return "Lighting"
-    #"resurfac" is used because it will pick up resurface or resurfacing.
-    elif("resurfac" in item and "street" in item 
-         or "street" in item and "speed" in item and "hump" in item
-         or "curb" in item and "gutter" in item):
-        return "Street Resurfacing"
-    elif "alley" in item:
-        return "Alleys"
-    elif "miscellaneous" in item and "cdot" in item:
-        return "Misc. CDOT"
-    elif ("mural" in item
-          or "public art" in item
-          or "tree planting" in item
-          or "neighborhood art" in item
-          or "mosaic" in item
-          or "pole" in item and "paint" in item):
-        return "Beautification"
-    elif ("turn arrow" in item 
-          or "street speed hump menu" in item 
-          or "pavement markings" in item 
-          or "traffic circle" in item 
-          or "cul-de-sac" in item
-          or "diagonal parking" in item):
-        return "Street Redesign"
-    elif ("traffic" in item and "signal" in item
-          or "speed indicator" in item):
-        return "Traffic Signals"
-    elif "sidewalk" in item:
-        return "Sidewalk Repair"
-    elif ("pod" in item and "camera" in item
-          or "lpr" in item
-          or "dumping" in item and "camera" in item
-          or "ptz" in item and "camera" in item
-          or "oemc" in item and "camera" in item
-          or "high definition" in item and "camera" in item):
-        return "Police Cameras"
-    elif ("park" in item
-          or "playground" in item
-          or "play space" in item
-          or "garden" in item):
-        return "Parks"
-    elif ("viaduct" in item):
-        return "Viaducts"
-    elif ("school" in item
-          or "elementary" in item):
-        return "Schools"
-    else:
-        return "Misc."
+    return _compiled_rules.category(item)
+
+
+def get_menu_categories(items: Sequence[str]) -> pd.Series:
+    """
+    Categorize a column of menu items, matching each distinct item once.
+
+    Missing items stay missing.
+    """
+    items = pd.Series(items)
+    codes, unique_items = pd.factorize(items)
+    categories = pd.Series([get_menu_category(item) for item in unique_items] + [None], dtype=object)
+    # code -1 (a missing item) picks the trailing None
+    return pd.Series(categories.to_numpy()[codes], index=items.index, name=items.name)
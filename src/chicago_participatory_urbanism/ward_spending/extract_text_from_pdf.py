@@ -1,6 +1,13 @@
-import PyPDF2
 import csv
+import itertools
+import math
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.chicago_participatory_urbanism.ward_spending.pdf_engines import get_pdf_engine
 
 # below numbers work for 2019+ format of menu posting PDFs
 
@@ -23,85 +30,149 @@ def _is_ward(x,y):
 def _extract_ward_number(text):
     return text.split(':')[-1].strip()
 
-last_y = 0
-last_x = 0
-ward = 0
-data = []
-current_row = {"ward": 0, "item": "", "loc": "", "cost": ""}
-def _get_table_data(text, cm, tm, fontDict, fontSize):
-    global last_x, last_y, ward, data, current_row
 
-    x = tm[4]
-    y = tm[5]
+def _new_row(ward):
+    return {"ward": ward, "item": "", "loc": "", "cost": ""}
+
 
-    if (text != "" and text != "\n"):
+@dataclass
+class TableState:
+    """
+    Where the table reader is: the position of the last table text, the current
+    ward, and the row being filled in. It carries over from one page to the next,
+    since a row and the ward heading can continue across a page break.
+    """
+    last_x: float = 0
+    last_y: float = 0
+    ward: object = 0
+    current_row: dict = field(default_factory=lambda: _new_row(0))
 
-        text = text.replace("\n", "").strip()
+    def add_span(self, text: str, x: float, y: float) -> Optional[dict]:
+        """
+        Add a piece of (cleaned) page text at (x, y).
+
+        Returns:
+        - the previous row when this text starts a new one, else None
+        """
+        finished_row = None
 
         if(_is_ward(x,y)):
-            ward = _extract_ward_number(text)
+            self.ward = _extract_ward_number(text)
         elif (_is_in_table(y)):
 
-            y_diff = last_y - y
+            y_diff = self.last_y - y
             if(y_diff> 15 or y_diff<-50):
                 # new item!
-                data.append(current_row)
-                current_row = {"ward": ward, "item": "", "loc": "", "cost":""}
+                finished_row = self.current_row
+                self.current_row = _new_row(self.ward)
 
             if(_is_menu_package_item(x)):
                 item_text = text
-                if (x == last_x and y == last_y):
+                if (x == self.last_x and y == self.last_y):
                     # second line of same item, need to add a space
                     item_text = " " + item_text
 
-                current_row["item"] += item_text
+                self.current_row["item"] += item_text
 
             elif(_is_location(x)):
                 loc_text = text
-                if (x == last_x and y == last_y):
+                if (x == self.last_x and y == self.last_y):
                     # second line of same loc, need to add a space
                     loc_text = " " + loc_text
 
-                current_row["loc"] += loc_text
+                self.current_row["loc"] += loc_text
 
             elif(_is_cost(x)):
-                current_row["cost"] += text
+                self.current_row["cost"] += text
 
 
-            last_y = y
-            last_x = x
+            self.last_y = y
+            self.last_x = x
 
+        return finished_row
 
-# Main function
 
-def extract_pdf_data(pdf_file_path, output_file_path):
+def _extract_pages_spans(pdf_file_path, start, stop, engine='pypdf2') -> List[List[Tuple[str, float, float]]]:
+    return list(get_pdf_engine(engine).iter_pages_spans(pdf_file_path, start, stop))
+
+
+def iter_pdf_spans(pdf_file_path, workers=1, engine='pypdf2') -> Iterator[List[Tuple[str, float, float]]]:
+    """
+    Yield each page's text pieces in page order, read with one of the
+    pdf_engines.PDF_ENGINES, extracting ranges of pages in a pool of worker
+    processes when workers > 1.
+    """
+    pdf_engine = get_pdf_engine(engine)
+    if workers <= 1:
+        yield from pdf_engine.iter_pages_spans(pdf_file_path)
+        return
+
+    num_pages = pdf_engine.page_count(pdf_file_path)
+
+    # a few page ranges per worker, so one slow range doesn't hold up the rest
+    range_size = max(1, math.ceil(num_pages / (workers * 4)))
+    starts = iter(range(0, num_pages, range_size))
 
-    with open(pdf_file_path, 'rb') as pdf_file:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        num_pages = len(pdf_reader.pages)
+    def submit(executor, start):
+        return executor.submit(_extract_pages_spans, pdf_file_path, start, min(start + range_size, num_pages), engine)
 
-        # Loop through each page in the PDF file
-        for page_num in range(num_pages):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # only keep a couple of ranges per worker in flight, so finished pages
+        # don't pile up ahead of a slow reader
+        in_flight = deque(submit(executor, start) for start in itertools.islice(starts, workers * 2))
+        while in_flight:
+            pages_spans = in_flight.popleft().result()
+            start = next(starts, None)
+            if start is not None:
+                in_flight.append(submit(executor, start))
+            yield from pages_spans
 
-            # reset last_x and last_y for new page
-            # needed to prevent issue when item on next page matches coords of last item on previous page
-            last_y = 0
-            last_x = 0
 
-            page = pdf_reader.pages[page_num]
-            page.extract_text(visitor_text=_get_table_data)
+def _is_data_row(row):
+    return ((row["item"] != "MENU BUDGET")
+            and not (re.search(r"WARD COMMITTED 20\d\d TOTAL", row["item"]))
+            and not (re.search(r"WARD 20\d\d BALANCE", row["item"]))
+            and row["ward"] != 0)
+
+
+def iter_table_rows(pages_spans: Iterable[List[Tuple[str, float, float]]]) -> Iterator[dict]:
+    """
+    Yield the spending rows of the table as each one is finished, leaving out
+    the menu budget, committed total and balance rows.
+
+    The last row is never finished, so it isn't yielded.
+    """
+    state = TableState()
+    for page_spans in pages_spans:
+        for text, x, y in page_spans:
+            finished_row = state.add_span(text, x, y)
+            if finished_row is not None and _is_data_row(finished_row):
+                yield finished_row
+
+
+def iter_pdf_rows(pdf_file_path, workers=1, engine='pypdf2') -> Iterator[dict]:
+    """
+    Yield the spending rows of a menu posting PDF, as {"ward", "item", "loc", "cost"}
+    dicts, while the PDF is being read.
+    """
+    return iter_table_rows(iter_pdf_spans(pdf_file_path, workers, engine))
+
+
+# Main function
 
+def extract_pdf_data(pdf_file_path, output_file_path, workers=1, engine='pypdf2'):
+    """
+    Extract the menu spending table from a menu posting PDF into a CSV, writing
+    rows as they're read.
 
-    # Write raw text data to a CSV file
+    Pages are read in parallel when workers > 1, then their text is put
+    together into rows in page order.
+    """
     with open(output_file_path, "w", newline="") as csvfile:
         writer = csv.writer(csvfile)
 
         # headers
         writer.writerow(["ward","item", "location", "cost"])
 
-        for row in data:
-            if ((row["item"] != "MENU BUDGET")
-                and not (re.search("WARD COMMITTED 20\d\d TOTAL", row["item"]))
-                and not (re.search("WARD 20\d\d BALANCE", row["item"]))
-                and row["ward"] != 0):
-                writer.writerow(row.values())
+        for row in iter_pdf_rows(pdf_file_path, workers, engine):
+            writer.writerow(row.values())
@@ -0,0 +1,128 @@
+'''
+Checkpoints for long geocoding runs.
+
+Geometries are appended to a JSON lines file as they're geocoded, keyed by a
+hash of the location text, so an interrupted run resumes where it stopped and
+a run over new data only geocodes locations no earlier run resolved.
+'''
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from shapely import wkb
+
+
+def location_hash(location_text: str) -> str:
+    return hashlib.sha256(location_text.strip().encode()).hexdigest()
+
+
+class GeocodingCheckpoint:
+
+    def __init__(self, path):
+        """
+        Parameters:
+        - path: JSON lines file, one {"location_hash", "geometry"} record per line
+                (geometry as WKB hex, null if the location couldn't be geocoded).
+                Later lines win, and a partly written last line is cut off so
+                the next record starts on a line of its own.
+        """
+        self.path = Path(path)
+        self.geometries = {}
+        if self.path.exists():
+            end = 0
+            with open(self.path, 'rb+') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        logging.warning(f"Cutting an incomplete record off the end of {self.path}")
+                        f.truncate(end)
+                        break
+                    end += len(line)
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logging.warning(f"Skipping an incomplete checkpoint record in {self.path}")
+                        continue
+                    geometry = record['geometry']
+                    self.geometries[record['location_hash']] = None if geometry is None else wkb.loads(geometry, hex=True)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def is_resolved(self, location_text: str, retry_failed: bool = False) -> bool:
+        """Whether the location was checkpointed, counting failures only if they're not being retried."""
+        key = location_hash(location_text)
+        if key not in self.geometries:
+            return False
+        return self.geometries[key] is not None or not retry_failed
+
+    def get(self, location_text: str):
+        return self.geometries[location_hash(location_text)]
+
+    def add(self, location_texts: Sequence[str], geometries: Sequence):
+        """Record geometries for location texts and flush them to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            for location_text, geometry in zip(location_texts, geometries):
+                key = location_hash(location_text)
+                self.geometries[key] = geometry
+                f.write(json.dumps({
+                    'location_hash': key,
+                    'geometry': None if geometry is None else wkb.dumps(geometry, hex=True),
+                }) + '\n')
+
+    def compact(self):
+        """Rewrite the file with one line per location."""
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            for key, geometry in self.geometries.items():
+                f.write(json.dumps({
+                    'location_hash': key,
+                    'geometry': None if geometry is None else wkb.dumps(geometry, hex=True),
+                }) + '\n')
+        temp_path.replace(self.path)
+
+
+def geocode_with_checkpoint(
+        location_texts: Sequence[str],
+        geocode_chunk: Callable[[List[str]], list],
+        checkpoint: GeocodingCheckpoint,
+        retry_failed: bool = False,
+        chunk_size: int = 500,
+        retry_later: Optional[Callable[[str], bool]] = None) -> List[Optional[object]]:
+    """
+    Return a geometry for each location text, geocoding only the distinct texts the
+    checkpoint hasn't resolved, a chunk at a time, and checkpointing after each chunk.
+
+    Parameters:
+    - location_texts: e.g. the location column
+    - geocode_chunk: geocodes a list of location texts, e.g.
+                     lambda texts: [location_geocoder.process_location_text(text) for text in texts]
+    - checkpoint (GeocodingCheckpoint): where results are recorded
+    - retry_failed (bool): geocode again locations an earlier run couldn't geocode
+    - chunk_size (int): location texts geocoded between checkpoints
+    - retry_later: whether a text just geocoded failed for a reason that may pass, e.g.
+                   LocationGeocoder.had_provider_error; those texts aren't checkpointed,
+                   so the next run geocodes them again
+    """
+    pending = list(dict.fromkeys(
+        text for text in location_texts if not checkpoint.is_resolved(text, retry_failed)))
+    print(f"{len(location_texts)} rows, {len(pending)} distinct locations to geocode "
+          f"({len(checkpoint)} already checkpointed)")
+
+    not_checkpointed = {}
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        geometries = geocode_chunk(chunk)
+        if retry_later is not None:
+            for text, geometry in zip(chunk, geometries):
+                if retry_later(text):
+                    not_checkpointed[text] = geometry
+        done = [i for i, text in enumerate(chunk) if text not in not_checkpointed]
+        checkpoint.add([chunk[i] for i in done], [geometries[i] for i in done])
+        print(f"Checkpointed {min(start + chunk_size, len(pending))}/{len(pending)} locations")
+
+    if not_checkpointed:
+        print(f"{len(not_checkpointed)} locations weren't checkpointed, the next run geocodes them again")
+    return [not_checkpointed[text] if text in not_checkpointed else checkpoint.get(text) for text in location_texts]
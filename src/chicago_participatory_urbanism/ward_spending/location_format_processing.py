@@ -4,8 +4,8 @@ street address or street intersection
 '''
 import re
 from enum import auto, Enum
-from typing import Dict, List
-from src.chicago_participatory_urbanism.location_structures import Street, StreetAddress, Intersection
+from typing import Dict, List, Optional, Tuple
+from src.chicago_participatory_urbanism.location_structures import StreetAddress, Intersection, intern_street
 
 
 class LocationFormat(Enum):
@@ -45,6 +45,40 @@ location_patterns = {
     LocationFormat.INTERSECTION: rf"^{street_pattern}\s*&\s*{street_pattern}$",
 }
 
+compiled_location_patterns = {format: re.compile(pattern) for format, pattern in location_patterns.items()}
+
+# Every pattern is anchored at the start of the text, so its first characters rule
+# out most formats before any regex runs. Candidates keep location_patterns' order.
+_segment_formats = [LocationFormat.STREET_SEGMENT_INTERSECTIONS,
+                    LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION,
+                    LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS]
+_address_formats = [LocationFormat.STREET_ADDRESS, LocationFormat.STREET_ADDRESS_RANGE]
+_alley_or_intersection_formats = [LocationFormat.ALLEY, LocationFormat.INTERSECTION]
+_intersection_formats = [LocationFormat.INTERSECTION]
+
+
+def _candidate_formats(location: str) -> List[LocationFormat]:
+    """Return the formats whose pattern can match the (stripped) location text, in matching order."""
+    if location[:2] == "ON" and location[2:3].isspace():
+        return _segment_formats
+    if location[:1].isdigit():
+        return _address_formats
+    # an alley joins four streets with "&", an intersection two
+    ampersands = location.count("&")
+    if ampersands >= 3:
+        return _alley_or_intersection_formats
+    if ampersands >= 1:
+        return _intersection_formats
+    return []
+
+
+def _match_location(location: str) -> Tuple[Optional[LocationFormat], Optional[re.Match]]:
+    for format in _candidate_formats(location):
+        match = compiled_location_patterns[format].match(location)
+        if match:
+            return format, match
+    return None, None
+
 
 class LocationStringProcessor:
 
@@ -61,13 +95,12 @@ class LocationStringProcessor:
         address_formats = []
         for address in location:
             address = address.strip()  # watch out for extra spaces
-            for format, pattern in location_patterns.items():
-                if re.match(pattern, address.strip()):
-                    address_formats.append(
-                        {'address': address,
-                         'format': format}
-                    )
-                    break
+            format, _ = _match_location(address)
+            if format is not None:
+                address_formats.append(
+                    {'address': address,
+                     'format': format}
+                )
         return address_formats
 
     def run(self) -> List[Dict[LocationFormat, str]]:
@@ -146,7 +179,7 @@ def extract_street_address(street_address_text: str) -> StreetAddress:
     name = " ".join(address_parts[2:-1])
     street_type = address_parts[-1]
 
-    street = Street(direction, name, street_type)
+    street = intern_street(direction, name, street_type)
     return StreetAddress(number, street)
 
 
@@ -173,39 +206,43 @@ def extract_segment_intersections(
         location_text: str) -> tuple[Intersection, Intersection]:
     """Return location data structures for the STREET_SEGMENT_INTERSECTIONS format."""
     # Format: ON N LEAVITT ST FROM W DIVISION ST (1200 N) TO W NORTH AVE (1600 N)
-    pattern = location_patterns[LocationFormat.STREET_SEGMENT_INTERSECTIONS]
-    # Check if the address matches the pattern
-    match = re.match(pattern, location_text)
+    match = compiled_location_patterns[LocationFormat.STREET_SEGMENT_INTERSECTIONS].match(location_text)
     if match:
-        primary_street_name = match.group(1)
-        cross_street1_name = match.group(2)
-        cross_street2_name = match.group(3)
+        return _build_segment_intersections(match)
+    else:
+        return None, None
 
-        primary_street = Street(direction="", name=primary_street_name, street_type="")
-        cross_street1 = Street(direction="", name=cross_street1_name, street_type="")
-        cross_street2 = Street(direction="", name=cross_street2_name, street_type="")
 
-        intersection1 = Intersection(primary_street, cross_street1)
-        intersection2 = Intersection(primary_street, cross_street2)
+def _build_segment_intersections(match: re.Match) -> tuple[Intersection, Intersection]:
+    primary_street_name = match.group(1)
+    cross_street1_name = match.group(2)
+    cross_street2_name = match.group(3)
 
-        return (intersection1, intersection2)
-    else:
-        return None, None
+    primary_street = intern_street("", primary_street_name, "")
+    cross_street1 = intern_street("", cross_street1_name, "")
+    cross_street2 = intern_street("", cross_street2_name, "")
+
+    intersection1 = Intersection(primary_street, cross_street1)
+    intersection2 = Intersection(primary_street, cross_street2)
+
+    return (intersection1, intersection2)
 
 
 def extract_alley_intersections(location_text: str) -> List[Intersection]:
     """Return location data structures for the ALLEY location format"""
-    match = re.match(location_patterns[LocationFormat.ALLEY], location_text)
+    return _build_alley_intersections(compiled_location_patterns[LocationFormat.ALLEY].match(location_text))
+
 
+def _build_alley_intersections(match: re.Match) -> List[Intersection]:
     street_name1 = match.group(1)
     street_name2 = match.group(2)
     street_name3 = match.group(3)
     street_name4 = match.group(4)
 
-    street1 = Street(direction="", name=street_name1, street_type="")
-    street2 = Street(direction="", name=street_name2, street_type="")
-    street3 = Street(direction="", name=street_name3, street_type="")
-    street4 = Street(direction="", name=street_name4, street_type="")
+    street1 = intern_street("", street_name1, "")
+    street2 = intern_street("", street_name2, "")
+    street3 = intern_street("", street_name3, "")
+    street4 = intern_street("", street_name4, "")
 
     # get every possible intersection (streets aren't in any particular order)
     intersections = []
@@ -222,13 +259,15 @@ def extract_alley_intersections(location_text: str) -> List[Intersection]:
 
 def extract_intersection(location_text: str) -> Intersection:
     """Return an Intersection for the INTERSECTION location format"""
+    return _build_intersection(compiled_location_patterns[LocationFormat.INTERSECTION].match(location_text))
+
 
-    match = re.match(location_patterns[LocationFormat.INTERSECTION], location_text)
+def _build_intersection(match: re.Match) -> Intersection:
     street_name1 = match.group(1)
     street_name2 = match.group(2)
 
-    street1 = Street(direction="", name=street_name1, street_type="")
-    street2 = Street(direction="", name=street_name2, street_type="")
+    street1 = intern_street("", street_name1, "")
+    street2 = intern_street("", street_name2, "")
     intersection = Intersection(street1, street2)
 
     return intersection
@@ -237,7 +276,11 @@ def extract_intersection(location_text: str) -> Intersection:
 def extract_address_range_street_addresses(
         location_text: str) -> tuple[StreetAddress, StreetAddress]:
     """Return location data structures for the STREET_ADDRESS_RANGE format"""
-    match = re.match(location_patterns[LocationFormat.STREET_ADDRESS_RANGE], location_text)
+    return _build_address_range_street_addresses(
+        compiled_location_patterns[LocationFormat.STREET_ADDRESS_RANGE].match(location_text))
+
+
+def _build_address_range_street_addresses(match: re.Match) -> tuple[StreetAddress, StreetAddress]:
     number1 = match.group(1)
     number2 = match.group(2)
     street = match.group(3)
@@ -251,14 +294,18 @@ def extract_address_range_street_addresses(
 def extract_segment_address_intersection_info(
         location_text: str) -> tuple[StreetAddress, Intersection]:
     """Return location data structures for the STREET_SEGMENT_ADDRESS_INTERSECTION format"""
-    match = re.match(location_patterns[LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION], location_text)
+    return _build_segment_address_intersection_info(
+        compiled_location_patterns[LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION].match(location_text))
+
+
+def _build_segment_address_intersection_info(match: re.Match) -> tuple[StreetAddress, Intersection]:
     primary_street = match.group(1)
     primary_street_name = match.group(2)
     street_number = match.group(3)
     cross_street_name = match.group(4)
 
-    street1 = Street(direction="", name=primary_street_name, street_type="")
-    street2 = Street(direction="", name=cross_street_name, street_type="")
+    street1 = intern_street("", primary_street_name, "")
+    street2 = intern_street("", cross_street_name, "")
     intersection = Intersection(street1, street2)
 
     address = extract_street_address(f"{street_number} {primary_street}")
@@ -269,14 +316,18 @@ def extract_segment_address_intersection_info(
 def extract_segment_intersection_address_info(
         location_text: str) -> tuple[Intersection, StreetAddress]:
     """Return location data structures for the STREET_SEGMENT_INTERSECTION_ADDRESS format"""
-    match = re.match(location_patterns[LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS], location_text)
+    return _build_segment_intersection_address_info(
+        compiled_location_patterns[LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS].match(location_text))
+
+
+def _build_segment_intersection_address_info(match: re.Match) -> tuple[Intersection, StreetAddress]:
     primary_street = match.group(1)
     primary_street_name = match.group(2)
     cross_street_name = match.group(3)
     street_number = match.group(4)
 
-    street1 = Street(direction="", name=primary_street_name, street_type="")
-    street2 = Street(direction="", name=cross_street_name, street_type="")
+    street1 = intern_street("", primary_street_name, "")
+    street2 = intern_street("", cross_street_name, "")
     intersection = Intersection(street1, street2)
 
     address = extract_street_address(f"{street_number} {primary_street}")
@@ -284,10 +335,33 @@ def extract_segment_intersection_address_info(
     return (intersection, address)
 
 
+_builders = {
+    LocationFormat.STREET_ADDRESS: lambda match: extract_street_address(match.string),
+    LocationFormat.STREET_ADDRESS_RANGE: _build_address_range_street_addresses,
+    LocationFormat.ALLEY: _build_alley_intersections,
+    LocationFormat.STREET_SEGMENT_INTERSECTIONS: _build_segment_intersections,
+    LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION: _build_segment_address_intersection_info,
+    LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS: _build_segment_intersection_address_info,
+    LocationFormat.INTERSECTION: _build_intersection,
+}
+
+
 def get_location_format(location):
     """Detect and return the address format."""
-    for format, pattern in location_patterns.items():
-        if re.match(pattern, location.strip()):
-            return format
+    format, _ = _match_location(location.strip())
+    return format
 
-    return None
+
+def parse_location(location: str):
+    """
+    Detect the format of one location and extract its location data structures
+    with a single regex match.
+
+    Returns:
+    - (format, data): data is what the format's extract_* function returns,
+      e.g. (LocationFormat.INTERSECTION, Intersection(...)); (None, None) when no format matches.
+    """
+    format, match = _match_location(location.strip())
+    if format is None:
+        return None, None
+    return format, _builders[format](match)
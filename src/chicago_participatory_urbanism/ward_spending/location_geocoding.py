@@ -1,105 +1,367 @@
+from collections import OrderedDict
+from pathlib import Path
+from shapely import wkb
 from shapely.geometry import Point, LineString, Polygon
+import json
+import logging
 import math
+import os
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.location_structures import Intersection, StreetAddress
+from src.chicago_participatory_urbanism.parallel import parallel_map
 import src.chicago_participatory_urbanism.ward_spending.location_format_processing as lfp
 
+LOCATION_CACHE_VERSION = 1
+
+
+class LocationCache:
+    """
+    Least recently used cache of location text -> geometry (None when it couldn't be geocoded),
+    which can be saved to and loaded from a JSON file to reuse it across runs.
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, location):
+        """Return (found, geometry)."""
+        if location in self.entries:
+            self.entries.move_to_end(location)
+            self.hits += 1
+            return True, self.entries[location]
+        self.misses += 1
+        return False, None
+
+    def set(self, location, geometry):
+        self.entries[location] = geometry
+        self.entries.move_to_end(location)
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, location):
+        """Membership test that doesn't count as a hit or miss."""
+        return location in self.entries
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0
+        return f"{len(self.entries)} locations cached, {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate)"
+
+    def save(self, path):
+        """Write the entries, least recently used first, as WKB hex (null for None)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entries = [[location, None if geometry is None else wkb.dumps(geometry, hex=True)]
+                   for location, geometry in self.entries.items()]
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump({'version': LOCATION_CACHE_VERSION, 'entries': entries}, f)
+        os.replace(temp_path, path)
+
+    def load(self, path):
+        """Add the entries saved at path, if it exists and was written by this cache version."""
+        path = Path(path)
+        if not path.exists():
+            return
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('version') != LOCATION_CACHE_VERSION:
+            return
+        for location, geometry in saved['entries']:
+            self.set(location, None if geometry is None else wkb.loads(geometry, hex=True))
+
+
 class LocationGeocoder:
 
-    def __init__(self, geocoder):
+    def __init__(self, geocoder, cache=None):
+        """
+        Parameters:
+        - geocoder: implements get_street_address_coordinates and get_intersection_coordinates
+        - cache (LocationCache): geometries of locations already geocoded, so each distinct
+          location is parsed and geocoded once
+        """
         self.geocoder = geocoder
+        self.cache = cache if cache is not None else LocationCache()
+        # locations whose last lookup failed on a provider error, so their None isn't a miss
+        self.failed_locations = set()
 
-    def process_location_text(self, text):
+    def process_location_text(self, text, geocoder=None):
         """
         Take the location text from the ward spending data and
         return a geometry matching the GPS coordinates.
         """
+        return combine_location_geometries(
+            [self.get_geometry_from_location(location, geocoder) for location in text.split(";")])
+
+    def process_location_texts(self, texts):
+        """
+        Geocode many location texts, returning the same geometries as process_location_text
+        on each, but looking up each distinct street address and intersection only once:
 
-        locations = text.split(";")
+        1. parse every text and collect the distinct addresses and intersections
+        2. resolve them in bulk through the geocoder (its batch methods if it has them)
+        3. assemble each text's geometry from the resolved points
+        """
+        primitives = {}
+        lookups = 0
+        for text in texts:
+            for location in text.split(";"):
+                if location.strip() in self.cache:
+                    continue
+                for primitive in _parse_primitives(location):
+                    lookups += 1
+                    primitives.setdefault(_primitive_key(primitive), primitive)
 
-        geometry = None
+        print(f"{lookups} address/intersection lookups, {len(primitives)} distinct "
+              f"({lookups / len(primitives) if primitives else 1:.1f}x dedup)")
 
-        for location in locations:
-            location_geometry = self.get_geometry_from_location(location)
-            # assign if geometry is empty, otherwise add to existing geometry
-            if geometry is None:
-                geometry = location_geometry
+        resolved = ResolvedLocations(self.geocoder, list(primitives.values()))
+        return [self.process_location_text(text, resolved) for text in texts]
+
+    def process_location_texts_in_parallel(self, texts, workers):
+        """
+        Geocode many location texts in a pool of worker processes, returning the same
+        geometries as process_location_text on each, in order.
+
+        The workers are forked from this process, sharing its geocoder and reference data.
+        Each distinct location not already cached is geocoded once, by one of the workers,
+        and the results are added to this process's cache.
+        """
+        locations = list(dict.fromkeys(
+            location.strip() for text in texts for location in text.split(";")
+            if location.strip() not in self.cache))
+
+        results = parallel_map(self._geocode_location_in_worker, locations, workers)
+
+        geometries = {}
+        for location, (cached, geometry) in zip(locations, results):
+            geometries[location] = geometry
+            # only provider errors are left out of the cache
+            if cached:
+                self.cache.set(location, geometry)
+                self.failed_locations.discard(location)
             else:
-                geometry = geometry.union(location_geometry)
-         
-        return geometry
+                self.failed_locations.add(location)
+
+        def get_geometry(location):
+            location = location.strip()
+            if location in geometries:
+                return geometries[location]
+            return self.get_geometry_from_location(location)
 
-    def get_geometry_from_location(self, location):
+        return [combine_location_geometries([get_geometry(location) for location in text.split(";")])
+                for text in texts]
+
+    def had_provider_error(self, text):
+        """Whether a location in the text was last left ungeocoded by a provider error, rather than not found."""
+        return any(location.strip() in self.failed_locations for location in text.split(";"))
+
+    def _geocode_location_in_worker(self, location):
+        """(whether the geometry can be cached, geometry)"""
+        geometry = self.get_geometry_from_location(location)
+        return location in self.cache, geometry
+
+    def get_locations_from_text(self, text):
+        """
+        Return the street addresses and intersections the location text refers to,
+        without geocoding them, e.g. to prefetch them in bulk.
+        """
+        return [primitive for location in text.split(";") for primitive in _parse_primitives(location)]
+
+    def get_geometry_from_location(self, location, geocoder=None):
         location = location.strip()
-        str_format = lfp.get_location_format(location)
+        found, geometry = self.cache.get(location)
+        if found:
+            return geometry
+
         try:
-            match str_format:
-                case lfp.LocationFormat.STREET_ADDRESS:
-                    address = lfp.extract_street_address(location)
-                    return self.geocoder.get_street_address_coordinates(address)
+            geometry = self._get_geometry(location, geocoder if geocoder is not None else self.geocoder)
+        except ProviderRequestError as e:
+            # not cached, a later run asks the provider again
+            print(f"Location text: {location}")
+            print(f"An error occurred: {str(e)}\n")
+            self.failed_locations.add(location)
+            return None
+        except Exception as e:
+            # the geometry can't be built from what the providers returned, e.g. a
+            # range with an end no provider found, so it's cached as a miss
+            print(f"Location text: {location}")
+            print(f"An error occurred: {str(e)}\n")
+            geometry = None
 
-                case lfp.LocationFormat.STREET_ADDRESS_RANGE:
-                    (address1, address2) =lfp.extract_address_range_street_addresses(location)
-                    point1 = self.geocoder.get_street_address_coordinates(address1)
-                    point2 = self.geocoder.get_street_address_coordinates(address2)
+        self.failed_locations.discard(location)
+        self.cache.set(location, geometry)
+        return geometry
 
-                    street_segment = LineString([point1, point2])
-                    return street_segment
+    def _get_geometry(self, location, geocoder):
+        str_format, data = lfp.parse_location(location)
+        match str_format:
+            case lfp.LocationFormat.STREET_ADDRESS:
+                address = data
+                return geocoder.get_street_address_coordinates(address)
 
-                case lfp.LocationFormat.INTERSECTION:
-                    intersect = lfp.extract_intersection(location)
-                    intersection = self.geocoder.get_intersection_coordinates(intersect)
-                    return intersection
+            case lfp.LocationFormat.STREET_ADDRESS_RANGE:
+                (address1, address2) = data
+                point1 = geocoder.get_street_address_coordinates(address1)
+                point2 = geocoder.get_street_address_coordinates(address2)
 
-                case lfp.LocationFormat.STREET_SEGMENT_INTERSECTIONS:
-                    (intersection1, intersection2) = lfp.extract_segment_intersections(location)
-                    point1 = self.geocoder.get_intersection_coordinates(intersection1)
-                    point2 = self.geocoder.get_intersection_coordinates(intersection2)
+                street_segment = LineString([point1, point2])
+                return street_segment
 
-                    street_segment = LineString([point1, point2])
-                    return street_segment
+            case lfp.LocationFormat.INTERSECTION:
+                intersect = data
+                intersection = geocoder.get_intersection_coordinates(intersect)
+                return intersection
 
-                case lfp.LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION:
-                    (address, intersection) = lfp.extract_segment_address_intersection_info(location)
-                    point1 = self.geocoder.get_intersection_coordinates(intersection)
-                    point2 = self.geocoder.get_street_address_coordinates(address)
+            case lfp.LocationFormat.STREET_SEGMENT_INTERSECTIONS:
+                (intersection1, intersection2) = data
+                point1 = geocoder.get_intersection_coordinates(intersection1)
+                point2 = geocoder.get_intersection_coordinates(intersection2)
 
-                    street_segment = LineString([point1, point2])
-                    return street_segment
+                street_segment = LineString([point1, point2])
+                return street_segment
 
-                case lfp.LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS:
-                    (intersection, address) = lfp.extract_segment_intersection_address_info(location)
-                    point1 = self.geocoder.get_intersection_coordinates(intersection)
-                    point2 = self.geocoder.get_street_address_coordinates(address)
-                    # check for returned None for point 1 & point 2
+            case lfp.LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION:
+                (address, intersection) = data
+                point1 = geocoder.get_intersection_coordinates(intersection)
+                point2 = geocoder.get_street_address_coordinates(address)
 
-                    street_segment = LineString([point1, point2])
-                    return street_segment
+                street_segment = LineString([point1, point2])
+                return street_segment
 
-                case lfp.LocationFormat.ALLEY:
+            case lfp.LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS:
+                (intersection, address) = data
+                point1 = geocoder.get_intersection_coordinates(intersection)
+                point2 = geocoder.get_street_address_coordinates(address)
+                # check for returned None for point 1 & point 2
 
-                    intersections = lfp.extract_alley_intersections(location)
+                street_segment = LineString([point1, point2])
+                return street_segment
 
-                    points = []
-                    for intersection in intersections:
-                        points.append(self.geocoder.get_intersection_coordinates(intersection))
+            case lfp.LocationFormat.ALLEY:
 
-                    # remove None values from the array and place points in clockwise order
-                    points = [point for point in points if point is not None]
+                intersections = data
 
-                    points = get_clockwise_sequence(points)
+                points = []
+                for intersection in intersections:
+                    points.append(geocoder.get_intersection_coordinates(intersection))
 
-                    coordinates = [(point.x, point.y) for point in points]
-                    alley_bounding_box = Polygon(coordinates)
-                    return alley_bounding_box
+                # remove None values from the array and place points in clockwise order
+                points = [point for point in points if point is not None]
 
-                case _ :
-                    print(f"Location text: {location}")
-                    print(f"No format match found.\n")
-                    return None
+                points = get_clockwise_sequence(points)
 
-        except Exception as e:
-            print(f"Location text: {location}")
-            print(f"An error occurred: {str(e)}\n")
-            return None
+                coordinates = [(point.x, point.y) for point in points]
+                alley_bounding_box = Polygon(coordinates)
+                return alley_bounding_box
+
+            case _ :
+                print(f"Location text: {location}")
+                print(f"No format match found.\n")
+                return None
+
+
+class ResolvedLocations:
+    """
+    Geocoder stand-in answering from street addresses and intersections resolved
+    in bulk beforehand. A lookup that raised while resolving raises again when used,
+    and one that wasn't resolved beforehand goes to the geocoder.
+    """
+
+    def __init__(self, geocoder, primitives):
+        """
+        Parameters:
+        - geocoder: implements get_street_address_coordinates and get_intersection_coordinates,
+          and optionally prefetch, geocode_addresses and geocode_intersections
+        - primitives: distinct StreetAddress and Intersection objects to resolve
+        """
+        self.geocoder = geocoder
+        self.points = {}
+
+        if hasattr(geocoder, 'prefetch'):
+            geocoder.prefetch(primitives)
+
+        self._resolve([primitive for primitive in primitives if isinstance(primitive, StreetAddress)],
+                      geocoder.get_street_address_coordinates,
+                      getattr(geocoder, 'geocode_addresses', None))
+        self._resolve([primitive for primitive in primitives if isinstance(primitive, Intersection)],
+                      geocoder.get_intersection_coordinates,
+                      getattr(geocoder, 'geocode_intersections', None))
+
+    def _resolve(self, primitives, geocode_one, geocode_many):
+        if geocode_many is not None and primitives:
+            try:
+                for primitive, point in zip(primitives, geocode_many(primitives)):
+                    self.points[_primitive_key(primitive)] = point
+                return
+            except Exception as e:
+                logging.warning(f"Batch geocoding failed ({e}), geocoding one at a time")
+
+        for primitive in primitives:
+            try:
+                self.points[_primitive_key(primitive)] = geocode_one(primitive)
+            except Exception as e:
+                self.points[_primitive_key(primitive)] = e
+
+    def _get_point(self, primitive, geocode_one):
+        key = _primitive_key(primitive)
+        if key not in self.points:
+            # e.g. a location that was cached when the texts were scanned, and evicted since
+            self._resolve([primitive], geocode_one, None)
+        point = self.points[key]
+        if isinstance(point, Exception):
+            raise point
+        return point
+
+    def get_street_address_coordinates(self, address):
+        return self._get_point(address, self.geocoder.get_street_address_coordinates)
+
+    def get_intersection_coordinates(self, intersection):
+        return self._get_point(intersection, self.geocoder.get_intersection_coordinates)
+
+
+def combine_location_geometries(geometries):
+    """Union the geometries of a location text's locations."""
+    geometry = None
+
+    for location_geometry in geometries:
+        # assign if geometry is empty, otherwise add to existing geometry
+        if geometry is None:
+            geometry = location_geometry
+        else:
+            geometry = geometry.union(location_geometry)
+
+    return geometry
+
+
+def _parse_primitives(location):
+    """The street addresses and intersections in one location, empty if it can't be parsed."""
+    try:
+        str_format, data = lfp.parse_location(location)
+    except Exception:
+        # get_geometry_from_location reports the location when it's geocoded
+        return []
+    match str_format:
+        case lfp.LocationFormat.STREET_ADDRESS | lfp.LocationFormat.INTERSECTION:
+            return [data]
+        case None:
+            return []
+        case _:
+            return list(data)
+
+
+def _primitive_key(primitive):
+    # Intersection equality ignores street order, but the API geocoders query the
+    # first street first, so keep the order to match what a direct lookup returns
+    if isinstance(primitive, Intersection):
+        return (primitive.street1, primitive.street2)
+    return primitive
 
 
 def get_clockwise_sequence(points):
@@ -0,0 +1,123 @@
+'''
+PDF text engines for the menu posting table reader.
+
+An engine yields the text pieces of each page as (text, x, y) spans, in drawing
+order, with the text cleaned of newlines and surrounding whitespace, for the
+table reader to sort into columns and rows.
+
+- pypdf2: PyPDF2's text visitor (the default, and what the column positions
+  were worked out with)
+- pdfium: pypdfium2's text objects, a few times faster, with each cell's
+  wrapped lines joined into one span; pypdfium2 is optional
+  (pip install pypdfium2). Its rows match pypdf2's apart from whitespace:
+  it keeps the spaces at line wraps and doesn't double the space after "&".
+'''
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import PyPDF2
+
+Span = Tuple[str, float, float]
+
+
+def _clean_text(text):
+    return text.replace("\n", "").strip()
+
+
+class PyPDF2Engine:
+
+    name = 'pypdf2'
+
+    def page_count(self, pdf_file_path) -> int:
+        with open(pdf_file_path, 'rb') as pdf_file:
+            return len(PyPDF2.PdfReader(pdf_file).pages)
+
+    def iter_pages_spans(self, pdf_file_path, start=0, stop: Optional[int] = None) -> Iterator[List[Span]]:
+        with open(pdf_file_path, 'rb') as pdf_file:
+            pages = PyPDF2.PdfReader(pdf_file).pages
+            for page_num in range(start, len(pages) if stop is None else stop):
+                yield extract_page_spans(pages[page_num])
+
+
+def extract_page_spans(page) -> List[Span]:
+    """Return a PyPDF2 page's non-empty text pieces as (text, x, y), in drawing order."""
+    spans = []
+
+    def visitor(text, cm, tm, fontDict, fontSize):
+        if (text != "" and text != "\n"):
+            spans.append((_clean_text(text), tm[4], tm[5]))
+
+    page.extract_text(visitor_text=visitor)
+    return spans
+
+
+class PdfiumEngine:
+
+    name = 'pdfium'
+
+    def page_count(self, pdf_file_path) -> int:
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages_spans(self, pdf_file_path, start=0, stop: Optional[int] = None) -> Iterator[List[Span]]:
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_file_path)
+        try:
+            for page_num in range(start, len(pdf) if stop is None else stop):
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                yield self._page_spans(page, textpage)
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+
+    @staticmethod
+    def _page_spans(page, textpage) -> List[Span]:
+        import pypdfium2 as pdfium
+        lines = []
+        for text_object in page.get_objects(filter=[pdfium.raw.FPDF_PAGEOBJ_TEXT], textpage=textpage):
+            x, y = text_object.get_matrix().get()[4:6]
+            lines.append((text_object.extract(), x, y, text_object.get_font_size()))
+        return cell_spans(lines)
+
+
+def cell_spans(lines: Iterable[Tuple[str, float, float, float]]) -> List[Span]:
+    """
+    Join table cells' wrapped lines into one span per cell.
+
+    Parameters:
+    - lines: (text, x, y, font size) of each line of text, in drawing order; a
+             cell's wrapped lines follow each other, one line height apart
+    """
+    # [text, x, top line y, bottom line y, font size]
+    cells = []
+    for text, x, y, font_size in lines:
+        text = _clean_text(text)
+        if text == "":
+            continue
+
+        cell = cells[-1] if cells else None
+        if cell is not None and x == cell[1] and 0 < cell[3] - y <= 1.5 * cell[4]:
+            # the report wraps lines at spaces, dropping them
+            cell[0] += " " + text
+            cell[3] = y
+        else:
+            cells.append([text, x, y, y, font_size])
+
+    # cells are centred in their table row, so the middle of each one lines
+    # up with the rest of its row however many lines it wraps to
+    return [(text, x, (top + bottom) / 2) for text, x, top, bottom, _ in cells]
+
+
+PDF_ENGINES = {engine.name: engine for engine in (PyPDF2Engine, PdfiumEngine)}
+
+
+def get_pdf_engine(name):
+    """Return the engine called name, one of PDF_ENGINES."""
+    if name not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine {name!r}, expected one of {', '.join(PDF_ENGINES)}")
+    return PDF_ENGINES[name]()
@@ -1,25 +1,48 @@
 import pandas as pd
-from src.chicago_participatory_urbanism.ward_spending.categorization import get_menu_category
+from src.chicago_participatory_urbanism.ward_spending.categorization import MENU_CATEGORIES, get_menu_categories
+
+# column types of post-processed spending data
+SPENDING_DTYPES = {
+    "ward": "int8",
+    "item": "string[pyarrow]",
+    "location": "string[pyarrow]",
+    "cost": "float64",
+    "year": "int16",
+    "category": pd.CategoricalDtype(MENU_CATEGORIES),
+}
+
+
+def apply_spending_schema(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast spending data to SPENDING_DTYPES, e.g. after reading a post-processed CSV.
+
+    Raises ValueError for a category that isn't one of MENU_CATEGORIES, rather
+    than letting the categorical cast turn it into a null.
+    """
+    if "category" in data.columns:
+        categories = data["category"].dropna()
+        unknown = sorted(set(categories[~categories.isin(MENU_CATEGORIES)].astype(str)))
+        if unknown:
+            raise ValueError(f"Unknown spending categories: {', '.join(unknown)}")
+    return data.astype({column: dtype for column, dtype in SPENDING_DTYPES.items() if column in data.columns})
 
 
 def post_process_data(file_name: str, year: int):
-    # load in data and mark year
-    data = pd.read_csv(file_name, index_col=None)
+    # load in data, with the text columns as Arrow strings
+    data = pd.read_csv(file_name, index_col=None, dtype={
+        "item": "string[pyarrow]",
+        "location": "string[pyarrow]",
+        "cost": "string[pyarrow]",
+    })
     # remove year from items and add as new column
     data['item'] = data['item'].str.replace(r'\s\(\d+\)', '', regex=True)
-    data['year'] = year
-    # convert cost column to numeric
-    data['cost'] = data['cost'].str.replace('[\$,]', '', regex=True).astype(float)
+    data['year'] = int(year)
+    # convert cost column to numeric, in Arrow until the float64 cast
+    data['cost'] = data['cost'].str.replace(r'[$,]', '', regex=True).astype("float64")
     # Remove blank rows
     data = data.dropna(subset=['item', 'cost', 'location'])
 
     # add category
-    data["category"] = data["item"].apply(get_menu_category)
-
-    # alternative categorization, not implemented
-    # map to standard categories
-    # data["category"] = data["item"].replace(STANDARD_CATEGORY, regex=True)
-    # # remaining categories are "Misc."
-    # data['category'] = data['category'].fillna("Misc.")
+    data["category"] = get_menu_categories(data["item"])
 
-    return data
+    return apply_spending_schema(data)
@@ -0,0 +1,132 @@
+'''
+Post-processed ward spending data stored as Parquet, partitioned by year and
+ward (year=2024/ward=1/...), so new data is added without rewriting what's
+already there, and reading one year or ward only opens its files.
+
+Files written from a source file carry a tag of its name, so the rows of a
+source that changed can be replaced without touching the other sources' rows.
+'''
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.chicago_participatory_urbanism.file_utils import file_sha256
+from src.chicago_participatory_urbanism.ward_spending.post_processor import SPENDING_DTYPES, apply_spending_schema
+
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16()), ("ward", pa.int8())]), flavor="hive")
+# column order of the spending CSVs
+COLUMNS = list(SPENDING_DTYPES)
+
+
+class SpendingStore:
+
+    def __init__(self, root):
+        """
+        Parameters:
+        - root: directory of the dataset, created on the first write. Files
+                starting with "_" (like the sources manifest) aren't data.
+        """
+        self.root = Path(root)
+        self.sources_path = self.root / "_sources.json"
+
+    def _write(self, data: pd.DataFrame, existing_data_behavior: str, source=None):
+        table = pa.Table.from_pandas(apply_spending_schema(data[COLUMNS]), preserve_index=False)
+        if source is not None:
+            self.remove_source(source)
+        ds.write_dataset(
+            table, self.root, format="parquet", partitioning=PARTITIONING,
+            # a new name each write, so appends add files next to the ones already there, and
+            # later in the path order the dataset reads them in
+            basename_template=f"part-{time.time_ns():020d}-{_source_tag(source)}-{{i}}.parquet",
+            existing_data_behavior=existing_data_behavior)
+
+    def append(self, data: pd.DataFrame, source=None):
+        """
+        Add rows, e.g. a new quarter of a year that's partly stored already.
+
+        Parameters:
+        - source: file the rows come from; rows stored earlier from a file of the same name are replaced
+        """
+        self._write(data, "overwrite_or_ignore", source)
+
+    def upsert(self, data: pd.DataFrame, source=None):
+        """
+        Replace the stored rows of every year and ward in data with data's rows, e.g. a re-released year.
+
+        Parameters:
+        - source: file the rows come from; rows stored earlier from a file of the same name are removed too
+        """
+        self._write(data, "delete_matching", source)
+
+    def remove_source(self, source_file_path):
+        """Delete the rows written from a source file of this name, and forget the file was ingested."""
+        for file_path in self.root.glob(f"**/part-*-{_source_tag(source_file_path)}-*.parquet"):
+            file_path.unlink()
+        sources = self._sources()
+        if sources.pop(Path(source_file_path).name, None) is not None:
+            self._save_sources(sources)
+
+    def read(self,
+             years: Optional[Iterable[int]] = None,
+             wards: Optional[Iterable[int]] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Read the stored rows, only opening the partitions of the given years and wards.
+
+        Rows come in year and ward order, and in the order they were written within them.
+        """
+        if not self.root.exists():
+            return apply_spending_schema(pd.DataFrame({column: [] for column in columns or COLUMNS}))
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING)
+        row_filter = None
+        for field, values in (("year", years), ("ward", wards)):
+            if values is not None:
+                condition = ds.field(field).isin(list(values))
+                row_filter = condition if row_filter is None else row_filter & condition
+
+        data = dataset.to_table(columns=list(columns or COLUMNS), filter=row_filter).to_pandas()
+        data = apply_spending_schema(data)
+        order = [column for column in ("year", "ward") if column in data.columns]
+        if order:
+            # fragments come in path order (ward=1, ward=10, ...); a stable sort keeps the rows' order within them
+            data = data.sort_values(order, kind="stable")
+        return data.reset_index(drop=True)
+
+    def export_csv(self, output_file_path, years: Optional[Iterable[int]] = None, wards: Optional[Iterable[int]] = None):
+        """Write the stored rows as a spending CSV, the format postprocess_and_combine_data used to build."""
+        self.read(years, wards).to_csv(output_file_path, index=False)
+
+    def _sources(self) -> dict:
+        if not self.sources_path.exists():
+            return {}
+        with open(self.sources_path) as f:
+            return json.load(f)
+
+    def is_ingested(self, source_file_path) -> bool:
+        """Whether this source file, with these contents, has been recorded with record_source."""
+        return self._sources().get(Path(source_file_path).name) == file_sha256(source_file_path)
+
+    def record_source(self, source_file_path):
+        sources = self._sources()
+        sources[Path(source_file_path).name] = file_sha256(source_file_path)
+        self._save_sources(sources)
+
+    def _save_sources(self, sources: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.sources_path, "w") as f:
+            json.dump(sources, f, indent=2)
+
+
+def _source_tag(source_file_path) -> str:
+    # file names have spaces and punctuation, so a short hash of the name goes in the data file names
+    if source_file_path is None:
+        return "none"
+    return hashlib.sha1(Path(source_file_path).name.encode()).hexdigest()[:12]
+
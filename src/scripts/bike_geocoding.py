@@ -1,18 +1,22 @@
+import argparse
 import geopandas as gpd
 import os
 from shapely.geometry import LineString
-from src.chicago_participatory_urbanism.location_structures import Intersection, Street
-from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
-geocoder = GeoCoderAPI()
+from src.chicago_participatory_urbanism.geo_output import GEO_FORMATS, with_format_extension, write_geodata
+from src.chicago_participatory_urbanism.location_structures import Intersection, intern_street
+from src.chicago_participatory_urbanism.parallel import parallel_map
 
-def process_street_segment(primary_street_name, cross_street1_name, cross_street2_name):
+
+def get_street_segment_intersections(primary_street_name, cross_street1_name, cross_street2_name):
+    primary_street = intern_street("", primary_street_name, "")
+    cross_street1 = intern_street("", cross_street1_name, "")
+    cross_street2 = intern_street("", cross_street2_name, "")
+
+    return Intersection(primary_street, cross_street1), Intersection(primary_street, cross_street2)
+
+
+def make_street_segment(point1, point2):
     try:
-        primary_street = Street(direction="", name=primary_street_name, street_type="")
-        cross_street1 = Street(direction="", name=cross_street1_name, street_type="")
-        cross_street2 = Street(direction="", name=cross_street2_name, street_type="")
-    
-        point1 = geocoder.get_intersection_coordinates(Intersection(primary_street, cross_street1))
-        point2 = geocoder.get_intersection_coordinates(Intersection(primary_street, cross_street2))
         street_segment = LineString([point1, point2])
         return street_segment
     except Exception as e:
@@ -20,8 +24,50 @@ def process_street_segment(primary_street_name, cross_street1_name, cross_street
         return None
 
 
-def generate_bikeway_installations_geocoding():
+def process_street_segment(geocoder, primary_street_name, cross_street1_name, cross_street2_name):
+    intersection1, intersection2 = get_street_segment_intersections(
+        primary_street_name, cross_street1_name, cross_street2_name)
+    point1 = geocoder.get_intersection_coordinates(intersection1)
+    point2 = geocoder.get_intersection_coordinates(intersection2)
+    return make_street_segment(point1, point2)
+
+
+def generate_bikeway_installations_geocoding(args=None):
+    parser = argparse.ArgumentParser(description="Geocode the CDOT bikeway installations.")
+    parser.add_argument('--geocoder', choices=['local', 'api'], default='api',
+                        help="local reference data or geocoding APIs (default: api)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes sharing the loaded local reference data (local geocoder only)")
+    parser.add_argument('--format', choices=list(GEO_FORMATS), default='geojson',
+                        help="output format of data/CDOT Bikeway Installations.<format> (default: geojson)")
+    args = parser.parse_args(args)
+    if args.workers > 1 and args.geocoder != 'local':
+        parser.error("--workers needs --geocoder local")
 
     data = gpd.read_file(os.path.join(os.getcwd(), 'data', 'CDOT Bikeway Installations.csv'))
-    data["geometry"] = data.apply(lambda row: process_street_segment(row['Street'], row['From'], row['To']), axis=1)
-    data.to_file(os.path.join(os.getcwd(), 'data', 'CDOT Bikeway Installations.geojson'), driver='GeoJSON')
+    segments = list(zip(data['Street'], data['From'], data['To']))
+
+    if args.geocoder == 'local':
+        from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+        geocoder = Geocoder()
+        data["geometry"] = parallel_map(
+            lambda segment: process_street_segment(geocoder, *segment), segments, args.workers)
+    else:
+        from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
+        from src.chicago_participatory_urbanism.geocoder_api_async import AsyncGeoCoderAPI
+        from src.chicago_participatory_urbanism.response_cache import ResponseCache
+        geocoder = GeoCoderAPI(cache=ResponseCache())
+
+        # geocode every segment end concurrently, then pair the points back up per row
+        intersections = []
+        for segment in segments:
+            intersections.extend(get_street_segment_intersections(*segment))
+        geocoder.prefetch(intersections)
+        points = AsyncGeoCoderAPI(geocoder).geocode_many_sync(intersections)
+
+        data["geometry"] = [make_street_segment(point1, point2) for point1, point2 in zip(points[0::2], points[1::2])]
+
+    # reading a CSV gives a plain DataFrame
+    data = gpd.GeoDataFrame(data, geometry="geometry", crs="EPSG:4326")
+    output_file_path = with_format_extension(os.path.join(os.getcwd(), 'data', 'CDOT Bikeway Installations.geojson'), args.format)
+    write_geodata(data, output_file_path, args.format)
@@ -0,0 +1,9 @@
+from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+
+
+def build_local_geocoder_assets():
+    """Build the local geocoder's binary cache and street intersection table ahead of a geocoding run."""
+    print("Loading local geocoder reference data...")
+    geocoder = Geocoder()
+    print(f"Address point index covers {len(geocoder.address_index)} streets.")
+    print(f"Street intersection table has {len(geocoder.intersection_table)} street pairs.")
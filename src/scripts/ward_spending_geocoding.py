@@ -1,22 +1,234 @@
+import argparse
 import geopandas as gpd
 import os
-from src.chicago_participatory_urbanism.ward_spending.location_geocoding import LocationGeocoder
+import pandas as pd
+import sys
+from src.chicago_participatory_urbanism.geo_output import (GEO_FORMATS, compact_geojson_seq, resume_geojson_seq,
+                                                           write_geodata, write_geojson_seq)
+from src.chicago_participatory_urbanism.file_utils import DEFAULT_CACHE_DIR
+from src.chicago_participatory_urbanism.ward_spending.geocoding_checkpoint import GeocodingCheckpoint, geocode_with_checkpoint
+from src.chicago_participatory_urbanism.ward_spending.location_geocoding import LocationCache, LocationGeocoder
 
 
-def generate_ward_spending_geocoding():
+def get_geocoder(name):
+    """
+    local - the local reference data: fast, but misses some addresses
+    api - the geocoding APIs, caching responses so re-runs skip repeated queries
+    hybrid - the local reference data first, sending only its misses to the APIs
+    """
+    if name in ('local', 'hybrid'):
+        from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+        local_geocoder = Geocoder()
+        if name == 'local':
+            return local_geocoder
 
-    # use local geocoder
-    # from chicago_participatory_urbanism.geocoder import Geocoder
-    # geocoder = Geocoder()
-
-    # use geocoder APIs
     from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
-    geocoder = GeoCoderAPI()
+    from src.chicago_participatory_urbanism.response_cache import ResponseCache
+    api_geocoder = GeoCoderAPI(cache=ResponseCache())
+    if name == 'api':
+        return api_geocoder
+
+    from src.chicago_participatory_urbanism.geocoder_hybrid import HybridGeocoder
+    return HybridGeocoder([('local', local_geocoder), ('api', api_geocoder)])
+
+
+def add_geocoding_arguments(parser):
+    parser.add_argument('--geocoder', choices=['local', 'api', 'hybrid'], default='api',
+                        help="local reference data, geocoding APIs, or local first with API fallback (default: api)")
+    parser.add_argument('--location-cache',
+                        help="JSON file of geocoded locations reused across runs "
+                             "(default: location_geometries-<geocoder>.json in the ward-wise cache directory)")
+    parser.add_argument('--location-cache-entries', type=int, default=100_000,
+                        help="most geocoded locations kept in memory and in the location cache, "
+                             "least recently used dropped first (default: 100000)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="collect the distinct addresses and intersections of each checkpoint chunk, "
+                             "geocode each once in bulk, then assemble every row's geometry")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes sharing the loaded local reference data (local geocoder only)")
+    parser.add_argument('--checkpoint',
+                        help="JSON lines file of geocoded location texts, used to resume interrupted runs and "
+                             "skip locations earlier runs resolved "
+                             "(default: geocoding_checkpoint-<geocoder>.jsonl in the ward-wise cache directory)")
+    parser.add_argument('--checkpoint-every', type=int, default=500,
+                        help="distinct location texts geocoded between checkpoints (default: 500)")
+    parser.add_argument('--retry-failed', action=argparse.BooleanOptionalAction, default=False,
+                        help="geocode again locations earlier runs couldn't geocode")
+    parser.add_argument('--format', choices=list(GEO_FORMATS),
+                        help="output format: GeoJSON, GeoParquet or FlatGeobuf (which leaves out rows without geometry) "
+                             "(default: the output file's extension, else geojson)")
+
+
+def check_geocoding_arguments(parser, args):
+    if args.workers > 1 and args.geocoder != 'local':
+        # forked workers would share the API sessions' connections and each get their own rate limits;
+        # the API geocoders are network-bound and already run requests concurrently
+        parser.error("--workers needs --geocoder local")
+    if args.workers > 1 and args.dedupe:
+        parser.error("--workers and --dedupe can't be combined")
+
+
+class GeocodingSession:
+    """
+    A geocoder, location cache and checkpoint set up from the script arguments,
+    for geocoding location texts a batch at a time. Leaving the with block
+    saves the cache and compacts the checkpoint; on Ctrl-C it exits, keeping
+    what's been checkpointed.
+    """
+
+    def __init__(self, args, checkpoint=True):
+        """
+        Parameters:
+        - checkpoint (bool): record results in the checkpoint, which holds every geometry it
+          has in memory; without it, batches are only deduplicated through the location cache
+        """
+        self.args = args
+        self.location_cache_path = args.location_cache or DEFAULT_CACHE_DIR / f'location_geometries-{args.geocoder}.json'
+        self.checkpoint_path = args.checkpoint or DEFAULT_CACHE_DIR / f'geocoding_checkpoint-{args.geocoder}.jsonl'
+
+        self.geocoder = get_geocoder(args.geocoder)
+        self.location_geocoder = LocationGeocoder(self.geocoder, LocationCache(args.location_cache_entries))
+        self.location_geocoder.cache.load(self.location_cache_path)
+        self.checkpoint = GeocodingCheckpoint(self.checkpoint_path) if checkpoint else None
+
+    def _api_geocoder(self):
+        if hasattr(self.geocoder, 'tiers'):
+            return self.geocoder.tiers[-1][1]
+        return self.geocoder
+
+    def __enter__(self):
+        return self
+
+    def _geocode_chunk(self, texts):
+        if self.args.dedupe:
+            return self.location_geocoder.process_location_texts(texts)
+        if self.args.workers > 1:
+            return self.location_geocoder.process_location_texts_in_parallel(texts, self.args.workers)
+        if hasattr(self.geocoder, 'prefetch'):
+            # load the address points and street segments the chunk needs in a few bulk queries
+            self.geocoder.prefetch([location
+                                    for text in texts
+                                    for location in self.location_geocoder.get_locations_from_text(text)])
+        return [self.location_geocoder.process_location_text(text) for text in texts]
+
+    def geocode(self, location_texts):
+        """Return a geometry for each location text, geocoding only what the checkpoint hasn't resolved."""
+        if self.checkpoint is not None:
+            return geocode_with_checkpoint(
+                location_texts, self._geocode_chunk, self.checkpoint,
+                retry_failed=self.args.retry_failed, chunk_size=self.args.checkpoint_every,
+                retry_later=self.location_geocoder.had_provider_error)
+
+        distinct_texts = list(dict.fromkeys(location_texts))
+        geometries = dict(zip(distinct_texts, self._geocode_chunk(distinct_texts)))
+        api_geocoder = self._api_geocoder()
+        if hasattr(api_geocoder, 'clear_prefetched'):
+            # this batch's prefetched rows are in the response cache
+            api_geocoder.clear_prefetched()
+        return [geometries[text] for text in location_texts]
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is KeyboardInterrupt:
+            self.location_geocoder.cache.save(self.location_cache_path)
+            if self.checkpoint is not None:
+                print(f"Interrupted, {len(self.checkpoint)} locations are checkpointed in {self.checkpoint_path}. "
+                      f"Run again to resume.")
+            else:
+                print("Interrupted. Run again to resume.")
+            sys.exit(130)
+        if exc_type is not None:
+            return False
+
+        if self.checkpoint is not None:
+            self.checkpoint.compact()
+        self.location_geocoder.cache.save(self.location_cache_path)
+        print(f"Location cache: {self.location_geocoder.cache.stats()}")
+
+        if hasattr(self.geocoder, 'hit_report'):
+            print(self.geocoder.hit_report())
+        geocoder = self._api_geocoder()
+        if hasattr(geocoder, 'cache'):
+            print(f"Geocoder API response cache: {geocoder.cache.stats()}")
+            print(geocoder.latency_report())
+        return False
+
+
+def geocode_location_texts(args, location_texts):
+    """
+    Return a geometry for each location text, geocoding only what the checkpoint
+    hasn't resolved. Exits, keeping what's been checkpointed, on Ctrl-C.
+    """
+    with GeocodingSession(args) as session:
+        return session.geocode(location_texts)
+
+
+def _stream_ward_spending_geocoding(args, output_file_path):
+    """
+    Geocode the input CSV a chunk of rows at a time, appending each chunk's
+    features to a GeoJSON text sequence as it's done.
+
+    The sequence is the checkpoint: a run resumes after the rows it already
+    has, so memory depends on the chunk size (and the bounded location cache),
+    not on how many rows or distinct locations the input has.
+    """
+    rows = resume_geojson_seq(output_file_path)
+    if rows:
+        print(f"Resuming after the {rows} rows in {output_file_path}")
+    # the same string columns reading the whole CSV through GDAL gives
+    chunks = pd.read_csv(args.input, dtype=str, keep_default_na=False, chunksize=args.chunk_size)
+    skip = rows
+    with GeocodingSession(args, checkpoint=False) as session, open(output_file_path, 'a') as output_file:
+        for chunk in chunks:
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            chunk = chunk.iloc[skip:]
+            skip = 0
+            geometries = session.geocode(chunk["location"].tolist())
+            write_geojson_seq(output_file, gpd.GeoDataFrame(chunk, geometry=geometries, crs="EPSG:4326"))
+            rows += len(chunk)
+            print(f"Wrote {rows} rows to {output_file_path}")
+
+
+def generate_ward_spending_geocoding(args=None):
+    parser = argparse.ArgumentParser(description="Geocode the combined ward spending data.")
+    parser.add_argument('--input', default=os.path.join(os.getcwd(), 'data', 'output', '2019-2022 data.csv'),
+                        help="ward spending CSV to geocode, written to <input>_geocoded.<format> "
+                             "(default: data/output/2019-2022 data.csv)")
+    parser.add_argument('--stream', action='store_true',
+                        help="read and geocode the CSV --chunk-size rows at a time, appending the features to "
+                             "<input>_geocoded.geojsons, a GeoJSON text sequence (RFC 8142), as each chunk is done; "
+                             "a run resumes after the rows the file has (delete it to start over)")
+    parser.add_argument('--chunk-size', type=int, default=5000,
+                        help="rows read and geocoded at a time with --stream (default: 5000)")
+    parser.add_argument('--compact', action='store_true',
+                        help="with --stream, also rewrite the sequence as a <input>_geocoded.geojson FeatureCollection")
+    add_geocoding_arguments(parser)
+    args = parser.parse_args(args)
+    check_geocoding_arguments(parser, args)
+    if args.stream and args.format not in (None, 'geojson'):
+        parser.error("--stream writes a GeoJSON text sequence, --format can't be used with it")
+    if args.compact and not args.stream:
+        parser.error("--compact needs --stream")
+    if args.stream and (args.checkpoint or args.retry_failed):
+        parser.error("--stream resumes from its output file, --checkpoint and --retry-failed can't be used with it")
 
-    location_geocoder = LocationGeocoder(geocoder)
+    file_path = args.input
+    if args.stream:
+        output_file_path = os.path.splitext(file_path)[0] + '_geocoded.geojsons'
+        _stream_ward_spending_geocoding(args, output_file_path)
+        print(f"Geocoded data saved to {output_file_path}")
+        if args.compact:
+            compacted_file_path = os.path.splitext(file_path)[0] + '_geocoded.geojson'
+            compact_geojson_seq(output_file_path, compacted_file_path)
+            print(f"Compacted into {compacted_file_path}")
+        return
 
-    file_path = os.path.join(os.getcwd(), 'data', 'output', '2019-2022 data.csv')
     data = gpd.read_file(file_path)
 
-    data["geometry"] = data["location"].astype(str).apply(location_geocoder.process_location_text)
-    data.to_file(file_path[:-4] +'_geocoded.geojson', driver='GeoJSON')
+    geometries = geocode_location_texts(args, data["location"].astype(str).tolist())
+    # reading a CSV gives a plain DataFrame
+    data = gpd.GeoDataFrame(data.drop(columns="geometry", errors="ignore"), geometry=geometries, crs="EPSG:4326")
+    output_file_path = os.path.splitext(file_path)[0] + '_geocoded' + GEO_FORMATS[args.format or 'geojson']
+    write_geodata(data, output_file_path)
+    print(f"Geocoded data saved to {output_file_path}")
@@ -1,25 +1,36 @@
-"""Take an existing geojson file and geocode items with missing geometry data."""
-import geopandas as gpd
-from chicago_participatory_urbanism.ward_spending.location_geocoding import LocationGeocoder
+"""Take an existing geocoded file and geocode items with missing geometry data."""
+import argparse
+import os
+from src.chicago_participatory_urbanism.geo_output import read_geodata, with_format_extension, write_geodata
+from src.scripts.ward_spending_geocoding import add_geocoding_arguments, check_geocoding_arguments, geocode_location_texts
 
-# file paths
-input_geojson_file = r'data\2019-2022 data_geocoded.geojson'
-output_geojson_file = r'data\output\2019-2022 data_geocoded_new.geojson'
 
-# setup geocoder
-from chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
-geocoder = GeoCoderAPI()
-location_geocoder = LocationGeocoder(geocoder)
+def fill_missing_ward_spending_geocoding(args=None):
+    parser = argparse.ArgumentParser(description="Geocode the rows of a geocoded ward spending file that have no geometry.")
+    parser.add_argument('--input', default=os.path.join('data', '2019-2022 data_geocoded.geojson'),
+                        help="geocoded ward spending GeoJSON or GeoParquet (default: data/2019-2022 data_geocoded.geojson)")
+    parser.add_argument('--output', default=os.path.join('data', 'output', '2019-2022 data_geocoded_new.geojson'),
+                        help="where to write the updated file, in --format if given "
+                             "(default: data/output/2019-2022 data_geocoded_new.geojson)")
+    add_geocoding_arguments(parser)
+    # rows without geometry are what this pass is for, --no-retry-failed skips checkpointed failures
+    parser.set_defaults(retry_failed=True)
+    args = parser.parse_args(args)
+    check_geocoding_arguments(parser, args)
 
+    data = read_geodata(args.input)
 
-# geocode entries with missing geometry data
-self.street_center_lines_gdf = gpd.read_file(input_geojson_file)
-for index, row in self.street_center_lines_gdf.iterrows():
-    if row['geometry'] is None:
-        location_text = row['location']
-        geometry = location_geocoder.process_location_text(location_text)
-        self.street_center_lines_gdf.at[index, 'geometry'] = geometry
+    # geocode entries with missing geometry data
+    missing = data.geometry.isna() | data.geometry.is_empty
+    print(f"{missing.sum()} of {len(data)} rows have no geometry")
 
+    data.loc[missing, 'geometry'] = geocode_location_texts(args, data.loc[missing, 'location'].astype(str).tolist())
 
-self.street_center_lines_gdf.to_file(output_geojson_file, driver='GeoJSON')
-print(f"Updated GeoJSON saved to {output_geojson_file}")
+    output_file_path = with_format_extension(args.output, args.format) if args.format else args.output
+    os.makedirs(os.path.dirname(output_file_path) or '.', exist_ok=True)
+    write_geodata(data, output_file_path)
+    print(f"Updated data saved to {output_file_path}")
+
+
+if __name__ == '__main__':
+    fill_missing_ward_spending_geocoding()
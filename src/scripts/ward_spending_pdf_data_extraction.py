@@ -1,21 +1,88 @@
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.chicago_participatory_urbanism.file_utils import file_sha256
 from src.chicago_participatory_urbanism.ward_spending.extract_text_from_pdf import extract_pdf_data
+from src.chicago_participatory_urbanism.ward_spending.pdf_engines import PDF_ENGINES
 
 # Download these files to the data/pdf folder from the Chicago Capital Improvement Archive
-files = ['2019 Menu Posting - 22-10-02.pdf', 
+files = ['2019 Menu Posting - 22-10-02.pdf',
          '2020 Menu Posting - 22-10-02.pdf',
          '2021 Menu Posting - 22-10-02.pdf',
          '2022 Menu - 2-9-23.pdf',
          '2023 Menu - 2-27-24.pdf']
 
 
-def extract_from_files():
-    for pdf_file_name in files:
-        output_file_name = pdf_file_name[:-4] + ".csv"
+def _is_up_to_date(stamp, output_file_path):
+    """Whether the output CSV exists and was extracted as stamped ("<PDF SHA-256> <engine>")."""
+    sha256_file_path = output_file_path + ".sha256"
+    if not (os.path.exists(output_file_path) and os.path.exists(sha256_file_path)):
+        return False
+    with open(sha256_file_path) as f:
+        return f.read().strip() == stamp
 
-        print(f'Extracting data from "{pdf_file_name}"...')
-        pdf_file_path = os.path.join(os.getcwd(), "data", "pdf", pdf_file_name)
-        output_file_path = os.path.join(os.getcwd(), "data", "output", output_file_name)
 
-        extract_pdf_data(pdf_file_path, output_file_path)
-        print(f'Data saved to "{output_file_path}".')
+def _extraction_stamp(pdf_file_path, engine):
+    # the engines differ in whitespace, so an output is only up to date for the same one
+    return f"{file_sha256(pdf_file_path)} {engine}"
+
+
+def extract_file(pdf_file_path, output_file_path, force=False, engine='pypdf2'):
+    """
+    Extract one PDF unless its output is up to date.
+
+    Returns:
+    - seconds spent extracting, None if it was skipped
+    """
+    stamp = _extraction_stamp(pdf_file_path, engine)
+    if not force and _is_up_to_date(stamp, output_file_path):
+        return None
+    return _extract_and_stamp(pdf_file_path, output_file_path, stamp, engine)
+
+
+def _extract_and_stamp(pdf_file_path, output_file_path, stamp, engine):
+    """Extract one PDF and record its stamp, returning the seconds it took."""
+    start = time.perf_counter()
+    sha256_file_path = output_file_path + ".sha256"
+    # an interrupted extraction mustn't leave a matching hash next to a partial CSV
+    if os.path.exists(sha256_file_path):
+        os.remove(sha256_file_path)
+    extract_pdf_data(pdf_file_path, output_file_path, engine=engine)
+    with open(sha256_file_path, "w") as f:
+        f.write(stamp + "\n")
+    return time.perf_counter() - start
+
+
+def extract_from_files(args=None):
+    parser = argparse.ArgumentParser(description="Extract the menu spending tables from the menu posting PDFs.")
+    parser.add_argument('--workers', type=int, default=min(len(files), os.cpu_count() or 1),
+                        help="PDFs extracted at the same time (default: one per CPU, up to the number of PDFs)")
+    parser.add_argument('--force', action='store_true',
+                        help="extract every PDF, even those whose output CSV is up to date")
+    parser.add_argument('--engine', choices=list(PDF_ENGINES), default='pypdf2',
+                        help="PDF text engine; pdfium is faster but needs pypdfium2 (default: pypdf2)")
+    args = parser.parse_args(args)
+
+    os.makedirs(os.path.join(os.getcwd(), "data", "output"), exist_ok=True)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        extractions = {}
+        for pdf_file_name in files:
+            output_file_name = pdf_file_name[:-4] + ".csv"
+            pdf_file_path = os.path.join(os.getcwd(), "data", "pdf", pdf_file_name)
+            output_file_path = os.path.join(os.getcwd(), "data", "output", output_file_name)
+
+            stamp = _extraction_stamp(pdf_file_path, args.engine)
+            if not args.force and _is_up_to_date(stamp, output_file_path):
+                print(f'"{pdf_file_name}" is unchanged, keeping "{output_file_path}".')
+                continue
+            print(f'Extracting data from "{pdf_file_name}"...')
+            extractions[output_file_path] = executor.submit(
+                _extract_and_stamp, pdf_file_path, output_file_path, stamp, args.engine)
+
+        for output_file_path, extraction in extractions.items():
+            print(f'Data saved to "{output_file_path}" ({extraction.result():.1f}s).')
+
+    print(f"Extracted {len(extractions)} of {len(files)} PDFs in {time.perf_counter() - start:.1f}s.")
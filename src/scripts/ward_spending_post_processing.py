@@ -1,9 +1,11 @@
+import argparse
 import os
 import re
 
 import pandas as pd
 
 from src.chicago_participatory_urbanism.ward_spending.post_processor import post_process_data
+from src.chicago_participatory_urbanism.ward_spending.spending_store import SpendingStore
 
 files = [
     "2019 Menu Posting - 22-10-02.csv",
@@ -14,25 +16,46 @@ files = [
 ]
 
 
-def postprocess_and_combine_data():
+def postprocess_and_combine_data(args=None):
+    parser = argparse.ArgumentParser(
+        description="Post-process the extracted menu CSVs into the spending store and export the combined CSV.")
+    parser.add_argument('--store', default=os.path.join("data", "output", "spending"),
+                        help="Parquet spending store, partitioned by year and ward (default: data/output/spending)")
+    parser.add_argument('--append', nargs='+', default=[], metavar='CSV',
+                        help="already post-processed spending CSVs (ward, item, location, cost, year, category) "
+                             "to add to the store, e.g. a partial-year drop")
+    parser.add_argument('--output', default=os.path.join("data", "output", "2019-2023 data.csv"),
+                        help="combined CSV exported from the store (default: data/output/2019-2023 data.csv)")
+    args = parser.parse_args(args)
+
+    store = SpendingStore(args.store)
     year_pattern = r"20\d{2}"
-    dataframes = []
     for file in files:
+        file_path = os.path.join("data", "output", file)
+        if store.is_ingested(file_path):
+            print(f"{file} is already in the store, skipping it.")
+            continue
+
         match = re.search(year_pattern, file)
         if match:
-            year = match.group()
+            year = int(match.group())
         else:
             year = 0
         print(f"Processing {year} data...")
-        file_path = os.path.join("data", "output", file)
-        dataframes.append(post_process_data(file_path, year))
+        # a menu posting has the whole year, replacing what was stored for it
+        store.upsert(post_process_data(file_path, year), source=file_path)
+        store.record_source(file_path)
 
-    # combine into one dataset
-    print("Joining data...")
-    data = pd.concat(dataframes)
-    data.reset_index()
+    for file_path in args.append:
+        if store.is_ingested(file_path):
+            print(f"{file_path} is already in the store, skipping it.")
+            continue
+        # a changed file replaces the rows it added before
+        print(f"Appending {file_path}...")
+        store.append(pd.read_csv(file_path), source=file_path)
+        store.record_source(file_path)
 
     # export data
-    output_file_path = "data/output/2019-2023 data.csv"
-    data.to_csv(output_file_path, index=False)
-    print(f"Post-processing complete. Data saved to {output_file_path}.")
\ No newline at end of file
+    print("Exporting data...")
+    store.export_csv(args.output)
+    print(f"Post-processing complete. Data saved to {args.output}.")
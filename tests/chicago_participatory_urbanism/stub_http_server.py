@@ -0,0 +1,136 @@
+"""Local HTTP server that replays canned responses, for testing API clients without the network."""
+import csv
+import io
+import json
+import re
+import threading
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes
+    client_port: int
+
+
+class StubHTTPServer:
+    """
+    Serve responses from a respond(request) callback returning (status, body) or
+    (status, body, headers). Dict and list bodies are sent as JSON.
+
+    Usage:
+    with StubHTTPServer(lambda request: (200, [])) as server:
+        requests.get(server.url + '/resource.json')
+    """
+
+    def __init__(self, respond: Callable[[StubRequest], tuple]):
+        self.respond = respond
+        self.requests = []
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length', 0))
+                url = urlsplit(self.path)
+                request = StubRequest(
+                    method=self.command,
+                    path=url.path,
+                    query=parse_qs(url.query),
+                    headers=dict(self.headers),
+                    body=self.rfile.read(length) if length else b'',
+                    client_port=self.client_address[1],
+                )
+                stub.requests.append(request)
+
+                status, body, *headers = stub.respond(request)
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                if isinstance(body, str):
+                    body = body.encode()
+
+                self.send_response(status)
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def multipart_fields(request: StubRequest) -> Dict[str, bytes]:
+    """Return the fields of a multipart/form-data request body, by field name."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode() + request.body)
+    return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+            for part in message.iter_parts()}
+
+
+def census_batch_responder(matches: Dict[str, Tuple[float, float]]) -> Callable[[StubRequest], tuple]:
+    """
+    Stand in for the Census addressbatch endpoint: answer each uploaded address
+    with a Match row if its street address is in matches, otherwise a No_Match row.
+    """
+    def respond(request):
+        address_file = multipart_fields(request)['addressFile'].decode()
+        response = io.StringIO()
+        writer = csv.writer(response, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for unique_id, address, city, state, zip_code in csv.reader(io.StringIO(address_file)):
+            input_address = f"{address}, {city}, {state}, {zip_code}"
+            if address in matches:
+                longitude, latitude = matches[address]
+                writer.writerow([unique_id, input_address, 'Match', 'Exact',
+                                 f"{address}, {city.upper()}, {state}, 60647",
+                                 f"{longitude},{latitude}", '123456', 'L'])
+            else:
+                writer.writerow([unique_id, input_address, 'No_Match'])
+        return 200, response.getvalue(), {'Content-Type': 'text/csv'}
+    return respond
+
+
+def socrata_responder(rows: List[dict]) -> Callable[[StubRequest], tuple]:
+    """
+    Stand in for a Socrata resource queried with `$where=field IN ('a', 'b')`,
+    honouring $select, $limit and $offset.
+    """
+    def respond(request):
+        field, values = re.fullmatch(r"(\w+) IN \((.*)\)", request.query['$where'][0]).groups()
+        values = {value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", values)}
+        select = request.query['$select'][0].split(',')
+        offset = int(request.query.get('$offset', ['0'])[0])
+        limit = int(request.query['$limit'][0])
+
+        matching = [{k: row[k] for k in select if k in row} for row in rows if row.get(field) in values]
+        return 200, matching[offset:offset + limit]
+    return respond
@@ -0,0 +1,125 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.chicago_participatory_urbanism.ward_spending.categorization import (
+    STANDARD_CATEGORY, get_menu_categories, get_menu_category)
+
+DATA_DIR = Path(__file__).parents[2] / "data"
+
+
+# the if/elif chain the rules table replaced
+def _legacy_menu_category(item):
+    item = item.lower()
+    if ("pedestrian" in item
+        or "bump outs" in item
+        or "state law stop" in item
+        or "guardrail" in item
+        or "bollard" in item):
+        return "Pedestrian Infrastructure"
+    elif ("bicycle" in item
+          or "bike" in item
+          or "neighborhood greenway" in item):
+        return "Bicycle Infrastructure"
+    elif "light" in item:
+        return "Lighting"
+    #"resurfac" is used because it will pick up resurface or resurfacing.
+    elif("resurfac" in item and "street" in item
+         or "street" in item and "speed" in item and "hump" in item
+         or "curb" in item and "gutter" in item):
+        return "Street Resurfacing"
+    elif "alley" in item:
+        return "Alleys"
+    elif "miscellaneous" in item and "cdot" in item:
+        return "Misc. CDOT"
+    elif ("mural" in item
+          or "public art" in item
+          or "tree planting" in item
+          or "neighborhood art" in item
+          or "mosaic" in item
+          or "pole" in item and "paint" in item):
+        return "Beautification"
+    elif ("turn arrow" in item
+          or "street speed hump menu" in item
+          or "pavement markings" in item
+          or "traffic circle" in item
+          or "cul-de-sac" in item
+          or "diagonal parking" in item):
+        return "Street Redesign"
+    elif ("traffic" in item and "signal" in item
+          or "speed indicator" in item):
+        return "Traffic Signals"
+    elif "sidewalk" in item:
+        return "Sidewalk Repair"
+    elif ("pod" in item and "camera" in item
+          or "lpr" in item
+          or "dumping" in item and "camera" in item
+          or "ptz" in item and "camera" in item
+          or "oemc" in item and "camera" in item
+          or "high definition" in item and "camera" in item):
+        return "Police Cameras"
+    elif ("park" in item
+          or "playground" in item
+          or "play space" in item
+          or "garden" in item):
+        return "Parks"
+    elif ("viaduct" in item):
+        return "Viaducts"
+    elif ("school" in item
+          or "elementary" in item):
+        return "Schools"
+    else:
+        return "Misc."
+
+
+def _checked_in_items():
+    items = set()
+    for file_name, column in [("ward_spending/2019-2022 data.csv", "item"),
+                              ("2024 Q1-Q2 menu spending.csv", "item"),
+                              ("geocode/csv_files/geocoded_point_df.csv", "type")]:
+        items.update(pd.read_csv(DATA_DIR / file_name)[column].dropna().astype(str))
+    return sorted(items)
+
+
+def test_rules_match_the_legacy_categorization_on_checked_in_items():
+    items = _checked_in_items()
+    assert len(items) > 500
+
+    assert [get_menu_category(item) for item in items] == [_legacy_menu_category(item) for item in items]
+
+
+@pytest.mark.parametrize("item, category", [
+    # compound conditions need every phrase
+    ("Traffic Signal Modernization", "Traffic Signals"),
+    ("Traffic Study", "Misc."),
+    ("POD Camera Installation", "Police Cameras"),
+    ("POD Installation", "Misc."),
+    # earlier rules win
+    ("LED Traffic Signal Upgrades & Pedestrian Countdown Signal", "Pedestrian Infrastructure"),
+    ("Street Speed Hump Menu", "Street Resurfacing"),
+    ("Alley Light", "Lighting"),
+    # phrases inside longer ones
+    ("Diagonal Parking", "Street Redesign"),
+    ("Street Speed Hump Menu Bike Lane", "Bicycle Infrastructure"),
+    ("Speed Indicator Sign", "Traffic Signals"),
+])
+def test_rule_priority_and_compound_conditions(item, category):
+    assert get_menu_category(item) == category == _legacy_menu_category(item)
+
+
+def test_get_menu_categories_categorizes_each_row():
+    items = pd.Series(["Sidewalk Menu", None, "Viaduct Improvement Menu", "Sidewalk Menu"], index=[3, 5, 7, 9])
+
+    categories = get_menu_categories(items)
+
+    assert categories.index.tolist() == [3, 5, 7, 9]
+    assert categories.isna().tolist() == [False, True, False, False]
+    assert categories.dropna().tolist() == ["Sidewalk Repair", "Viaducts", "Sidewalk Repair"]
+
+
+def test_standard_category_follows_the_rules():
+    assert STANDARD_CATEGORY["light"] == "Lighting"
+    assert STANDARD_CATEGORY["school"] == "Schools"
+    # compound conditions aren't single phrases
+    assert "curb" not in STANDARD_CATEGORY
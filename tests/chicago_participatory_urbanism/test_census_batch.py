@@ -0,0 +1,39 @@
+import numpy as np
+
+from src.chicago_participatory_urbanism.census_batch import (
+    CensusBatchGeocoder, build_batch_file, parse_batch_response)
+from src.chicago_participatory_urbanism.http_session import ProviderSession
+from tests.chicago_participatory_urbanism.stub_http_server import StubHTTPServer, census_batch_responder
+
+
+def test_build_batch_file():
+    assert build_batch_file(['3221 W ARMITAGE AVE', '50 W 125TH PL']) == (
+        '0,3221 W ARMITAGE AVE,Chicago,IL,\n'
+        '1,50 W 125TH PL,Chicago,IL,\n'
+    )
+
+
+def test_parse_batch_response():
+    response = (
+        '"1","50 W 125TH PL, Chicago, IL, ","No_Match"\n'
+        '"0","3221 W ARMITAGE AVE, Chicago, IL, ","Match","Exact",'
+        '"3221 W ARMITAGE AVE, CHICAGO, IL, 60647","-87.70,41.91","123456","L"\n'
+        '"2","1 N STATE ST, Chicago, IL, ","Tie"\n'
+    )
+    results = parse_batch_response(response)
+
+    np.testing.assert_array_equal(results[0], [-87.70, 41.91])
+    assert results[1] is None
+    assert results[2] is None
+
+
+def test_census_batch_geocoder_splits_batches():
+    matches = {'3221 W ARMITAGE AVE': (-87.70, 41.91), '1 N STATE ST': (-87.62, 41.88)}
+    with StubHTTPServer(census_batch_responder(matches)) as server:
+        geocoder = CensusBatchGeocoder(ProviderSession('census_batch'), url=server.url, batch_size=2)
+        results = geocoder.geocode(['3221 W ARMITAGE AVE', '50 W 125TH PL', '1 N STATE ST'])
+
+    assert len(server.requests) == 2
+    np.testing.assert_array_equal(results[0], [-87.70, 41.91])
+    assert results[1] is None
+    np.testing.assert_array_equal(results[2], [-87.62, 41.88])
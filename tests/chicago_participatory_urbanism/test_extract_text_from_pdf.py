@@ -0,0 +1,56 @@
+from src.chicago_participatory_urbanism.ward_spending.extract_text_from_pdf import TableState, iter_table_rows
+
+
+def _rows(spans):
+    state = TableState()
+    rows = [row for text, x, y in spans if (row := state.add_span(text, x, y)) is not None]
+    return rows, state
+
+
+def test_table_state_builds_rows():
+    rows, state = _rows([
+        ("WARD: 1", 15, 500),
+        ("Alley Apron Menu", 15, 400),
+        ("1383 N WOLCOTT AVE", 285, 400),
+        ("157172.86", 850, 400),
+        ("Street Resurfacing", 15, 380),
+        ("Menu", 15, 380),
+        ("ON N LEAVITT ST FROM W DIVISION ST", 285, 380),
+        ("(1200 N) TO W NORTH AVE (1600 N)", 285, 380),
+        ("26096.08", 850, 375),
+        ("WARD: 2", 15, 500),
+        # next page: the first row starts at the top again
+        ("Alley Apron Menu", 15, 440),
+    ])
+
+    # the first row is the empty one the state starts with
+    assert rows == [
+        {"ward": 0, "item": "", "loc": "", "cost": ""},
+        {"ward": "1", "item": "Alley Apron Menu", "loc": "1383 N WOLCOTT AVE", "cost": "157172.86"},
+        {"ward": "1", "item": "Street Resurfacing Menu",
+         "loc": "ON N LEAVITT ST FROM W DIVISION ST (1200 N) TO W NORTH AVE (1600 N)", "cost": "26096.08"},
+    ]
+    assert state.current_row == {"ward": "2", "item": "Alley Apron Menu", "loc": "", "cost": ""}
+
+
+def test_table_state_is_per_instance():
+    _rows([("WARD: 7", 15, 500), ("Alley Apron Menu", 15, 400), ("Street Lights", 15, 380)])
+    rows, _ = _rows([("Alley Apron Menu", 15, 400)])
+
+    assert rows == [{"ward": 0, "item": "", "loc": "", "cost": ""}]
+
+
+def test_iter_table_rows_filters_totals_and_streams_pages():
+    pages = iter([
+        [("WARD: 3", 15, 500), ("MENU BUDGET", 15, 440), ("1000000", 850, 440),
+         ("Alley Apron Menu", 15, 400), ("1383 N WOLCOTT AVE", 285, 400),
+         ("WARD COMMITTED 2021 TOTAL", 15, 360), ("WARD 2021 BALANCE", 15, 340)],
+        [("Street Lights", 15, 440)],
+        [("Street Resurfacing", 15, 440)],
+    ])
+    rows = iter_table_rows(pages)
+
+    assert next(rows) == {"ward": "3", "item": "Alley Apron Menu", "loc": "1383 N WOLCOTT AVE", "cost": ""}
+    # the rest of the document hasn't been needed yet
+    assert len(list(pages)) == 2
+    assert list(rows) == []
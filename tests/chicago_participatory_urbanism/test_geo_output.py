@@ -0,0 +1,79 @@
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point
+
+from src.chicago_participatory_urbanism.geo_output import (compact_geojson_seq, iter_geojson_seq, read_geodata,
+                                                           resume_geojson_seq, with_format_extension, write_geodata,
+                                                           write_geojson_seq)
+
+BBOX = (-87.70, 41.87, -87.62, 41.92)
+
+
+def _geocoded():
+    return gpd.GeoDataFrame(
+        {"ward": [1, 2, 3], "location": ["1383 N WOLCOTT AVE", "ON W 44TH ST FROM A TO B", "UNKNOWN"]},
+        geometry=[Point(-87.67, 41.91), LineString([(-87.69, 41.81), (-87.68, 41.81)]), None],
+        crs="EPSG:4326")
+
+
+@pytest.mark.parametrize("extension", [".geojson", ".parquet"])
+def test_round_trip_keeps_every_row(tmp_path, extension):
+    file_path = tmp_path / f"data_geocoded{extension}"
+    write_geodata(_geocoded(), file_path)
+
+    data = read_geodata(file_path)
+
+    assert data["location"].tolist() == _geocoded()["location"].tolist()
+    assert data.geometry.isna().tolist() == [False, False, True]
+    assert read_geodata(file_path, bbox=BBOX)["ward"].tolist() == [1]
+
+
+def test_flatgeobuf_leaves_out_rows_without_geometry(tmp_path):
+    file_path = tmp_path / "data_geocoded.fgb"
+    write_geodata(_geocoded(), file_path)
+
+    assert read_geodata(file_path)["ward"].tolist() == [1, 2]
+    assert read_geodata(file_path, bbox=BBOX)["ward"].tolist() == [1]
+
+
+def test_with_format_extension():
+    assert with_format_extension("data/2019-2022 data_geocoded.geojson", "parquet") == "data/2019-2022 data_geocoded.parquet"
+    assert with_format_extension("data/output/spending.fgb", "geojson") == "data/output/spending.geojson"
+
+
+def test_geojson_seq_appends_chunks_and_compacts(tmp_path):
+    seq_file_path = tmp_path / "data_geocoded.geojsons"
+    data = _geocoded()
+    with open(seq_file_path, "w") as file:
+        write_geojson_seq(file, data.iloc[:2])
+        write_geojson_seq(file, data.iloc[2:])
+        # a run interrupted mid-record
+        file.write('\x1e{"type": "Feature", "prop')
+
+    features = list(iter_geojson_seq(seq_file_path))
+    assert [feature["properties"]["ward"] for feature in features] == [1, 2, 3]
+    assert features[2]["geometry"] is None
+
+    output_file_path = str(tmp_path / "data_geocoded.geojson")
+    compact_geojson_seq(str(seq_file_path), output_file_path)
+
+    compacted = read_geodata(output_file_path)
+    assert compacted["location"].tolist() == data["location"].tolist()
+    assert compacted.geometry.isna().tolist() == [False, False, True]
+    assert compacted.geometry.iloc[1].equals(data.geometry.iloc[1])
+
+
+def test_resume_geojson_seq_cuts_off_a_partial_record(tmp_path):
+    seq_file_path = tmp_path / "data_geocoded.geojsons"
+    assert resume_geojson_seq(seq_file_path) == 0
+
+    data = _geocoded()
+    with open(seq_file_path, "w") as file:
+        write_geojson_seq(file, data.iloc[:2])
+        file.write('\x1e{"type": "Feature", "prop')
+
+    assert resume_geojson_seq(seq_file_path) == 2
+    with open(seq_file_path, "a") as file:
+        write_geojson_seq(file, data.iloc[2:])
+
+    assert [feature["properties"]["ward"] for feature in iter_geojson_seq(seq_file_path)] == [1, 2, 3]
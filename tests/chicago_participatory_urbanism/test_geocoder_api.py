@@ -0,0 +1,260 @@
+from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.location_structures import Intersection, Street, StreetAddress
+from src.chicago_participatory_urbanism.response_cache import ResponseCache
+from tests.chicago_participatory_urbanism.stub_http_server import (
+    StubHTTPServer, census_batch_responder, socrata_responder)
+from shapely.geometry import Point
+import pytest
+import time
+
+
+ADDRESS = StreetAddress(3221, Street(direction='W', name='ARMITAGE', street_type='AVE'))
+
+ADDRESS_POINT = [{'the_geom': {'coordinates': [-87.7, 41.9]}}]
+
+
+def _stub_geocoder(server, **kwargs):
+    provider_urls = {
+        'address': server.url + '/address.json',
+        'transport': server.url + '/transport.json',
+        'census': server.url + '/census',
+        'census_batch': server.url + '/census_batch',
+        'nominatim': server.url + '/nominatim',
+    }
+    return GeoCoderAPI(provider_urls=provider_urls, backoff_factor=0.01, **kwargs)
+
+
+def test_geocoder_api_reuses_connections():
+    with StubHTTPServer(lambda request: (200, ADDRESS_POINT)) as server:
+        geocoder = _stub_geocoder(server)
+        for _ in range(3):
+            assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+
+    assert len(server.requests) == 3
+    assert len({request.client_port for request in server.requests}) == 1
+    assert server.requests[0].query['$where'] == ["cmpaddabrv like '3221 W ARMITAGE AVE'"]
+    assert len(geocoder.sessions['address'].latencies) == 3
+
+
+def test_geocoder_api_retries_rate_limited_requests():
+    responses = iter([(429, {}, {'Retry-After': '0'}), (503, 'busy'), (200, ADDRESS_POINT)])
+    with StubHTTPServer(lambda request: next(responses)) as server:
+        geocoder = _stub_geocoder(server)
+        assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+
+    assert len(server.requests) == 3
+    assert geocoder.sessions['address'].retries == 2
+    assert 'address: 3 requests' in geocoder.latency_report()
+
+
+def test_geocoder_api_falls_back_when_provider_keeps_failing(tmp_path):
+    def respond(request):
+        if request.path == '/address.json':
+            return 500, 'error'
+        return 200, {'result': {'addressMatches': [{'coordinates': {'x': -87.6, 'y': 41.8}}]}}
+
+    cache = ResponseCache(tmp_path / 'responses.sqlite')
+    with StubHTTPServer(respond) as server:
+        geocoder = _stub_geocoder(server, cache=cache, max_retries=2)
+        assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.6, 41.8)
+
+    assert [request.path for request in server.requests] == ['/address.json'] * 3 + ['/census']
+    assert geocoder.sessions['address'].failures == 1
+    # the failed provider isn't cached as a miss
+    assert len(cache) == 1
+
+
+def test_geocoder_api_raises_when_a_failed_provider_might_have_found_it():
+    def respond(request):
+        if request.path == '/address.json':
+            return 500, 'error'
+        if request.path == '/census':
+            return 200, {'result': {'addressMatches': []}}
+        return 200, []
+
+    with StubHTTPServer(respond) as server:
+        geocoder = _stub_geocoder(server, max_retries=1)
+        with pytest.raises(ProviderRequestError):
+            geocoder.get_street_address_coordinates(ADDRESS)
+        points = geocoder.geocode_addresses([ADDRESS])
+
+    assert isinstance(points[0], ProviderRequestError)
+
+
+def test_geocoder_api_answers_repeated_queries_from_cache(tmp_path):
+    with StubHTTPServer(lambda request: (200, ADDRESS_POINT)) as server:
+        geocoder = _stub_geocoder(server, cache=ResponseCache(tmp_path / 'responses.sqlite'))
+        assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+        assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+
+    assert len(server.requests) == 1
+    assert geocoder.cache.hits == 1
+
+
+def test_geocoder_api_caches_misses(tmp_path):
+    def respond(request):
+        if request.path == '/census':
+            return 200, {'result': {'addressMatches': []}}
+        return 200, []
+
+    with StubHTTPServer(respond) as server:
+        geocoder = _stub_geocoder(server, cache=ResponseCache(tmp_path / 'responses.sqlite'))
+        assert geocoder.get_street_address_coordinates(ADDRESS) is None
+        assert geocoder.get_street_address_coordinates(ADDRESS) is None
+
+    assert [request.path for request in server.requests] == ['/address.json', '/census', '/nominatim']
+
+
+def test_geocoder_api_offline_cache_never_queries(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses.sqlite', offline=True)
+    with StubHTTPServer(lambda request: (200, ADDRESS_POINT)) as server:
+        geocoder = _stub_geocoder(server, cache=cache)
+        assert geocoder.get_street_address_coordinates(ADDRESS) is None
+
+    assert server.requests == []
+    assert len(cache) == 0
+
+
+def test_geocoder_api_rate_limits_nominatim():
+    with StubHTTPServer(lambda request: (200, [{'lon': '-87.7', 'lat': '41.9'}])) as server:
+        geocoder = _stub_geocoder(server, rate_limits={'nominatim': 20})
+        start = time.monotonic()
+        for _ in range(5):
+            geocoder._query_nominatim('3221 W ARMITAGE AVE')
+        elapsed = time.monotonic() - start
+
+    # the first request goes straight out, the next four wait 1/20 s each
+    assert elapsed >= 4 / 20
+
+
+def test_geocoder_api_batches_census_lookups(tmp_path):
+    addresses = [
+        ADDRESS,
+        StreetAddress(50, Street(direction='W', name='125TH', street_type='PL')),
+        StreetAddress(1, Street(direction='N', name='STATE', street_type='ST')),
+        ADDRESS,
+    ]
+    census = census_batch_responder({'50 W 125TH PL': (-87.62, 41.66)})
+
+    def respond(request):
+        if request.path == '/census_batch':
+            return census(request)
+        if request.path == '/nominatim':
+            return 200, [{'lon': '-87.6', 'lat': '41.8'}]
+        return 200, []
+
+    cache = ResponseCache(tmp_path / 'responses.sqlite')
+    with StubHTTPServer(respond) as server:
+        geocoder = _stub_geocoder(server, cache=cache)
+        points = geocoder.geocode_addresses(addresses)
+        # the batch results answer later one-line census lookups
+        assert geocoder.get_street_address_coordinates(addresses[1]) == Point(-87.62, 41.66)
+
+    assert list(points) == [Point(-87.6, 41.8), Point(-87.62, 41.66), Point(-87.6, 41.8), Point(-87.6, 41.8)]
+    paths = [request.path for request in server.requests]
+    # one upload for the three distinct addresses Cook County missed
+    assert paths.count('/census_batch') == 1
+    assert paths.count('/census') == 0
+    assert paths.count('/nominatim') == 2
+
+
+def test_geocoder_api_falls_back_when_census_batch_fails():
+    def respond(request):
+        if request.path == '/census_batch':
+            return 500, 'error'
+        if request.path == '/nominatim':
+            return 200, [{'lon': '-87.6', 'lat': '41.8'}]
+        return 200, []
+
+    with StubHTTPServer(respond) as server:
+        geocoder = _stub_geocoder(server, max_retries=1)
+        points = geocoder.geocode_addresses([ADDRESS])
+
+    assert list(points) == [Point(-87.6, 41.8)]
+    assert geocoder.sessions['census_batch'].failures == 1
+
+
+def test_geocoder_api_prefetch_answers_address_lookups_locally():
+    rows = [{'cmpaddabrv': f'{number} W ARMITAGE AVE', 'add_number': str(number),
+             'the_geom': {'type': 'Point', 'coordinates': [-87.7 + number / 1e5, 41.9]}}
+            for number in range(3000, 3250)]
+    addresses = [StreetAddress(number, Street(direction='W', name='ARMITAGE', street_type='AVE'))
+                 for number in range(3000, 3260)]
+
+    with StubHTTPServer(socrata_responder(rows)) as server:
+        geocoder = _stub_geocoder(server)
+        geocoder.prefetch(addresses)
+        prefetch_requests = len(server.requests)
+        points = [geocoder.get_street_address_coordinates(address) for address in addresses[:250]]
+
+    # 260 addresses in chunks of 100
+    assert prefetch_requests == 3
+    assert len(server.requests) == 3
+    assert server.requests[0].query['$select'] == ['cmpaddabrv,the_geom']
+    assert points[0] == Point(-87.7 + 3000 / 1e5, 41.9)
+    # addresses the prefetch didn't find are known misses
+    assert geocoder.prefetched['address']['3255 W ARMITAGE AVE'] is None
+
+
+def test_geocoder_api_prefetch_pages_street_segments():
+    rows = [
+        {'street_nam': 'DIVISION', 'f_cross': '1600 N ASHLAND AVE', 't_cross': '1600 N MARSHFIELD AVE',
+         'the_geom': {'coordinates': [[[-87.667, 41.903], [-87.668, 41.903]]]}},
+        {'street_nam': 'DIVISION', 'f_cross': '1600 N WOOD ST', 't_cross': '1600 N HERMITAGE AVE',
+         'the_geom': {'coordinates': [[[-87.672, 41.903], [-87.673, 41.903]]]}},
+        {'street_nam': 'PAULINA', 'f_cross': '1200 W DIVISION ST', 't_cross': '1200 W LE MOYNE ST',
+         'the_geom': {'coordinates': [[[-87.669, 41.903], [-87.669, 41.905]]]}},
+    ]
+    intersections = [
+        Intersection(Street('W', 'DIVISION', 'ST'), Street('N', 'WOOD', 'ST')),
+        Intersection(Street('N', 'PAULINA', 'ST'), Street('W', 'DIVISION', 'ST')),
+    ]
+
+    with StubHTTPServer(socrata_responder(rows)) as server:
+        geocoder = _stub_geocoder(server)
+        geocoder.prefetch(intersections, page_size=2)
+        points = [geocoder.get_intersection_coordinates(intersection) for intersection in intersections]
+
+    # one chunk of street names, in two pages
+    assert [request.query['$offset'] for request in server.requests] == [['0'], ['2']]
+    assert points == [Point(-87.672, 41.903), Point(-87.669, 41.903)]
+
+
+def test_geocoder_api_prefetch_fills_and_reuses_the_response_cache(tmp_path):
+    rows = [
+        {'cmpaddabrv': '3221 W ARMITAGE AVE', 'the_geom': {'coordinates': [-87.7, 41.9]}},
+        {'street_nam': 'DIVISION', 'f_cross': '1600 N WOOD ST', 't_cross': '1600 N HERMITAGE AVE',
+         'the_geom': {'coordinates': [[[-87.672, 41.903], [-87.673, 41.903]]]}},
+    ]
+    locations = [
+        ADDRESS,
+        StreetAddress(3255, Street(direction='W', name='ARMITAGE', street_type='AVE')),
+        Intersection(Street('W', 'DIVISION', 'ST'), Street('N', 'WOOD', 'ST')),
+    ]
+    cache_path = tmp_path / 'responses.sqlite'
+
+    with StubHTTPServer(socrata_responder(rows)) as server:
+        _stub_geocoder(server, cache=ResponseCache(cache_path)).prefetch(locations)
+        first_run_requests = len(server.requests)
+
+        # a rerun, and an offline run, find every lookup in the cache
+        for cache in [ResponseCache(cache_path), ResponseCache(cache_path, offline=True)]:
+            geocoder = _stub_geocoder(server, cache=cache)
+            geocoder.prefetch(locations)
+            assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+            assert geocoder.get_intersection_coordinates(locations[2]) == Point(-87.672, 41.903)
+
+    # one address query and one street segment query
+    assert first_run_requests == 2
+    assert len(server.requests) == 2
+
+
+def test_geocoder_api_offline_cache_skips_prefetch(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses.sqlite', offline=True)
+    with StubHTTPServer(socrata_responder([])) as server:
+        geocoder = _stub_geocoder(server, cache=cache)
+        geocoder.prefetch([ADDRESS, Intersection(Street('W', 'DIVISION', 'ST'), Street('N', 'WOOD', 'ST'))])
+
+    assert server.requests == []
+    assert geocoder.prefetched == {'address': {}, 'transport': {}}
@@ -0,0 +1,94 @@
+from src.chicago_participatory_urbanism.geocoder_api import GeoCoderAPI
+from src.chicago_participatory_urbanism.geocoder_api_async import AsyncGeoCoderAPI
+from src.chicago_participatory_urbanism.location_structures import Intersection, Street, StreetAddress
+from src.chicago_participatory_urbanism.rate_limit import TokenBucket
+from tests.chicago_participatory_urbanism.stub_http_server import StubHTTPServer
+from shapely.geometry import Point
+import threading
+import time
+
+
+def test_token_bucket_spaces_out_requests():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.monotonic()
+    waits = [bucket.acquire() for _ in range(6)]
+    elapsed = time.monotonic() - start
+
+    # two tokens of burst, then one every 1/50 s
+    assert waits[:2] == [0, 0]
+    assert elapsed >= 4 / 50
+
+
+def test_async_geocoder_keeps_many_requests_in_flight_and_input_order():
+    in_flight = 0
+    most_in_flight = 0
+    lock = threading.Lock()
+
+    def respond(request):
+        nonlocal in_flight, most_in_flight
+        with lock:
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+
+        if request.path == '/address.json':
+            number = int(request.query['$where'][0].split("'")[1].split()[0])
+            if number % 2:
+                return 200, []
+            return 200, [{'the_geom': {'coordinates': [number, 41.9]}}]
+        if request.path == '/census':
+            return 200, {'result': {'addressMatches': [{'coordinates': {'x': 1, 'y': 1}}]}}
+        return 200, [{'the_geom': {'coordinates': [[2, 2]]}}]
+
+    with StubHTTPServer(respond) as server:
+        geocoder = GeoCoderAPI(provider_urls={
+            'address': server.url + '/address.json',
+            'transport': server.url + '/transport.json',
+            'census': server.url + '/census',
+            'nominatim': server.url + '/nominatim',
+        })
+        street = Street(direction='W', name='ARMITAGE', street_type='AVE')
+        addresses = [StreetAddress(number, street) for number in range(20)]
+        intersection = Intersection(street, Street(direction='', name='KEDZIE', street_type=''))
+
+        points = AsyncGeoCoderAPI(geocoder, max_in_flight=8).geocode_many_sync(addresses + [intersection])
+
+    # even numbers come from the Cook County API, odd ones fall back to the Census geocoder
+    assert points[:20] == [Point(number, 41.9) if number % 2 == 0 else Point(1, 1) for number in range(20)]
+    assert points[20] == Point(2, 2)
+    assert most_in_flight > 1
+
+
+def test_async_geocoder_geocodes_each_distinct_location_once():
+    with StubHTTPServer(lambda request: (200, [{'the_geom': {'coordinates': [-87.7, 41.9]}}])) as server:
+        geocoder = GeoCoderAPI(provider_urls={'address': server.url + '/address.json'})
+        street = Street(direction='W', name='ARMITAGE', street_type='AVE')
+        addresses = [StreetAddress(3221, street), StreetAddress(3221, street), StreetAddress(3221, street)]
+
+        points = AsyncGeoCoderAPI(geocoder).geocode_many_sync(addresses)
+
+    assert points == [Point(-87.7, 41.9)] * 3
+    assert len(server.requests) == 1
+
+
+def test_async_geocoder_keeps_intersection_street_order():
+    def respond(request):
+        # DIVISION's segment starting at PAULINA, and PAULINA's starting at DIVISION
+        where = request.query['$where'][0]
+        if "street_nam like 'DIVISION'" in where and 'f_cross like "%PAULINA%"' in where:
+            return 200, [{'the_geom': {'coordinates': [[[-87.669, 41.903]]]}}]
+        if "street_nam like 'PAULINA'" in where and 'f_cross like "%DIVISION%"' in where:
+            return 200, [{'the_geom': {'coordinates': [[[-87.669, 41.904]]]}}]
+        return 200, []
+
+    with StubHTTPServer(respond) as server:
+        geocoder = GeoCoderAPI(provider_urls={'transport': server.url + '/transport.json'})
+        division = Street(direction='W', name='DIVISION', street_type='ST')
+        paulina = Street(direction='N', name='PAULINA', street_type='ST')
+
+        points = AsyncGeoCoderAPI(geocoder).geocode_many_sync(
+            [Intersection(division, paulina), Intersection(paulina, division)])
+
+    assert points == [Point(-87.669, 41.903), Point(-87.669, 41.904)]
@@ -0,0 +1,81 @@
+from src.chicago_participatory_urbanism import geocoder_cache
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+from unittest.mock import patch
+
+
+@pytest.fixture
+def address_points_csv(tmp_path):
+    file_path = tmp_path / 'Address_Points_reduced.csv'
+    pd.DataFrame({
+        'Add_Number': [1763, 1760],
+        'LSt_PreDir': ['W', 'W'],
+        'St_Name': ['BELMONT', 'BELMONT'],
+        'LSt_Type': ['AVE', 'AVE'],
+        'Long': [-87.1, -87.2],
+        'Lat': [41.1, 41.2],
+    }).to_csv(file_path, index=False)
+    return file_path
+
+
+@pytest.fixture
+def street_center_lines_geojson(tmp_path):
+    file_path = tmp_path / 'Street Center Lines.geojson'
+    gpd.GeoDataFrame(
+        {'street_nam': ['WESTERN', 'BELMONT']},
+        geometry=[LineString([(0, 0), (0, 2)]), LineString([(-1, 1), (1, 1)])],
+        crs='EPSG:4326',
+    ).to_file(file_path, driver='GeoJSON')
+    return file_path
+
+
+def test_address_points_are_read_from_cache_on_second_load(tmp_path, address_points_csv):
+    cache_dir = tmp_path / 'cache'
+    first = geocoder_cache.load_address_points(address_points_csv, cache_dir)
+
+    with patch('src.chicago_participatory_urbanism.geocoder_cache.pd.read_csv') as mock_read_csv:
+        second = geocoder_cache.load_address_points(address_points_csv, cache_dir)
+        mock_read_csv.assert_not_called()
+
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_address_point_cache_rebuilds_when_source_changes(tmp_path, address_points_csv):
+    cache_dir = tmp_path / 'cache'
+    geocoder_cache.load_address_points(address_points_csv, cache_dir)
+
+    with open(address_points_csv, 'a') as csv_file:
+        csv_file.write('1770,W,BELMONT,AVE,-87.3,41.3\n')
+    reloaded = geocoder_cache.load_address_points(address_points_csv, cache_dir)
+
+    assert len(reloaded) == 3
+    assert len(list(cache_dir.glob('address_points-v*.feather'))) == 1
+
+
+def test_street_center_lines_are_read_from_cache_on_second_load(tmp_path, street_center_lines_geojson):
+    cache_dir = tmp_path / 'cache'
+    first = geocoder_cache.load_street_center_lines(street_center_lines_geojson, cache_dir)
+
+    with patch('src.chicago_participatory_urbanism.geocoder_cache.gpd.read_file') as mock_read_file:
+        second = geocoder_cache.load_street_center_lines(street_center_lines_geojson, cache_dir)
+        mock_read_file.assert_not_called()
+
+    assert isinstance(second, gpd.GeoDataFrame)
+    assert second.crs == first.crs
+    assert second.geometry.geom_equals(first.geometry).all()
+    assert second['street_nam'].tolist() == ['WESTERN', 'BELMONT']
+
+
+def test_street_intersections_are_built_once(tmp_path, street_center_lines_geojson):
+    cache_dir = tmp_path / 'cache'
+    street_center_lines_gdf = geocoder_cache.load_street_center_lines(street_center_lines_geojson, cache_dir)
+    first = geocoder_cache.load_street_intersections(street_center_lines_geojson, street_center_lines_gdf, cache_dir)
+
+    with patch('src.chicago_participatory_urbanism.geocoder_cache.build_intersection_table') as mock_build:
+        second = geocoder_cache.load_street_intersections(street_center_lines_geojson, street_center_lines_gdf, cache_dir)
+        mock_build.assert_not_called()
+
+    pd.testing.assert_frame_equal(first, second)
+    assert second[['street1', 'street2']].values.tolist() == [['BELMONT', 'WESTERN']]
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+import pytest
+from shapely.geometry import Point
+
+from src.chicago_participatory_urbanism.geocoder_hybrid import HybridGeocoder
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.location_structures import Intersection, Street, StreetAddress
+
+
+ADDRESS = StreetAddress(3221, Street(direction='W', name='ARMITAGE', street_type='AVE'))
+INTERSECTION = Intersection(Street('W', 'DIVISION', 'ST'), Street('N', 'PAULINA', 'ST'))
+
+
+def test_hybrid_geocoder_sends_only_misses_to_later_tiers():
+    local = MagicMock(spec=['get_street_address_coordinates', 'get_intersection_coordinates'])
+    local.get_street_address_coordinates.side_effect = [Point(-87.7, 41.9), None]
+    local.get_intersection_coordinates.return_value = None
+    api = MagicMock(spec=['get_street_address_coordinates', 'get_intersection_coordinates'])
+    api.get_street_address_coordinates.return_value = Point(-87.6, 41.8)
+    api.get_intersection_coordinates.return_value = None
+
+    geocoder = HybridGeocoder([('local', local), ('api', api)])
+
+    assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.7, 41.9)
+    assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.6, 41.8)
+    assert geocoder.get_intersection_coordinates(INTERSECTION) is None
+
+    assert api.get_street_address_coordinates.call_count == 1
+    assert geocoder.queries == {'local': 3, 'api': 2}
+    assert geocoder.hits == {'local': 1, 'api': 1}
+    assert 'local: 3 lookups, 1 found (33% hit rate, 33% of all lookups)' in geocoder.hit_report()
+
+
+def test_hybrid_geocoder_treats_tier_errors_as_misses():
+    local = MagicMock(spec=['get_street_address_coordinates'])
+    local.get_street_address_coordinates.side_effect = KeyError('ARMITAGE')
+    api = MagicMock(spec=['get_street_address_coordinates'])
+    api.get_street_address_coordinates.return_value = Point(-87.6, 41.8)
+
+    geocoder = HybridGeocoder([('local', local), ('api', api)])
+
+    assert geocoder.get_street_address_coordinates(ADDRESS) == Point(-87.6, 41.8)
+
+
+def test_hybrid_geocoder_raises_provider_errors_no_tier_recovers_from():
+    local = MagicMock(spec=['get_street_address_coordinates'])
+    local.get_street_address_coordinates.return_value = None
+    api = MagicMock(spec=['get_street_address_coordinates'])
+    api.get_street_address_coordinates.side_effect = ProviderRequestError('address request failed')
+
+    geocoder = HybridGeocoder([('local', local), ('api', api)])
+
+    with pytest.raises(ProviderRequestError):
+        geocoder.get_street_address_coordinates(ADDRESS)
+
+
+def test_hybrid_geocoder_prefetches_what_earlier_tiers_miss():
+    local = MagicMock(spec=['get_street_address_coordinates', 'get_intersection_coordinates'])
+    local.get_street_address_coordinates.return_value = Point(-87.7, 41.9)
+    local.get_intersection_coordinates.return_value = None
+    api = MagicMock(spec=['get_street_address_coordinates', 'get_intersection_coordinates', 'prefetch'])
+
+    geocoder = HybridGeocoder([('local', local), ('api', api)])
+    geocoder.prefetch([ADDRESS, INTERSECTION])
+
+    api.prefetch.assert_called_once_with([INTERSECTION])
+    # prefetching isn't counted as lookups
+    assert geocoder.queries == {'local': 0, 'api': 0}
@@ -1,18 +1,154 @@
-from src.chicago_participatory_urbanism.geocoder_local import Geocoder
+from src.chicago_participatory_urbanism.geocoder_local import Geocoder, AddressPointIndex
+from src.chicago_participatory_urbanism.location_structures import Street, StreetAddress, Intersection
+import geopandas as gpd
+import numpy as np
+import pandas as pd
 import pytest
+from shapely.geometry import LineString, Point
 from unittest.mock import patch
 
 
+def _fake_address_points():
+    return pd.DataFrame({
+        'Add_Number': [1763, 1760, 1770, 1756, 1770, 1763, 1200, np.nan, 1765],
+        'LSt_PreDir': ['W', 'W', 'W', 'W', 'W', 'W', 'N', 'W', np.nan],
+        'St_Name': ['BELMONT', 'BELMONT', 'BELMONT', 'BELMONT', 'BELMONT', 'BELMONT', 'LEAVITT', 'BELMONT', 'BELMONT'],
+        'LSt_Type': ['AVE', 'AVE', 'AVE', 'AVE', 'AVE', 'AVE', 'ST', 'AVE', 'AVE'],
+        'Long': [-87.1, -87.2, -87.3, -87.4, -87.5, -87.6, -87.7, -87.8, -87.9],
+        'Lat': [41.1, 41.2, 41.3, 41.4, 41.5, 41.6, 41.7, 41.8, 41.9],
+    })
+
+
+def _fake_street_center_lines():
+    return gpd.GeoDataFrame(
+        {'street_nam': ['WESTERN', 'WESTERN', 'BELMONT']},
+        geometry=[LineString([(0, 0), (0, 1)]), LineString([(0, 1), (0, 2)]), LineString([(-1, 1.5), (1, 1.5)])],
+        crs='EPSG:4326',
+    )
+
+
+def _scan_address_points(address_points_df, direction, name, street_type, number, fuzziness=10):
+    """Reference lookup: filter the whole table, as the geocoder used to."""
+    results = address_points_df[(number - fuzziness <= address_points_df['Add_Number']) &
+                                (address_points_df['Add_Number'] <= number + fuzziness) &
+                                (address_points_df['LSt_PreDir'] == direction) &
+                                (address_points_df['St_Name'] == name) &
+                                (address_points_df['LSt_Type'] == street_type)].copy()
+    if results.empty:
+        return -1
+    exact_address = results[results['Add_Number'] == number]
+    if not exact_address.empty:
+        return exact_address.index[0]
+    return (results['Add_Number'] - number).abs().idxmin()
+
+
 @patch('src.chicago_participatory_urbanism.geocoder_local.gpd.read_file')
 @patch('src.chicago_participatory_urbanism.geocoder_local.pd.read_csv')
 def test_geocoder_local_initializes_correctly_with_fake_files(mock_read_csv, mock_read_file):
-    test_geocoder = Geocoder()
-    assert test_geocoder.address_points_df == mock_read_csv.return_value
-    assert test_geocoder.street_center_lines_gdf == mock_read_file.return_value
+    mock_read_csv.return_value = _fake_address_points()
+    mock_read_file.return_value = _fake_street_center_lines()
+    test_geocoder = Geocoder(use_cache=False)
+    assert test_geocoder.address_points_df is mock_read_csv.return_value
+    assert test_geocoder.street_center_lines_gdf is mock_read_file.return_value
+
+
+@pytest.mark.parametrize("number, expected_position", [
+    (1763, 0),   # exact match, first of two rows
+    (1770, 2),   # exact match, first of two rows
+    (1758, 1),   # tie between 1756 and 1760, 1760 comes first in the table
+    (1767, 2),   # 1770 is closer than 1763
+    (1774, 2),
+    (1781, -1),  # outside the fuzziness window
+    (1746, 3),
+])
+def test_address_point_index_matches_table_scan(number, expected_position):
+    address_points_df = _fake_address_points()
+    index = AddressPointIndex(address_points_df)
+    position = index.lookup(('W', 'BELMONT', 'AVE'), [number])[0]
+    assert position == expected_position
+    assert position == _scan_address_points(address_points_df, 'W', 'BELMONT', 'AVE', number)
+
+
+def test_address_point_index_matches_table_scan_on_random_data():
+    rng = np.random.default_rng(0)
+    address_points_df = pd.DataFrame({
+        'Add_Number': rng.integers(0, 200, size=2000),
+        'LSt_PreDir': rng.choice(['N', 'S', 'W'], size=2000),
+        'St_Name': rng.choice(['ASHLAND', 'WESTERN', 'DAMEN'], size=2000),
+        'LSt_Type': 'AVE',
+        'Long': rng.random(2000),
+        'Lat': rng.random(2000),
+    })
+    index = AddressPointIndex(address_points_df)
+    numbers = np.arange(-20, 230)
+    for key in [('N', 'ASHLAND', 'AVE'), ('W', 'DAMEN', 'AVE'), ('E', 'DAMEN', 'AVE')]:
+        for fuzziness in [0, 3, 10]:
+            positions = index.lookup(key, numbers, fuzziness)
+            expected = [_scan_address_points(address_points_df, *key, number, fuzziness) for number in numbers]
+            assert positions.tolist() == expected
+
+
+@patch('src.chicago_participatory_urbanism.geocoder_local.gpd.read_file')
+@patch('src.chicago_participatory_urbanism.geocoder_local.pd.read_csv')
+def test_geocoder_local_street_address_coordinates(mock_read_csv, mock_read_file):
+    mock_read_csv.return_value = _fake_address_points()
+    mock_read_file.return_value = _fake_street_center_lines()
+    test_geocoder = Geocoder(use_cache=False)
+    street = Street(direction='w', name='Belmont', street_type='ave')
+    assert test_geocoder.get_street_address_coordinates(StreetAddress(1758, street)) == Point(-87.2, 41.2)
+    assert test_geocoder.get_street_address_coordinates(StreetAddress(1781, street)) is None
+    assert test_geocoder.get_street_address_coordinates(StreetAddress(1781, street), fuzziness=20) == Point(-87.3, 41.3)
+
+
+@patch('src.chicago_participatory_urbanism.geocoder_local.gpd.read_file')
+@patch('src.chicago_participatory_urbanism.geocoder_local.pd.read_csv')
+def test_geocoder_local_intersection_coordinates(mock_read_csv, mock_read_file):
+    mock_read_csv.return_value = _fake_address_points()
+    mock_read_file.return_value = _fake_street_center_lines()
+    test_geocoder = Geocoder(use_cache=False)
+    western = Street(direction='', name='WESTERN', street_type='')
+    belmont = Street(direction='', name='belmont', street_type='')
+    leavitt = Street(direction='', name='LEAVITT', street_type='')
+    assert test_geocoder.get_intersection_coordinates(Intersection(western, belmont)) == Point(0, 1.5)
+    assert test_geocoder.get_intersection_coordinates(Intersection(belmont, western)) == Point(0, 1.5)
+    assert test_geocoder.get_intersection_coordinates(Intersection(western, leavitt)) is None
+    assert test_geocoder.get_intersection_coordinates(Intersection(western, western)) is None
+
+
+@patch('src.chicago_participatory_urbanism.geocoder_local.gpd.read_file')
+@patch('src.chicago_participatory_urbanism.geocoder_local.pd.read_csv')
+def test_geocoder_local_batch_results_match_single_lookups(mock_read_csv, mock_read_file):
+    rng = np.random.default_rng(1)
+    mock_read_csv.return_value = pd.DataFrame({
+        'Add_Number': rng.integers(0, 200, size=500),
+        'LSt_PreDir': rng.choice(['N', 'W'], size=500),
+        'St_Name': rng.choice(['ASHLAND', 'WESTERN'], size=500),
+        'LSt_Type': 'AVE',
+        'Long': rng.random(500),
+        'Lat': rng.random(500),
+    })
+    mock_read_file.return_value = _fake_street_center_lines()
+    test_geocoder = Geocoder(use_cache=False)
+
+    addresses = [StreetAddress(int(number), Street(direction, name, 'AVE'))
+                 for number, direction, name in zip(rng.integers(-20, 230, size=300),
+                                                    rng.choice(['N', 'W', 'S'], size=300),
+                                                    rng.choice(['ASHLAND', 'WESTERN'], size=300))]
+    batch_points = test_geocoder.geocode_addresses(addresses)
+    assert len(batch_points) == len(addresses)
+    assert any(point is None for point in batch_points)
+    for address, point in zip(addresses, batch_points):
+        assert point == test_geocoder.get_street_address_coordinates(address)
+
+    western = Street(direction='', name='WESTERN', street_type='')
+    belmont = Street(direction='', name='BELMONT', street_type='')
+    intersections = [Intersection(western, belmont), Intersection(western, western), Intersection(belmont, western)]
+    assert test_geocoder.geocode_intersections(intersections).tolist() == [Point(0, 1.5), None, Point(0, 1.5)]
+    assert test_geocoder.geocode_addresses([]).tolist() == []
 
 
 @pytest.mark.integration_test
 def test_geocoder_local_initializes_correctly_with_real_files():
-    test_geocoder = Geocoder()
+    test_geocoder = Geocoder(use_cache=False)
     assert len(test_geocoder.address_points_df) == 582504
     assert len(test_geocoder.street_center_lines_gdf) == 56338
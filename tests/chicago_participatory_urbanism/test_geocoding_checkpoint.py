@@ -0,0 +1,107 @@
+from unittest.mock import MagicMock
+
+import pytest
+from shapely.geometry import Point
+
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.ward_spending.geocoding_checkpoint import (
+    GeocodingCheckpoint, geocode_with_checkpoint)
+from src.chicago_participatory_urbanism.ward_spending.location_geocoding import LocationGeocoder
+
+
+def _geocode(texts):
+    return [None if text == 'WARD 32 MENU' else Point(len(text), 41.9) for text in texts]
+
+
+def test_geocode_with_checkpoint_resumes_after_interruption(tmp_path):
+    texts = ['1110 N STATE ST', '1030 N STATE ST', 'WARD 32 MENU', '1110 N STATE ST', '3221 W ARMITAGE AVE']
+    geocoded = []
+
+    def interrupted(chunk):
+        if len(geocoded) == 2:
+            raise KeyboardInterrupt
+        geocoded.extend(chunk)
+        return _geocode(chunk)
+
+    with pytest.raises(KeyboardInterrupt):
+        geocode_with_checkpoint(texts, interrupted, GeocodingCheckpoint(tmp_path / 'checkpoint.jsonl'), chunk_size=2)
+
+    resumed = []
+
+    def geocode(chunk):
+        resumed.extend(chunk)
+        return _geocode(chunk)
+
+    geometries = geocode_with_checkpoint(texts, geocode, GeocodingCheckpoint(tmp_path / 'checkpoint.jsonl'), chunk_size=2)
+
+    assert geocoded == ['1110 N STATE ST', '1030 N STATE ST']
+    assert resumed == ['WARD 32 MENU', '3221 W ARMITAGE AVE']
+    assert geometries == _geocode(texts)
+
+
+def test_geocode_with_checkpoint_retries_failures_only_when_asked(tmp_path):
+    checkpoint = GeocodingCheckpoint(tmp_path / 'checkpoint.jsonl')
+    geocode_with_checkpoint(['WARD 32 MENU', '1110 N STATE ST'], _geocode, checkpoint)
+
+    retried = []
+
+    def geocode(chunk):
+        retried.extend(chunk)
+        return [Point(0, 0)] * len(chunk)
+
+    geocode_with_checkpoint(['WARD 32 MENU', '1110 N STATE ST'], geocode, checkpoint)
+    assert retried == []
+
+    geometries = geocode_with_checkpoint(['WARD 32 MENU', '1110 N STATE ST'], geocode, checkpoint, retry_failed=True)
+    assert retried == ['WARD 32 MENU']
+    assert geometries[0] == Point(0, 0)
+
+
+def test_geocode_with_checkpoint_leaves_provider_errors_for_the_next_run(tmp_path):
+    texts = ['1110 N STATE ST', 'WARD 32 MENU']
+
+    def run(geocoder):
+        location_geocoder = LocationGeocoder(geocoder)
+        return geocode_with_checkpoint(
+            texts, lambda chunk: [location_geocoder.process_location_text(text) for text in chunk],
+            GeocodingCheckpoint(tmp_path / 'checkpoint.jsonl'), retry_later=location_geocoder.had_provider_error)
+
+    outage = MagicMock()
+    outage.get_street_address_coordinates.side_effect = ProviderRequestError('timeout')
+    assert run(outage) == [None, None]
+
+    recovered = MagicMock()
+    recovered.get_street_address_coordinates.return_value = Point(-87.63, 41.9)
+    assert run(recovered) == [Point(-87.63, 41.9), None]
+    # the location that isn't an address was checkpointed as a miss the first time
+    assert recovered.get_street_address_coordinates.call_count == 1
+
+
+def test_checkpoint_skips_partly_written_record_and_compacts(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    checkpoint = GeocodingCheckpoint(path)
+    checkpoint.add(['WARD 32 MENU'], [None])
+    checkpoint.add(['WARD 32 MENU', '1110 N STATE ST'], [Point(1, 1), Point(2, 2)])
+    with open(path, 'a') as f:
+        f.write('{"location_hash": "ab')
+
+    reloaded = GeocodingCheckpoint(path)
+    assert reloaded.get('WARD 32 MENU') == Point(1, 1)
+    assert len(reloaded) == 2
+
+    reloaded.compact()
+    assert len(path.read_text().splitlines()) == 2
+    assert GeocodingCheckpoint(path).get(' 1110 N STATE ST ') == Point(2, 2)
+
+
+def test_checkpoint_appends_after_partly_written_record(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    GeocodingCheckpoint(path).add(['1110 N STATE ST'], [Point(1, 1)])
+    with open(path, 'a') as f:
+        f.write('{"location_hash": "ab')
+
+    GeocodingCheckpoint(path).add(['1030 N STATE ST'], [Point(2, 2)])
+
+    reloaded = GeocodingCheckpoint(path)
+    assert len(reloaded) == 2
+    assert reloaded.get('1030 N STATE ST') == Point(2, 2)
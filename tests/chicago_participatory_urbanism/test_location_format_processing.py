@@ -94,3 +94,28 @@ def test_extract_segment_intersection_address_info():
     assert result[1].street.direction == "W"
     assert result[1].street.name == "52ND"
     assert result[1].street.street_type == "PL"
+
+def test_parse_location_matches_extract_functions():
+    cases = [
+        ("1640 N MAPLEWOOD AVE", lfp.LocationFormat.STREET_ADDRESS, lfp.extract_street_address),
+        ("434-442 E 46TH PL", lfp.LocationFormat.STREET_ADDRESS_RANGE, lfp.extract_address_range_street_addresses),
+        ("N WOOD ST & W AUGUSTA BLVD & W CORTEZ ST & N HERMITAGE AVE", lfp.LocationFormat.ALLEY,
+         lfp.extract_alley_intersections),
+        ("N ASHLAND AVE & W CHESTNUT ST", lfp.LocationFormat.INTERSECTION, lfp.extract_intersection),
+        ("ON N LEAVITT ST FROM W DIVISION ST (1200 N) TO W NORTH AVE (1600 N)",
+         lfp.LocationFormat.STREET_SEGMENT_INTERSECTIONS, lfp.extract_segment_intersections),
+        ("ON W 52ND PL FROM 322 W TO S PRINCETON AVE (300 W)",
+         lfp.LocationFormat.STREET_SEGMENT_ADDRESS_INTERSECTION, lfp.extract_segment_address_intersection_info),
+        ("ON W 52ND PL FROM S PRINCETON AVE (300 W) TO 322 W",
+         lfp.LocationFormat.STREET_SEGMENT_INTERSECTION_ADDRESS, lfp.extract_segment_intersection_address_info),
+    ]
+    for location, expected_format, extract in cases:
+        result_format, result = lfp.parse_location(f"  {location} ")
+        assert result_format == expected_format
+        assert lfp.get_location_format(location) == expected_format
+        assert result == extract(location)
+
+def test_parse_location_no_match():
+    assert lfp.parse_location("ONTARIO ST") == (None, None)
+    assert lfp.parse_location("WARD 32 MENU") == (None, None)
+    assert lfp.get_location_format("") is None
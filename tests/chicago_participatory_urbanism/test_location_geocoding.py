@@ -0,0 +1,129 @@
+from unittest.mock import MagicMock
+
+from shapely.geometry import LineString, Point
+
+from src.chicago_participatory_urbanism.http_session import ProviderRequestError
+from src.chicago_participatory_urbanism.ward_spending.location_geocoding import LocationCache, LocationGeocoder
+
+
+def _mock_geocoder():
+    geocoder = MagicMock()
+    geocoder.get_street_address_coordinates.side_effect = lambda address: Point(address.number, 41.9)
+    geocoder.get_intersection_coordinates.return_value = None
+    return geocoder
+
+
+def test_location_geocoder_geocodes_each_location_once():
+    geocoder = _mock_geocoder()
+    location_geocoder = LocationGeocoder(geocoder)
+
+    first = location_geocoder.process_location_text("1110 N STATE ST; 1030 N STATE ST")
+    second = location_geocoder.process_location_text("1030 N STATE ST ;1110 N STATE ST")
+
+    assert first.equals(second)
+    assert geocoder.get_street_address_coordinates.call_count == 2
+    assert (location_geocoder.cache.hits, location_geocoder.cache.misses) == (2, 2)
+
+
+def test_location_geocoder_caches_misses_but_not_provider_errors():
+    geocoder = _mock_geocoder()
+    location_geocoder = LocationGeocoder(geocoder)
+
+    # the intersection isn't found, so the segment can't be built
+    segment = "ON N LEAVITT ST FROM W DIVISION ST (1200 N) TO W NORTH AVE (1600 N)"
+    assert location_geocoder.get_geometry_from_location(segment) is None
+    assert location_geocoder.get_geometry_from_location("WARD 32 MENU") is None
+
+    # a provider that timed out might have found it
+    geocoder.get_intersection_coordinates.side_effect = ProviderRequestError("transport request failed")
+    assert location_geocoder.get_geometry_from_location("W DIVISION ST & N LEAVITT ST") is None
+    assert location_geocoder.get_geometry_from_location("W DIVISION ST & N LEAVITT ST") is None
+
+    assert list(location_geocoder.cache.entries) == [segment, "WARD 32 MENU"]
+    # both ends of the segment, then the intersection twice
+    assert geocoder.get_intersection_coordinates.call_count == 4
+
+
+def test_location_cache_evicts_least_recently_used():
+    cache = LocationCache(max_entries=2)
+    cache.set("A", Point(0, 0))
+    cache.set("B", Point(1, 1))
+    cache.get("A")
+    cache.set("C", Point(2, 2))
+
+    assert list(cache.entries) == ["A", "C"]
+
+
+def test_location_cache_round_trips(tmp_path):
+    cache = LocationCache()
+    cache.set("434-442 E 46TH PL", LineString([(-87.61, 41.81), (-87.61, 41.82)]))
+    cache.set("WARD 32 MENU", None)
+    cache.save(tmp_path / "locations.json")
+
+    loaded = LocationCache()
+    loaded.load(tmp_path / "locations.json")
+    loaded.load(tmp_path / "missing.json")
+
+    assert loaded.entries["434-442 E 46TH PL"].equals(cache.entries["434-442 E 46TH PL"])
+    assert loaded.entries["WARD 32 MENU"] is None
+
+
+def _deterministic_geocoder():
+    geocoder = MagicMock(spec=['get_street_address_coordinates', 'get_intersection_coordinates'])
+    geocoder.get_street_address_coordinates.side_effect = lambda address: Point(address.number, len(address.street.name))
+    # the intersections of one street with itself, and with HIRSCH, aren't found
+    geocoder.get_intersection_coordinates.side_effect = lambda intersection: (
+        None if 'HIRSCH' in str(intersection) or intersection.street1 == intersection.street2
+        else Point(len(intersection.street1.name), len(intersection.street2.name) * 2))
+    return geocoder
+
+
+LOCATION_TEXTS = [
+    "N CAMPBELL AVE & W LE MOYNE ST & W HIRSCH ST & N MAPLEWOOD AVE",
+    "1400 N CAMPBELL AVE; N CAMPBELL AVE & W LE MOYNE ST & W HIRSCH ST & N MAPLEWOOD AVE",
+    "ON N LEAVITT ST FROM W DIVISION ST (1200 N) TO W NORTH AVE (1600 N)",
+    "ON W 52ND PL FROM 322 W TO S PRINCETON AVE (300 W)",
+    "434-442 E 46TH PL",
+    "W LE MOYNE ST & N CAMPBELL AVE",
+    "N CAMPBELL AVE & W LE MOYNE ST",
+    "1110 N STATE ST; 1030 N STATE ST",
+    "WARD 32 MENU",
+    "ON N LEAVITT ST FROM W HIRSCH ST (1300 N) TO W NORTH AVE (1600 N)",
+]
+
+
+def test_location_geocoder_pipeline_matches_row_by_row():
+    row_by_row = [LocationGeocoder(_deterministic_geocoder()).process_location_text(text) for text in LOCATION_TEXTS]
+
+    geocoder = _deterministic_geocoder()
+    pipeline = LocationGeocoder(geocoder).process_location_texts(LOCATION_TEXTS)
+
+    for expected, result in zip(row_by_row, pipeline):
+        assert (expected is None and result is None) or expected.equals(result)
+    # 6 alley intersections shared by two rows, 5 in the other rows; LE MOYNE & CAMPBELL
+    # is looked up apart from CAMPBELL & LE MOYNE since street order is kept
+    assert geocoder.get_intersection_coordinates.call_count == 11
+
+
+def test_location_geocoder_pipeline_geocodes_locations_evicted_while_assembling():
+    geocoder = _mock_geocoder()
+    location_geocoder = LocationGeocoder(geocoder, LocationCache(max_entries=1))
+    location_geocoder.cache.set("1110 N STATE ST", Point(1110, 41.9))
+
+    # caching 1030 N STATE ST evicts 1110 N STATE ST, which wasn't resolved with the batch
+    geometries = location_geocoder.process_location_texts(["1030 N STATE ST", "1110 N STATE ST"])
+
+    assert geometries == [Point(1030, 41.9), Point(1110, 41.9)]
+
+
+def test_location_geocoder_in_parallel_matches_row_by_row():
+    row_by_row = [LocationGeocoder(_deterministic_geocoder()).process_location_text(text) for text in LOCATION_TEXTS]
+
+    location_geocoder = LocationGeocoder(_deterministic_geocoder())
+    parallel = location_geocoder.process_location_texts_in_parallel(LOCATION_TEXTS, workers=2)
+
+    for expected, result in zip(row_by_row, parallel):
+        assert (expected is None and result is None) or expected.equals(result)
+    # the workers' results are cached in this process, the segment with an end that isn't found as a miss
+    assert "1400 N CAMPBELL AVE" in location_geocoder.cache
+    assert location_geocoder.cache.get("ON N LEAVITT ST FROM W HIRSCH ST (1300 N) TO W NORTH AVE (1600 N)") == (True, None)
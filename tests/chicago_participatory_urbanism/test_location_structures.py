@@ -0,0 +1,37 @@
+import dataclasses
+
+import pytest
+
+from src.chicago_participatory_urbanism.location_structures import Intersection, Street, StreetAddress, intern_street
+
+
+def test_street_is_normalized_and_hashable():
+    street = Street(' w', 'Armitage ', 'ave')
+    assert street == Street('W', 'ARMITAGE', 'AVE')
+    assert str(street) == 'W ARMITAGE AVE'
+    assert {street: 1}[Street('W', 'ARMITAGE', 'AVE')] == 1
+    assert not hasattr(street, '__dict__')
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        street.name = 'FULLERTON'
+
+
+def test_intersection_equality_ignores_street_order():
+    division = Street('W', 'DIVISION', 'ST')
+    paulina = Street('N', 'PAULINA', 'ST')
+
+    assert Intersection(division, paulina) == Intersection(paulina, division)
+    assert hash(Intersection(division, paulina)) == hash(Intersection(paulina, division))
+    assert len({Intersection(division, paulina), Intersection(paulina, division)}) == 1
+    # the streets keep the order they were given in
+    assert Intersection(paulina, division).street1 == paulina
+
+
+def test_street_address_is_hashable():
+    addresses = [StreetAddress(3221, Street('W', 'ARMITAGE', 'AVE')), StreetAddress(3221, Street('w', 'armitage', 'ave'))]
+    assert len(set(addresses)) == 1
+
+
+def test_intern_street_shares_objects():
+    assert intern_street('', 'Wellington', '') is intern_street('', 'WELLINGTON', '')
+    assert intern_street('', 'WELLINGTON', '') == Street('', 'WELLINGTON', '')
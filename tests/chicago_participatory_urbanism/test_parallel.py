@@ -0,0 +1,17 @@
+import os
+
+from src.chicago_participatory_urbanism.parallel import parallel_map
+
+
+def test_parallel_map_keeps_order_and_uses_workers():
+    offset = 10
+    results = parallel_map(lambda item: (item + offset, os.getpid()), list(range(50)), workers=2, chunk_size=5)
+
+    assert [result for result, _ in results] == list(range(10, 60))
+    assert os.getpid() not in {pid for _, pid in results}
+
+
+def test_parallel_map_runs_single_worker_in_process():
+    results = parallel_map(lambda item: os.getpid(), [1, 2, 3], workers=1)
+
+    assert results == [os.getpid()] * 3
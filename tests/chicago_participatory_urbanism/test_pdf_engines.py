@@ -0,0 +1,34 @@
+import pytest
+
+from src.chicago_participatory_urbanism.ward_spending.extract_text_from_pdf import iter_table_rows
+from src.chicago_participatory_urbanism.ward_spending.pdf_engines import cell_spans, get_pdf_engine
+
+
+def test_cell_spans_joins_wrapped_lines_at_the_cell_middle():
+    spans = cell_spans([
+        ("Ward: 4 ", 15.12, 496.96, 10),
+        ("", 15.12, 496.96, 10),
+        ("2 LPR on Existing Cameras: 1933 N Milwaukee, 1955 N", 15.84, 429.04, 9),
+        ("Damen ", 15.84, 418.54, 9),
+        ("1933 N MILWAUKEE AVE; 1955 N DAMEN AVE ", 285.84, 423.8, 9),
+        ("$21,942.00", 855.74, 423.8, 9),
+        # the next row's item, in the same column but a row height down
+        ("Alley Resurfacing Menu (2021) ", 15.84, 399.4, 9),
+    ])
+
+    assert spans == [
+        ("Ward: 4", 15.12, 496.96),
+        ("2 LPR on Existing Cameras: 1933 N Milwaukee, 1955 N Damen", 15.84, pytest.approx(423.79)),
+        ("1933 N MILWAUKEE AVE; 1955 N DAMEN AVE", 285.84, 423.8),
+        ("$21,942.00", 855.74, 423.8),
+        ("Alley Resurfacing Menu (2021)", 15.84, 399.4),
+    ]
+    assert list(iter_table_rows([spans]))[0] == {
+        "ward": "4", "item": "2 LPR on Existing Cameras: 1933 N Milwaukee, 1955 N Damen",
+        "loc": "1933 N MILWAUKEE AVE; 1955 N DAMEN AVE", "cost": "$21,942.00"}
+
+
+def test_get_pdf_engine_rejects_unknown_engines():
+    assert get_pdf_engine('pypdf2').name == 'pypdf2'
+    with pytest.raises(ValueError):
+        get_pdf_engine('ocr')
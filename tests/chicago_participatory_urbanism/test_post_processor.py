@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from src.chicago_participatory_urbanism.ward_spending.post_processor import (SPENDING_DTYPES, apply_spending_schema,
+                                                                             post_process_data)
+
+
+def test_post_process_data_returns_the_spending_schema(tmp_path):
+    file_path = tmp_path / "2021 Menu.csv"
+    file_path.write_text(
+        "ward,item,location,cost\n"
+        "1,Alley Resurfacing Menu (2021),1513 W GRAND AVE,\"$26,064.21\"\n"
+        "1,Street Lights (2021),,\"$1,000.00\"\n"
+        "2,POD Camera (2021),W HURON ST &  N NOBLE ST,\"$12,388.00\"\n")
+
+    data = post_process_data(str(file_path), "2021")
+
+    assert data.dtypes.to_dict() == {column: pd.api.types.pandas_dtype(dtype)
+                                     for column, dtype in SPENDING_DTYPES.items()}
+    assert data["item"].tolist() == ["Alley Resurfacing Menu", "POD Camera"]
+    assert data["cost"].tolist() == [26064.21, 12388.0]
+    assert data["year"].tolist() == [2021, 2021]
+    assert data["category"].tolist() == ["Alleys", "Police Cameras"]
+
+
+def test_apply_spending_schema_rejects_unknown_categories():
+    data = pd.DataFrame({"ward": [1, 2], "category": ["Alleys", "Education"]})
+
+    with pytest.raises(ValueError, match="Education"):
+        apply_spending_schema(data)
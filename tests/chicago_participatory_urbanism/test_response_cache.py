@@ -0,0 +1,45 @@
+from src.chicago_participatory_urbanism.response_cache import ResponseCache
+from unittest.mock import patch
+
+
+def test_response_cache_stores_hits_and_misses(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses.sqlite')
+    cache.set('census', '3221 W ARMITAGE AVE', [-87.7, 41.9])
+    cache.set('census', '1400 N WRONG AVE', None)
+
+    assert cache.get('census', '3221  w armitage ave') == (True, [-87.7, 41.9])
+    assert cache.get('census', '1400 N WRONG AVE') == (True, None)
+    assert cache.get('nominatim', '3221 W ARMITAGE AVE') == (False, None)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_response_cache_persists_across_instances(tmp_path):
+    ResponseCache(tmp_path / 'responses.sqlite').set('address', '3221 W ARMITAGE AVE', [[-87.7, 41.9]])
+    reopened = ResponseCache(tmp_path / 'responses.sqlite')
+    assert reopened.get('address', '3221 W ARMITAGE AVE') == (True, [[-87.7, 41.9]])
+    assert len(reopened) == 1
+
+
+def test_response_cache_expires_entries_after_ttl(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses.sqlite', ttl=60)
+    with patch('src.chicago_participatory_urbanism.response_cache.time.time', return_value=1000):
+        cache.set('census', '3221 W ARMITAGE AVE', [-87.7, 41.9])
+    with patch('src.chicago_participatory_urbanism.response_cache.time.time', return_value=1030):
+        assert cache.get('census', '3221 W ARMITAGE AVE')[0]
+    with patch('src.chicago_participatory_urbanism.response_cache.time.time', return_value=1100):
+        assert not cache.get('census', '3221 W ARMITAGE AVE')[0]
+    assert len(cache) == 0
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses.sqlite', max_entries=2)
+    with patch('src.chicago_participatory_urbanism.response_cache.time.time', side_effect=[1, 2, 3, 4]):
+        cache.set('census', 'A', None)
+        cache.set('census', 'B', None)
+        cache.get('census', 'A')
+        cache.set('census', 'C', None)
+
+    assert len(cache) == 2
+    assert cache.get('census', 'A')[0]
+    assert not cache.get('census', 'B')[0]
+    assert cache.get('census', 'C')[0]
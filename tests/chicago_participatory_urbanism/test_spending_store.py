@@ -0,0 +1,82 @@
+import pandas as pd
+
+from src.chicago_participatory_urbanism.ward_spending.spending_store import SpendingStore
+
+
+def _spending(year, rows):
+    return pd.DataFrame(
+        [(ward, item, "1383 N WOLCOTT AVE", cost, year, "Alleys") for ward, item, cost in rows],
+        columns=["ward", "item", "location", "cost", "year", "category"])
+
+
+def test_upsert_replaces_the_years_and_wards_it_has(tmp_path):
+    store = SpendingStore(tmp_path / "spending")
+    store.upsert(_spending(2023, [(1, "Alley Apron Menu", 10.0), (2, "Alley Apron Menu", 20.0)]))
+    store.upsert(_spending(2024, [(1, "Alley Apron Menu", 30.0)]))
+
+    store.upsert(_spending(2023, [(2, "Alley Resurfacing Menu", 25.0)]))
+
+    data = store.read()
+    assert list(zip(data["year"], data["ward"], data["item"])) == [
+        (2023, 1, "Alley Apron Menu"), (2023, 2, "Alley Resurfacing Menu"), (2024, 1, "Alley Apron Menu")]
+    assert data["ward"].dtype == "int8"
+    assert data["category"].dtype == "category"
+
+
+def test_append_adds_rows_after_those_stored(tmp_path):
+    store = SpendingStore(tmp_path / "spending")
+    store.append(_spending(2024, [(10, "Q1", 1.0), (2, "Q1", 2.0)]))
+    store.append(_spending(2024, [(10, "Q3", 3.0)]))
+
+    data = store.read()
+
+    # ward order, not path order (ward=10 before ward=2), and write order within a ward
+    assert list(zip(data["ward"], data["item"])) == [(2, "Q1"), (10, "Q1"), (10, "Q3")]
+
+
+def test_read_filters_years_wards_and_columns(tmp_path):
+    store = SpendingStore(tmp_path / "spending")
+    store.upsert(_spending(2023, [(1, "A", 1.0), (2, "B", 2.0)]))
+    store.upsert(_spending(2024, [(1, "C", 3.0), (2, "D", 4.0)]))
+
+    assert store.read(years=[2024])["item"].tolist() == ["C", "D"]
+    assert store.read(wards=[2])["item"].tolist() == ["B", "D"]
+    assert store.read(years=[2023], wards=[1], columns=["item", "cost"]).to_dict("list") == {"item": ["A"], "cost": [1.0]}
+    assert len(SpendingStore(tmp_path / "missing").read()) == 0
+
+
+def test_export_csv_and_sources(tmp_path):
+    store = SpendingStore(tmp_path / "spending")
+    source = tmp_path / "2024 Q1-Q2 menu spending.csv"
+    _spending(2024, [(1, "Alley Apron Menu", 157172.86)]).to_csv(source, index=False)
+
+    assert not store.is_ingested(source)
+    store.append(pd.read_csv(source), source=source)
+    store.record_source(source)
+    store.export_csv(tmp_path / "export.csv")
+
+    assert store.is_ingested(source)
+    assert (tmp_path / "export.csv").read_text() == source.read_text()
+    source.write_text(source.read_text() + "2,Alley Apron Menu,2619 N WASHTENAW AVE,69430.67,2024,Alleys\n")
+    assert not store.is_ingested(source)
+
+
+def test_append_replaces_the_rows_of_a_changed_source(tmp_path):
+    store = SpendingStore(tmp_path / "spending")
+    first_half = tmp_path / "2024 Q1-Q2 menu spending.csv"
+    third_quarter = tmp_path / "2024 Q3 menu spending.csv"
+    _spending(2024, [(1, "Q1", 1.0), (2, "Q2", 2.0)]).to_csv(first_half, index=False)
+    _spending(2024, [(1, "Q3", 3.0)]).to_csv(third_quarter, index=False)
+    for source in [first_half, third_quarter]:
+        store.append(pd.read_csv(source), source=source)
+        store.record_source(source)
+
+    # a corrected file: ward 2's row moves to ward 3
+    _spending(2024, [(1, "Q1", 1.5), (3, "Q2", 2.0)]).to_csv(first_half, index=False)
+    store.append(pd.read_csv(first_half), source=first_half)
+
+    data = store.read()
+    assert list(zip(data["ward"], data["item"], data["cost"])) == [
+        (1, "Q3", 3.0), (1, "Q1", 1.5), (3, "Q2", 2.0)]
+    assert not store.is_ingested(first_half)
+    assert store.is_ingested(third_quarter)
@@ -0,0 +1,48 @@
+from src.chicago_participatory_urbanism.street_intersections import IntersectionTable, build_intersection_table
+import geopandas as gpd
+from shapely.geometry import LineString, MultiLineString, Point
+from shapely.ops import unary_union
+
+
+def _street_grid():
+    return gpd.GeoDataFrame(
+        {'street_nam': ['WESTERN', 'WESTERN', 'ASHLAND', 'ASHLAND', 'BELMONT', 'BELMONT', 'DIVERSEY', None]},
+        geometry=[
+            LineString([(0, 0), (0, 1)]),
+            LineString([(0, 1), (0, 2)]),
+            LineString([(2, 0), (2, 1)]),
+            MultiLineString([[(2, 1), (2, 2)]]),
+            LineString([(-1, 1), (0, 1)]),
+            LineString([(0, 1), (2, 1)]),
+            LineString([(-1, 1.5), (3, 1.5)]),
+            LineString([(-1, 0.5), (3, 0.5)]),
+        ],
+        crs='EPSG:4326',
+    )
+
+
+def test_build_intersection_table_finds_every_touching_pair():
+    table = build_intersection_table(_street_grid())
+    pairs = set(zip(table['street1'], table['street2']))
+    assert pairs == {
+        ('ASHLAND', 'BELMONT'),
+        ('ASHLAND', 'DIVERSEY'),
+        ('BELMONT', 'WESTERN'),
+        ('DIVERSEY', 'WESTERN'),
+    }
+
+
+def test_build_intersection_table_matches_street_union_intersection():
+    street_center_lines_gdf = _street_grid()
+    table = IntersectionTable(build_intersection_table(street_center_lines_gdf))
+    for street1, street2 in [('WESTERN', 'BELMONT'), ('ASHLAND', 'DIVERSEY'), ('DIVERSEY', 'WESTERN')]:
+        street1_geometry = unary_union(street_center_lines_gdf[street_center_lines_gdf['street_nam'] == street1].geometry)
+        street2_geometry = unary_union(street_center_lines_gdf[street_center_lines_gdf['street_nam'] == street2].geometry)
+        assert table.get_point(street1, street2) == street1_geometry.intersection(street2_geometry)
+
+
+def test_intersection_table_lookup_is_order_independent():
+    table = IntersectionTable(build_intersection_table(_street_grid()))
+    assert table.get_point('WESTERN', 'BELMONT') == Point(0, 1)
+    assert table.get_point('BELMONT', 'WESTERN') == Point(0, 1)
+    assert table.get_point('WESTERN', 'ASHLAND') is None